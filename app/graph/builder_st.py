@@ -2,27 +2,37 @@ from dotenv import load_dotenv
 from langgraph.graph import START, END, StateGraph
 from schemas.global_state import State
 from models.node_preprocess_st import preprocess_data, relevance_categorize, select_keywords, information_refine
-from models.node_listing_st import keyword_distribute, generate_listing, listing_verificate
+from models.node_listing_st import keyword_distribute, generate_title_node, generate_bp_description_node, generate_listing, listing_verificate
 from models.node_regenerate_st import parse_user_feedback, feedback_check, regenerate_title, regenerate_bp, regenerate_description
 
 from graph.router import feedback_router, no_pdf_router
+from utils.instrumentation import instrument_node
 
 load_dotenv()
 
-def build_initial_graph():
+def build_initial_graph(checkpointer=None):
     """
-    사용자 피드백 이전까지의 초기 분석 그래프
+    사용자 피드백 이전까지의 초기 분석 그래프 (모든 노드는 instrument_node로 소요 시간과 LLM 사용량을 기록합니다)
+    checkpointer를 주면 노드가 끝날 때마다 상태를 저장해, 중단된 분석을 이어서 할 수 있습니다.
     """
     builder = StateGraph(State)
     
     # 키워드 전처리
-    builder.add_sequence([preprocess_data, relevance_categorize, select_keywords])
-    builder.add_node('information_refine', information_refine)
+    builder.add_sequence([instrument_node(node) for node in (preprocess_data, relevance_categorize, select_keywords)])
+    builder.add_node('information_refine', instrument_node(information_refine))
     
     # 초안 작성
     builder.add_edge("select_keywords", "keyword_distribute")
-    builder.add_sequence([keyword_distribute, generate_listing])
-    builder.add_node('listing_verificate', listing_verificate)
+    builder.add_node('keyword_distribute', instrument_node(keyword_distribute))
+    
+    # Title / (BP → Description) 병렬 작성 → 합류
+    builder.add_node('generate_title', instrument_node(generate_title_node))
+    builder.add_node('generate_bp_description', instrument_node(generate_bp_description_node))
+    builder.add_node('generate_listing', instrument_node(generate_listing))
+    builder.add_edge('keyword_distribute', 'generate_title')
+    builder.add_edge('keyword_distribute', 'generate_bp_description')
+    builder.add_edge(['generate_title', 'generate_bp_description'], 'generate_listing')
+    builder.add_node('listing_verificate', instrument_node(listing_verificate))
 
     # 연결
     builder.add_conditional_edges(
@@ -47,7 +57,7 @@ def build_initial_graph():
     
     builder.add_edge('listing_verificate', END)
     
-    return builder.compile()
+    return builder.compile(checkpointer=checkpointer)
 
 def build_feedback_graph():
     """
@@ -56,13 +66,13 @@ def build_feedback_graph():
     builder = StateGraph(State)
     
     # 피드백 처리
-    builder.add_node('parse_user_feedback', parse_user_feedback)
-    builder.add_node('feedback_check', feedback_check)
+    builder.add_node('parse_user_feedback', instrument_node(parse_user_feedback))
+    builder.add_node('feedback_check', instrument_node(feedback_check))
     
     # 재생성 노드
-    builder.add_node('regenerate_title', regenerate_title)
-    builder.add_node('regenerate_bp', regenerate_bp)
-    builder.add_node('regenerate_description', regenerate_description)
+    builder.add_node('regenerate_title', instrument_node(regenerate_title))
+    builder.add_node('regenerate_bp', instrument_node(regenerate_bp))
+    builder.add_node('regenerate_description', instrument_node(regenerate_description))
     
     # 연결
     builder.add_edge(START, 'parse_user_feedback')
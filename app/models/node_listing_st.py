@@ -1,144 +1,181 @@
-import streamlit as st
-from langchain_openai import ChatOpenAI
+import time
 from schemas.global_state import State
 from schemas.schema import KeywordDistribute
 from prompts.prompt_listing import keyword_prompt, verification_prompt
 from utils.config_loader import config
+from utils.runtime import chat_model, with_deadline
+from utils.llm_cache import cache_on_success
+from utils.token_func import count_tokens
+from utils.prompt_budget import plan_keyword_payload
 from utils.listing_func import generate_title, generate_bp, generate_description
+from utils import progress
 from dotenv import load_dotenv
 
 
 load_dotenv()
 
-llm = ChatOpenAI(model=config['llm_listing']['model'], temperature=float(config['llm_listing']['temperature']))
+llm = chat_model(config['llm_listing']['model'], float(config['llm_listing']['temperature']), node='keyword_distribute')
+
+# 검증용 LLM은 호출마다 새로 만들지 않고 재사용합니다.
+# 섹션마다 [listing_verificate] timeout초 안에 끝나지 않으면 재시도하지 않고 실패로 처리합니다.
+verification_timeout = config.getfloat('listing_verificate', 'timeout')
+verification_llm = chat_model("gpt-4o", 0, node='listing_verificate', retries=0, timeout=verification_timeout)
+verification_chain = with_deadline(verification_prompt | verification_llm, verification_timeout)
 
 # ====================================================================================================
 # 키워드 분배 노드
+KEYWORD_PROMPT_COLUMNS = ['keyword', 'relevance_category', 'value_score']
 def keyword_distribute(state: State):
-    with st.status(f"키워드 {len(state['data'])}개 분배 중...", expanded=True) as status:
-
-        if not state['data']:
-            st.warning("데이터가 없어 키워드 분배를 종료합니다.")
-            if st.button("처음으로"):
-                st.session_state.current_step = '데이터 입력'
-                st.rerun()
-            return
-        
-        try:
-            prompt = keyword_prompt.invoke(
-                {
-                    'product_name': state['product_name'], 
-                    'category': state['category'],
-                    'product_information': state['product_information'], 
-                    'data': state['data'],
-                }
-            )
-            structured_llm = llm.with_structured_output(KeywordDistribute)
-            res = structured_llm.invoke(prompt)
-            
-            st.success('키워드 분배를 완료하였습니다')
-            
-            st.write('=== 키워드 분배 결과 ===')
-            st.write(f' Title Keyword: {len(res.title_keyword)}개')
-            st.write(f' BP Keyword: {len(res.bp_keyword)}개')
-            st.write(f' Description Keyword: {len(res.description_keyword)}개')
-            st.write(f' Leftover: {len(res.leftover)}개')
-            
-                        
-            status.update(label="키워드 분배 완료", state="complete", expanded=False)
-            
-            return {
-                'title_keyword': res.title_keyword, 
-                'bp_keyword': res.bp_keyword, 
-                'description_keyword': res.description_keyword, 
-                'leftover': res.leftover
-            }    
-
-        except Exception as e:
-            st.error(f"키워드 분배 중 에러가 발생했습니다: {e}")
-            if st.button("처음으로"):
-                st.session_state.current_step = '데이터 입력'
-                st.rerun()
-            return
+    progress.status(f"키워드 {len(state['data'])}개 분배 중...")
+
+    if not state['data']:
+        progress.warning("데이터가 없어 키워드 분배를 종료합니다.", restart=True)
+        return
+
+    try:
+        inputs = {
+            'product_name': state['product_name'], 
+            'category': state['category'],
+            'product_information': state['product_information'], 
+        }
+
+        # 키워드 표를 압축하고 토큰 예산을 넘으면 value_score가 낮은 키워드부터 잘라 Leftover로 보냅니다.
+        model = config['llm_listing']['model']
+        rows = state['data'].to_records(KEYWORD_PROMPT_COLUMNS)
+        before_tokens = count_tokens(keyword_prompt.format(**inputs, data=state['data'].to_records()), model)
+        table, prompt_rows, after_tokens = plan_keyword_payload(
+            lambda table: keyword_prompt.format(**inputs, data=table),
+            rows, KEYWORD_PROMPT_COLUMNS, config.getint('prompt_budget', 'keyword_distribute'), model
+        )
+        prompt_keywords = {row['keyword'] for row in prompt_rows}
+        trimmed = [row['keyword'] for row in rows if row['keyword'] not in prompt_keywords]
+        progress.write(f"프롬프트 토큰: {before_tokens} → {after_tokens} (키워드 {len(prompt_rows)}/{len(rows)}개)")
+
+        prompt = keyword_prompt.invoke({**inputs, 'data': table})
+        structured_llm = cache_on_success(llm.with_structured_output(KeywordDistribute))
+        res = structured_llm.invoke(prompt)
+
+        progress.success('키워드 분배를 완료하였습니다')
+
+        progress.write('=== 키워드 분배 결과 ===')
+        progress.write(f' Title Keyword: {len(res.title_keyword)}개')
+        progress.write(f' BP Keyword: {len(res.bp_keyword)}개')
+        progress.write(f' Description Keyword: {len(res.description_keyword)}개')
+        progress.write(f' Leftover: {len(res.leftover)}개')
+
+
+        progress.complete("키워드 분배 완료")
+
+        return {
+            'title_keyword': res.title_keyword, 
+            'bp_keyword': res.bp_keyword, 
+            'description_keyword': res.description_keyword, 
+            'leftover': res.leftover + trimmed,
+            'listing_started': time.time(),
+        }    
+
+    except Exception as e:
+        progress.error(f"키워드 분배 중 에러가 발생했습니다: {e}")
+        return
+
+# ====================================================================================================
+# 리스팅 작성 브랜치
+# keyword_distribute 이후 Title 브랜치와 BP → Description 브랜치를 병렬로 작성합니다.
+# LangGraph는 한 단계(superstep)의 노드가 모두 끝나야 다음 단계로 넘어가므로, Description을 별도 노드로 두면
+# Title이 끝날 때까지 기다리게 됩니다. BP가 끝나면 바로 Description을 쓰도록 두 작업을 한 노드에서 이어서 실행합니다.
+def _timed(name, func, state: State):
+    """리스팅 작성 함수를 실행하고 (State 업데이트, {name: 소요 시간})을 반환합니다."""
+    start = time.perf_counter()
+    update = func(state) or {}
+    return update, {name: time.perf_counter() - start}
+
+def generate_title_node(state: State):
+    update, latency = _timed('title', generate_title, state)
+    return {**update, 'listing_latency': latency}
+
+def generate_bp_description_node(state: State):
+    """BP를 작성한 뒤 그 결과로 바로 Description을 작성합니다. BP를 작성하지 못했으면 Description도 건너뜁니다."""
+    bp_update, bp_latency = _timed('bp', generate_bp, state)
+    if not bp_update.get('bp'):
+        progress.warning('Bullet Point가 없어 Description 작성을 건너뜁니다.')
+        return {'listing_latency': bp_latency}
+    description_update, description_latency = _timed('description', generate_description, {**state, **bp_update})
+    return {**bp_update, **description_update, 'listing_latency': {**bp_latency, **description_latency}}
 
 # ====================================================================================================
-# 노드 작성
+# 리스팅 합류 노드
 def generate_listing(state: State):
     """
-    Title, Bullet Points, Description을 순차적으로 생성하기 위해
-    기존의 개별 생성 함수들을 호출하는 메인 함수.
+    Title 브랜치와 BP → Description 브랜치가 모두 끝난 뒤 실행되는 합류 노드.
+    브랜치별 소요 시간과, 브랜치 시작부터 합류까지 실제로 걸린 시간을 표시합니다.
     """
-    title_update = generate_title(state)
-    bp_update = generate_bp(state)
-    
-    # generate_description 함수는 state에서 'bp' 결과를 필요로 함
-    temp_state = state.copy()
-    temp_state.update(bp_update)
-        
-    description_update = generate_description(temp_state)
+    latency = state.get('listing_latency') or {}
+    title_time = latency.get('title', 0.0)
+    bp_time = latency.get('bp', 0.0)
+    description_time = latency.get('description', 0.0)
+    started = state.get('listing_started')
+    total = f" / 전체(병렬): {time.time() - started:.1f}초" if started else ''
     
-    final_update = {}
-    final_update.update(title_update)
-    final_update.update(bp_update)
-    final_update.update(description_update)
+    progress.info(
+        f"리스팅 작성 소요 시간 - Title: {title_time:.1f}초 / Bullet Point: {bp_time:.1f}초 / "
+        f"Description: {description_time:.1f}초{total}"
+    )
     
-    return final_update
+    return {}
 
 
 # ====================================================================================================
 # Listing Verification 노드
 
 def listing_verificate(state: State) -> dict:
-    with st.status("리스팅 검증 중...", expanded=True) as status:
-        try:
-            # 1. State에서 현재 리스팅 정보와 제품 사실 정보를 올바른 방식으로 가져옵니다.
-            current_title = state["title"]
-            current_bp = state["bp"]
-            current_description = state["description"]
-            product_information = state["product_information"]
-
-            # 2. LLM을 초기화하고 검증 체인을 생성합니다.
-            llm = ChatOpenAI(model="gpt-4o", temperature=0)
-            verification_chain = verification_prompt | llm
-
-            # Title 검증
-            title_response = verification_chain.invoke({
-                "product_information": product_information,
-                "content_type": "Title",
-                "content_to_verify": current_title
-            })
-            verified_title = title_response.content
-            st.success("Title 검증 완료!")
-
-            # Bullet Points 검증
-            bp_as_string = "\n".join(current_bp)
-            bp_response = verification_chain.invoke({
-                "product_information": product_information,
-                "content_type": "Bullet Points",
-                "content_to_verify": bp_as_string
-            })
-            st.success("Bullet Points 검증 완료!")
-            verified_bp = bp_response.content.strip().split('\n')
-
-            # Description 검증
-            description_response = verification_chain.invoke({
-                "product_information": product_information,
-                "content_type": "Description",
-                "content_to_verify": current_description
-            })
-            verified_description = description_response.content
-            st.success("Description 검증 완료!")
-
-            status.update(label="검증 작업 완료", state="complete", expanded=False)
-
-            return {
-                "title": verified_title,
-                "bp": verified_bp,
-                "description": verified_description,
-            }
-        except Exception as e:
-            st.error(f'리스팅 검증 중 에러가 발생했습니다: {e}')
-            if st.button("처음으로"):
-                st.session_state.current_step = '데이터 입력'
-                st.rerun()
-            return
+    progress.status("리스팅 검증 중...")
+    try:
+        # 1. State에서 현재 리스팅 정보와 제품 사실 정보를 가져옵니다.
+        current_title = state["title"]
+        current_bp = state["bp"]
+        current_description = state["description"]
+        product_information = state["product_information"]
+
+        # 2. 서로 독립적인 Title, Bullet Points, Description 검증을 동시에 요청합니다.
+        sections = [
+            ("Title", current_title),
+            ("Bullet Points", "\n".join(current_bp)),
+            ("Description", current_description),
+        ]
+        responses = verification_chain.batch(
+            [
+                {
+                    "product_information": product_information,
+                    "content_type": content_type,
+                    "content_to_verify": content_to_verify
+                }
+                for content_type, content_to_verify in sections
+            ],
+            config={'max_concurrency': len(sections)},
+            return_exceptions=True
+        )
+
+        # 3. 실패하거나 시간 초과된 섹션은 검증 전 내용을 유지합니다.
+        verified = {}
+        for (content_type, _), response in zip(sections, responses):
+            if isinstance(response, Exception):
+                progress.warning(f"{content_type} 검증에 실패하여 기존 내용을 유지합니다: {response}")
+                verified[content_type] = None
+            else:
+                verified[content_type] = response.content
+                progress.success(f"{content_type} 검증 완료!")
+
+        verified_title = verified["Title"] if verified["Title"] is not None else current_title
+        verified_bp = verified["Bullet Points"].strip().split('\n') if verified["Bullet Points"] is not None else current_bp
+        verified_description = verified["Description"] if verified["Description"] is not None else current_description
+
+        progress.complete("검증 작업 완료")
+
+        return {
+            "title": verified_title,
+            "bp": verified_bp,
+            "description": verified_description,
+        }
+    except Exception as e:
+        progress.error(f'리스팅 검증 중 에러가 발생했습니다: {e}')
+        return
@@ -2,60 +2,61 @@ from schemas.global_state import State
 from schemas.schema import TitleOutput, BPOutput, DescriptionOutput, Feedback
 from prompts.prompt_listing import title_prompt, bp_prompt, description_prompt
 from prompts.prompt_feedback import feedback_prompt
-from langchain_openai import ChatOpenAI
 from utils.config_loader import config
+from utils.runtime import chat_model
+from utils.llm_cache import cache_on_success
+from utils.rate_limiter import PRIORITY_INTERACTIVE
+from utils import progress
 from dotenv import load_dotenv
-import streamlit as st
 load_dotenv()
 
 
-llm = ChatOpenAI(model=config['llm_listing']['model'], temperature=float(config['llm_listing']['temperature']))
+# 사용자가 기다리는 피드백 재생성 요청이므로 다른 세션의 초기 분석 요청보다 먼저 처리합니다.
+llm = chat_model(config['llm_listing']['model'], float(config['llm_listing']['temperature']), priority=PRIORITY_INTERACTIVE)
 
 # ====================================================================================================
 # 피드백 분류
 def parse_user_feedback(state: State):
     
-    # st.status를 전체 폭으로 표시하기 위해 명시적으로 설정
-    with st.container():
-        with st.status("피드백 내용 정리 중...", expanded=True) as status:
-            
-            llm = ChatOpenAI(model=config['llm_feedback']['model'], temperature=float(config['llm_feedback']['temperature']))
-            
-            structured_llm = llm.with_structured_output(Feedback)
-            prompt = feedback_prompt.invoke(
-                {
-                    'user_feedback': state['user_feedback'],
-                }
-            )
-            res = structured_llm.invoke(prompt)
-            
-            feedback_title = res.title or ''
-            
-            bp_raw = res.bp or ''
-            if isinstance(bp_raw, (list, tuple)):
-                feedback_bp = '\n'.join(bp_raw).strip()
-            else:
-                feedback_bp = bp_raw or ''
-                
-            feedback_description = res.description or ''
-            
-            if feedback_title:
-                st.write('Title: ', feedback_title) 
-            
-            if feedback_bp:
-                st.write('BP: ', feedback_bp)
-
-            if feedback_description:
-                st.write('Description: ', feedback_description)
-            
-            status.update(label="피드백 정리 완료", state="complete", expanded=False)
-        
-        return {
-            'user_feedback_title': feedback_title,
-            'user_feedback_bp': feedback_bp,
-            'user_feedback_description': feedback_description
+    progress.status("피드백 내용 정리 중...")
+
+    llm = chat_model(config['llm_feedback']['model'], float(config['llm_feedback']['temperature']), priority=PRIORITY_INTERACTIVE)
+
+    structured_llm = cache_on_success(llm.with_structured_output(Feedback))
+    prompt = feedback_prompt.invoke(
+        {
+            'user_feedback': state['user_feedback'],
         }
-            
+    )
+    res = structured_llm.invoke(prompt)
+
+    feedback_title = res.title or ''
+
+    bp_raw = res.bp or ''
+    if isinstance(bp_raw, (list, tuple)):
+        feedback_bp = '\n'.join(bp_raw).strip()
+    else:
+        feedback_bp = bp_raw or ''
+
+    feedback_description = res.description or ''
+
+    if feedback_title:
+        progress.write(f'Title: {feedback_title}')
+
+    if feedback_bp:
+        progress.write(f'BP: {feedback_bp}')
+
+    if feedback_description:
+        progress.write(f'Description: {feedback_description}')
+
+    progress.complete("피드백 정리 완료")
+
+    return {
+        'user_feedback_title': feedback_title,
+        'user_feedback_bp': feedback_bp,
+        'user_feedback_description': feedback_description
+    }
+
 # ====================================================================================================
 # 피드백 라우팅용 노드
 def feedback_check(state: State):
@@ -66,116 +67,115 @@ def feedback_check(state: State):
 # Title 노드
 def regenerate_title(state: State):
     
-    with st.status("Title 재작성중...", expanded=True) as status:
-                
-        try:
-            base_prompt = str(title_prompt.invoke(
-                {
-                    'product_name': state['product_name'], 
-                    'category': state['category'],
-                    'product_information': state['product_information'], 
-                    'title_keyword': state['title_keyword'],
-                }
-            ))
-            
-            title_feedback_prompt =  '[User Feedback]\n{user_feedback}\nYou are required to take this into consideration.\n' + base_prompt + '[\nCurrent Title\n{title}]'
-                
-            prompt = title_feedback_prompt.format(
-                user_feedback= state['user_feedback_title'],
-                title= state['title']
-            )
-            
-            structured_llm = llm.with_structured_output(TitleOutput)
-            res = structured_llm.invoke(prompt)
-            st.success('Title 재작성 성공')
-            st.write(res.title)
-            st.info(f'재작성된 Title: 총 {len(res.title)}자')
-            
-            status.update(label="Title 재작성 완료", state="complete", expanded=False)
-            
-            return {'title': res.title, 'user_feedback_title': ''}
-
-        except Exception as e:
-            st.warning(f"Title 재작성 중 에러가 발생했습니다: {e}")
-            return {'user_feedback_title': ''}
+    progress.status("Title 재작성중...")
+
+    try:
+        base_prompt = str(title_prompt.invoke(
+            {
+                'product_name': state['product_name'], 
+                'category': state['category'],
+                'product_information': state['product_information'], 
+                'title_keyword': state['title_keyword'],
+            }
+        ))
+
+        title_feedback_prompt =  '[User Feedback]\n{user_feedback}\nYou are required to take this into consideration.\n' + base_prompt + '[\nCurrent Title\n{title}]'
+
+        prompt = title_feedback_prompt.format(
+            user_feedback= state['user_feedback_title'],
+            title= state['title']
+        )
+
+        structured_llm = cache_on_success(llm.with_structured_output(TitleOutput))
+        res = structured_llm.invoke(prompt)
+        progress.success('Title 재작성 성공')
+        progress.write(res.title)
+        progress.info(f'재작성된 Title: 총 {len(res.title)}자')
+
+        progress.complete("Title 재작성 완료")
+
+        return {'title': res.title, 'user_feedback_title': ''}
+
+    except Exception as e:
+        progress.warning(f"Title 재작성 중 에러가 발생했습니다: {e}")
+        return {'user_feedback_title': ''}
 
 # ====================================================================================================
 # BP 노드
 def regenerate_bp(state: State):
     
-    with st.status("Bullet Points 재작성중...", expanded=True) as status:
-
-        try:
-            base_prompt = str(bp_prompt.invoke(
-                {
-                    'product_name': state['product_name'], 
-                    'category': state['category'],
-                    'product_information': state['product_information'], 
-                    'bp_keyword': state['bp_keyword'],
-                }
-            ))
-            
-            bp_feedback_prompt = '[User Feedback]\n{user_feedback}\nYou are required to take this into consideration.' + base_prompt + '[\nCurrent BP\n{bp}]'
-
-            prompt = bp_feedback_prompt.format(
-                user_feedback= state['user_feedback_bp'],
-                bp= state['bp']
-            )
-            
-            structured_llm = llm.with_structured_output(BPOutput)
-            res = structured_llm.invoke(prompt)
-            st.success('Bullet Point 재작성 성공')
-            bps = res.bp
-            bp_length = []
-            
-            for bp in bps:
-                st.write(bp)
-                bp_length.append(len(bp))    
-
-            st.info(f'재작성된 Bullet Point: 각 {','.join(map(str, bp_length))}자')
-            status.update(label="Bullet Points 재작성 완료", state="complete", expanded=False)
-
-            return {'bp': list(res.bp), 'user_feedback_bp': ''}
-        
-        except Exception as e:
-            st.warning(f"Bullet Point 재작성 중 에러가 발생했습니다: {e}")
-            return {'user_feedback_bp': ''}
+    progress.status("Bullet Points 재작성중...")
+
+    try:
+        base_prompt = str(bp_prompt.invoke(
+            {
+                'product_name': state['product_name'], 
+                'category': state['category'],
+                'product_information': state['product_information'], 
+                'bp_keyword': state['bp_keyword'],
+            }
+        ))
+
+        bp_feedback_prompt = '[User Feedback]\n{user_feedback}\nYou are required to take this into consideration.' + base_prompt + '[\nCurrent BP\n{bp}]'
+
+        prompt = bp_feedback_prompt.format(
+            user_feedback= state['user_feedback_bp'],
+            bp= state['bp']
+        )
+
+        structured_llm = cache_on_success(llm.with_structured_output(BPOutput))
+        res = structured_llm.invoke(prompt)
+        progress.success('Bullet Point 재작성 성공')
+        bps = res.bp
+        bp_length = []
+
+        for bp in bps:
+            progress.write(bp)
+            bp_length.append(len(bp))    
+
+        progress.info(f'재작성된 Bullet Point: 각 {','.join(map(str, bp_length))}자')
+        progress.complete("Bullet Points 재작성 완료")
+
+        return {'bp': list(res.bp), 'user_feedback_bp': ''}
+
+    except Exception as e:
+        progress.warning(f"Bullet Point 재작성 중 에러가 발생했습니다: {e}")
+        return {'user_feedback_bp': ''}
 
 # ====================================================================================================
 # Description 노드
 def regenerate_description(state: State):
-    with st.status("Description 재작성중...", expanded=True) as status:
-
-        try:
-            base_prompt = str(description_prompt.invoke(
-                {
-                    'bp_result': state['bp'],
-                    'product_name': state['product_name'], 
-                    'category': state['category'],
-                    'product_information': state['product_information'], 
-                    'description_keyword': state['description_keyword'],
-                }
-            ))
-            
-            description_feedback_prompt = '[User Feedback]\n{user_feedback}\nYou are required to take this into consideration.' + base_prompt + '[\nCurrent Description\n{description}]'
-            
-            prompt = description_feedback_prompt.format(
-                user_feedback= state['user_feedback_description'],
-                description= state['description']
-            )
-
-            structured_llm = llm.with_structured_output(DescriptionOutput)
-            res = structured_llm.invoke(prompt)
-            
-            st.success('Description 재작성 성공')
-            st.write(res.description)
-            st.info(f'재작성된 Description: 총 {len(res.description)}자')
-            
-            status.update(label="Description 재작성 완료", state="complete", expanded=False)
-
-            return {'description': res.description, 'user_feedback_description': ''}
-
-        except Exception as e:
-            st.warning(f"Description 재작성 중 에러가 발생했습니다: {e}")
-            return {'user_feedback_description': ''}
-        
\ No newline at end of file
+    progress.status("Description 재작성중...")
+
+    try:
+        base_prompt = str(description_prompt.invoke(
+            {
+                'bp_result': state['bp'],
+                'product_name': state['product_name'], 
+                'category': state['category'],
+                'product_information': state['product_information'], 
+                'description_keyword': state['description_keyword'],
+            }
+        ))
+
+        description_feedback_prompt = '[User Feedback]\n{user_feedback}\nYou are required to take this into consideration.' + base_prompt + '[\nCurrent Description\n{description}]'
+
+        prompt = description_feedback_prompt.format(
+            user_feedback= state['user_feedback_description'],
+            description= state['description']
+        )
+
+        structured_llm = cache_on_success(llm.with_structured_output(DescriptionOutput))
+        res = structured_llm.invoke(prompt)
+
+        progress.success('Description 재작성 성공')
+        progress.write(res.description)
+        progress.info(f'재작성된 Description: 총 {len(res.description)}자')
+
+        progress.complete("Description 재작성 완료")
+
+        return {'description': res.description, 'user_feedback_description': ''}
+
+    except Exception as e:
+        progress.warning(f"Description 재작성 중 에러가 발생했습니다: {e}")
+        return {'user_feedback_description': ''}
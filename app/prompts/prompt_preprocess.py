@@ -111,7 +111,16 @@ select_prompt = ChatPromptTemplate.from_messages([
 # ====================================================================================================
 # info_refine_prompt
 
+# 요약 프롬프트를 수정하면 버전을 올려주세요. 저장된 PDF 요약이 새 버전으로 다시 만들어집니다.
+summarization_prompt_version = 'v2'
+
 summarization_prompt = ChatPromptTemplate.from_messages([
         ("system", "You are an expert at summarizing product information. Please extract the key features, specifications, and purpose of the product from the following text in a concise manner. The summary should be in English."),
         ("human", "Product Text:\n```\n{product_text}\n```")
     ])
+
+# 긴 문서를 청크별로 요약한 뒤, 부분 요약들을 하나로 합칠 때 사용합니다.
+summary_reduce_prompt = ChatPromptTemplate.from_messages([
+        ("system", "You are an expert at summarizing product information. The following are partial summaries of different sections of the same product documents. Merge them into one concise summary of the key features, specifications, and purpose of the product. Remove duplicated information and keep the summary under {max_tokens} tokens. The summary should be in English."),
+        ("human", "Partial Summaries:\n```\n{summaries}\n```")
+    ])
@@ -1,6 +1,9 @@
+from functools import partial
 import streamlit as st
-from graph.builder_st import build_feedback_graph
+from utils.runtime import feedback_graph
 from utils.result_format import result_format
+from utils.instrumentation import instrument_run
+from ui.ui_progress import GraphProgress
 
 
 def show_feedback_form():
@@ -107,7 +110,7 @@ def show_feedback_processing():
     # 전체 폭으로 피드백 처리 상태 표시
     with st.status("피드백을 반영하여 결과를 개선하고 있습니다...", expanded=True) as status:
         try:
-            feedback_builder = build_feedback_graph()
+            feedback_builder = feedback_graph()
             
             # 피드백 그래프를 위한 상태 준비
             feedback_state = {
@@ -118,7 +121,10 @@ def show_feedback_processing():
             st.write("피드백 내용 분석 중...")
             
             # 피드백 그래프 실행
-            updated_result = feedback_builder.invoke(feedback_state)
+            updated_result = GraphProgress().run(
+                feedback_builder, feedback_state,
+                context=partial(instrument_run, st.session_state.initial_result.get('product_name', 'N/A'), feedback_round=st.session_state.feedback_count + 1),
+            )
             
             st.write("결과 업데이트 중...")
             
@@ -1,6 +1,10 @@
+from functools import partial
 import streamlit as st
-from graph.builder_st import build_initial_graph
+from utils.runtime import initial_graph
+from utils.checkpoint import run_thread_id, run_config, run_status, DURABILITY
+from utils.instrumentation import instrument_run
 from utils.data_loader_js import load_information_pdf_streamlit, load_keywords_csv_streamlit
+from ui.ui_progress import GraphProgress, show_restart_button
 
 
 def show_analysis_progress():
@@ -50,7 +54,7 @@ def show_analysis_progress():
                 
                 # PDF 처리 결과 표시
                 if product_docs:
-                    st.success(f"✅ 상품 정보 로드 완료 ({len(product_docs)}개 문서)")
+                    st.success(f"✅ 상품 정보 로드 완료 ({len(product_information)}개 문서, {len(product_docs)}페이지)")
                 else:
                     st.warning("⚠️ PDF 파일이 없거나 처리되지 않음")
 
@@ -60,14 +64,47 @@ def show_analysis_progress():
             st.subheader("🔄 초안 작성")
             
             try:
-                initial_builder = build_initial_graph()
-                result = initial_builder.invoke({
+                initial_builder = initial_graph()
+                inputs = {
                     'product_name': st.session_state.product_name,
                     'category': st.session_state.category,
                     'data': raw_df, 
                     'product_docs': product_docs,
                     'product_information': product_information
-                })
+                }
+                
+                # 같은 입력의 이전 분석이 있으면 (세션이 새로 시작된 경우 등) 마지막으로 끝난 노드 다음부터 이어서 실행합니다.
+                thread_id = run_thread_id(inputs)
+                run_cfg = run_config(thread_id)
+                status, next_nodes = run_status(initial_builder, run_cfg)
+                
+                if status == 'finished':
+                    st.info("같은 입력으로 완료된 분석 결과를 불러왔습니다.")
+                    result = initial_builder.get_state(run_cfg).values
+                    # 이전 스크립트 실행이 그리다 만, 이미 끝난 백그라운드 실행은 버립니다.
+                    st.session_state.pop(f'graph_run:{thread_id}', None)
+                else:
+                    if status == 'interrupted':
+                        st.info(f"중단된 분석을 이어서 실행합니다. ({', '.join(next_nodes)} 단계부터)")
+                    # 그래프는 백그라운드 스레드에서 실행되고, 스크립트는 노드가 보내는 진행 이벤트를 받아 화면에 그립니다.
+                    # 도중에 스크립트가 다시 실행되어도 그래프는 계속 실행되며, 같은 thread_id로 진행 중인 실행을 이어서 그립니다.
+                    # 노드별 소요 시간과 LLM 사용량은 output/에 기록합니다.
+                    progress = GraphProgress()
+                    result = progress.run(
+                        initial_builder, inputs if status == 'new' else None, config=run_cfg, durability=DURABILITY,
+                        key=f'graph_run:{thread_id}',
+                        context=partial(instrument_run, st.session_state.product_name, thread_id=thread_id),
+                    )
+                    
+                    if progress.restart:
+                        # 더 진행할 수 없었던 실행은 다시 시도할 때 처음부터 실행하도록 체크포인트를 지웁니다.
+                        if initial_builder.checkpointer is not None:
+                            initial_builder.checkpointer.delete_thread(thread_id)
+                        show_restart_button()
+                        return
+                
+                if initial_builder.checkpointer is not None:
+                    initial_builder.checkpointer.compact_thread(thread_id)
                 
                 # 결과를 session state에 저장
                 st.session_state.initial_result = result
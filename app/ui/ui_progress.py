@@ -0,0 +1,151 @@
+import threading
+from contextlib import nullcontext
+from contextvars import copy_context
+import streamlit as st
+from utils.progress import STREAM_MODES
+
+
+class GraphRun:
+    """
+    그래프를 백그라운드 스레드에서 stream으로 실행하고, 받은 청크를 차례로 쌓아 둡니다.
+    화면을 그리던 스크립트가 다시 실행(rerun)되어 멈춰도 그래프는 계속 실행되며, follow()로 처음부터 다시 받아 그릴 수 있습니다.
+    context는 그래프 실행을 감쌀 context manager를 만드는 함수로, 실행 스레드에서 들어갑니다. (instrument_run 등)
+    """
+
+    def __init__(self, graph, inputs, config=None, context=None, **kwargs):
+        self.chunks = []
+        self.error = None
+        self.finished = False
+        self._cond = threading.Condition()
+        # request_priority 등 현재 컨텍스트를 실행 스레드에도 그대로 넘깁니다.
+        target = copy_context().run
+        args = (self._run, graph, inputs, config, context or nullcontext, kwargs)
+        self._thread = threading.Thread(target=target, args=args, name='graph-run', daemon=True)
+        self._thread.start()
+
+    def _run(self, graph, inputs, config, context, kwargs) -> None:
+        try:
+            with context():
+                for chunk in graph.stream(inputs, config=config, stream_mode=STREAM_MODES, **kwargs):
+                    with self._cond:
+                        self.chunks.append(chunk)
+                        self._cond.notify_all()
+        except Exception as e:
+            self.error = e
+        finally:
+            with self._cond:
+                self.finished = True
+                self._cond.notify_all()
+
+    def follow(self):
+        """첫 청크부터 그래프가 끝날 때까지 (mode, chunk)를 차례로 돌려줍니다. 새 청크가 없으면 올 때까지 기다립니다."""
+        i = 0
+        while True:
+            with self._cond:
+                while i == len(self.chunks) and not self.finished:
+                    self._cond.wait()
+                if i == len(self.chunks):
+                    return
+                chunk = self.chunks[i]
+            i += 1
+            yield chunk
+
+
+class GraphProgress:
+    """
+    그래프를 백그라운드 스레드(GraphRun)에서 실행하고, 노드가 보낸 진행 이벤트(utils.progress)를 노드별 st.status 박스로 그립니다.
+    화면은 스크립트 스레드에서만 그리며, 병렬 브랜치도 각자의 박스에 표시합니다.
+    박스를 열지 않은 노드의 메시지는 container에 바로 표시합니다.
+    """
+
+    def __init__(self, container=None):
+        self.container = container if container is not None else st.container()
+        self.boxes = {}      # 노드 → st.status 박스
+        self.states = {}     # 노드 → running | complete | error
+        self.partials = {}   # 노드 → 생성 중인 출력을 그리는 placeholder
+        self.values = None   # 마지막 전체 상태
+        self.restart = False # 더 진행할 수 없다고 알린 노드가 있는지
+
+    def run(self, graph, inputs, config=None, key: str = None, context=None, **kwargs) -> dict:
+        """
+        그래프를 백그라운드에서 실행하며 끝날 때까지 화면을 그리고, 그래프의 최종 상태를 반환합니다.
+        key를 주면 실행을 session_state에 보관합니다. 도중에 스크립트가 다시 실행되어도 같은 key로 부르면
+        새로 시작하지 않고 진행 중인 실행을 처음부터 다시 그리며 이어 받습니다.
+        """
+        run = st.session_state.get(key) if key else None
+        if run is None:
+            run = GraphRun(graph, inputs, config, context, **kwargs)
+            if key:
+                st.session_state[key] = run
+
+        for mode, chunk in run.follow():
+            if mode == 'custom':
+                self._event(chunk)
+            elif mode == 'updates':
+                for node in chunk:
+                    self._finish(node)
+            elif mode == 'values':
+                self.values = chunk
+
+        if key:
+            st.session_state.pop(key, None)
+        if run.error is not None:
+            raise run.error
+        return self.values
+
+    def _target(self, node):
+        return self.boxes.get(node, self.container)
+
+    def _clear_partial(self, node) -> None:
+        placeholder = self.partials.pop(node, None)
+        if placeholder is not None:
+            placeholder.empty()
+
+    def _event(self, event: dict) -> None:
+        node, kind, text = event['node'], event['kind'], event['text']
+
+        if kind == 'status':
+            self.boxes[node] = self.container.status(text, expanded=True)
+            self.states[node] = 'running'
+            return
+
+        if kind == 'partial':
+            if node not in self.partials:
+                self.partials[node] = self._target(node).empty()
+            self.partials[node].markdown('\n\n'.join(text) if isinstance(text, list) else text)
+            return
+
+        # 최종 결과를 그리기 전에 생성 중 출력을 지웁니다.
+        self._clear_partial(node)
+
+        if kind == 'complete':
+            if node in self.boxes:
+                self.boxes[node].update(label=text, state='complete', expanded=False)
+                self.states[node] = 'complete'
+            return
+
+        getattr(self._target(node), kind)(text)
+        if event.get('restart'):
+            self.restart = True
+            if node in self.boxes:
+                self.boxes[node].update(state='error')
+                self.states[node] = 'error'
+
+    def _finish(self, node) -> None:
+        # 완료를 알리지 않고 끝난 노드의 박스도 진행 중 표시를 멈춥니다.
+        self._clear_partial(node)
+        if self.states.get(node) == 'running':
+            self.boxes[node].update(state='complete')
+            self.states[node] = 'complete'
+
+
+def _restart():
+    st.session_state.current_step = '데이터 입력'
+    st.session_state.analysis_started = False
+
+def show_restart_button(key: str = 'restart') -> None:
+    """
+    분석을 이어갈 수 없을 때 입력 화면으로 돌아가는 버튼.
+    다음 실행에서 분석을 다시 시작하지 않도록 on_click 콜백(스크립트 실행 전에 호출됨)으로 단계를 바꿉니다.
+    """
+    st.button("처음으로", key=key, on_click=_restart)
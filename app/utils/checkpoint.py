@@ -0,0 +1,131 @@
+import os, re, asyncio, sqlite3, hashlib, threading
+from typing import Any, AsyncIterator, Optional, Tuple
+import zstandard
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite import SqliteSaver
+from utils.config_loader import config, config_path
+
+# 체크포인트를 기다렸다가 다음 노드로 넘어갑니다. (기본값 'async'는 프로세스가 죽으면 마지막 노드 결과를 잃을 수 있습니다)
+DURABILITY = 'sync'
+
+# ====================================================================================================
+# 압축 직렬화기
+class ZstdSerializer(JsonPlusSerializer):
+    """
+    LangGraph 기본 직렬화(msgpack) 결과를 zstd로 압축합니다.
+    SqliteSaver는 노드마다 상태 전체를 한 행으로 저장하므로, PDF 본문과 키워드 테이블이 매번 그대로 쌓이지 않게 합니다.
+    압축한 값은 타입 이름에 '+zstd'를 붙여 저장하고, 압축하지 않은 예전 체크포인트도 그대로 읽습니다.
+    """
+
+    SUFFIX = '+zstd'
+
+    def __init__(self, level: int = 3, min_bytes: int = 512):
+        super().__init__()
+        self.level = level
+        self.min_bytes = min_bytes
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        type_, data = super().dumps_typed(obj)
+        if len(data) < self.min_bytes:
+            return type_, data
+        # ZstdCompressor는 스레드 간에 공유할 수 없으므로 호출마다 만듭니다. (생성 비용은 압축에 비해 무시할 만합니다)
+        return type_ + self.SUFFIX, zstandard.ZstdCompressor(level=self.level).compress(data)
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, data_ = data
+        if type_.endswith(self.SUFFIX):
+            type_, data_ = type_.removesuffix(self.SUFFIX), zstandard.ZstdDecompressor().decompress(data_)
+        return super().loads_typed((type_, data_))
+
+# ====================================================================================================
+# SQLite 체크포인터
+class SqliteCheckpointer(SqliteSaver):
+    """
+    SqliteSaver에 비동기 메서드를 더한 체크포인터. 하나의 컴파일된 그래프를 invoke와 ainvoke 양쪽에서 쓸 수 있습니다.
+    SQLite 작업은 짧고 SqliteSaver의 락으로 어차피 직렬화되므로, 비동기 메서드는 동기 메서드를 스레드에서 실행합니다.
+    """
+
+    async def aget_tuple(self, config):
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None) -> AsyncIterator:
+        for item in await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit))):
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=''):
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        return await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def compact_thread(self, thread_id: str) -> None:
+        """마지막 체크포인트만 남기고 이전 단계의 기록을 지웁니다. 끝난 실행의 결과는 그대로 불러올 수 있습니다."""
+        with self.cursor() as cur:
+            latest = cur.execute(
+                "SELECT MAX(checkpoint_id) FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ''", (thread_id,)
+            ).fetchone()[0]
+            if latest is None:
+                return
+            cur.execute('DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_id != ?', (thread_id, latest))
+            cur.execute('DELETE FROM writes WHERE thread_id = ? AND checkpoint_id != ?', (thread_id, latest))
+
+# ====================================================================================================
+# 공용 인스턴스
+_checkpointer: Optional[SqliteCheckpointer] = None
+_checkpointer_lock = threading.Lock()
+
+def checkpointer() -> Optional[SqliteCheckpointer]:
+    """[checkpoint] 설정으로 만든 프로세스 공용 체크포인터를 반환합니다. 꺼져 있으면 None(체크포인트 없이 실행)을 반환합니다."""
+    global _checkpointer
+
+    if not config.getboolean('checkpoint', 'enabled', fallback=False):
+        return None
+
+    with _checkpointer_lock:
+        if _checkpointer is None:
+            path = os.path.join(os.path.dirname(config_path), config.get('checkpoint', 'path', fallback='.cache/checkpoints.sqlite'))
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            # 배치 모드의 여러 스레드가 하나의 연결을 함께 쓰며, 접근은 SqliteSaver의 락으로 직렬화됩니다.
+            conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+            _checkpointer = SqliteCheckpointer(conn, serde=ZstdSerializer(level=config.getint('checkpoint', 'zstd_level', fallback=3)))
+    return _checkpointer
+
+# ====================================================================================================
+# 실행(thread) 단위 관리
+def run_thread_id(inputs: dict) -> str:
+    """
+    상품 실행 하나를 가리키는 thread_id. 상품명, 카테고리, 키워드 데이터, 상품 정보가 같으면 항상 같은 값이 나오므로,
+    프로세스가 죽거나 Streamlit 세션이 새로 시작되어도 같은 입력을 다시 넣으면 이전 실행을 찾을 수 있습니다.
+    """
+    digest = hashlib.sha256()
+    for key in ('product_name', 'category', 'product_information'):
+        digest.update(str(inputs.get(key) or '').encode('utf-8'))
+        digest.update(b'\0')
+    if inputs.get('data') is not None:
+        digest.update(inputs['data'].to_ipc())
+
+    slug = re.sub(r'[^0-9A-Za-z가-힣]+', '-', inputs['product_name']).strip('-').lower()
+    return f'{slug}-{digest.hexdigest()[:16]}'
+
+def run_config(thread_id: str, **configurable) -> dict:
+    return {'configurable': {'thread_id': thread_id, **configurable}}
+
+def run_status(graph, config: dict) -> Tuple[str, Tuple[str, ...]]:
+    """
+    thread의 진행 상태와 다음에 실행할 노드를 반환합니다.
+    - 'new': 체크포인트 없음 (처음 실행하거나 체크포인트가 꺼져 있음)
+    - 'interrupted': 중간에 멈춘 실행. graph.invoke(None, config)로 마지막으로 끝난 노드 다음부터 이어서 실행합니다.
+    - 'finished': END까지 끝난 실행. graph.get_state(config).values가 최종 상태입니다.
+    """
+    if graph.checkpointer is None:
+        return 'new', ()
+
+    snapshot = graph.get_state(config)
+    if not snapshot.values:
+        return 'new', ()
+    if snapshot.next:
+        return 'interrupted', snapshot.next
+    return 'finished', ()
@@ -0,0 +1,87 @@
+import io, csv
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple, Union
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import csv as pa_csv
+from utils.config_loader import config
+
+# 들어올 csv 파일 형식들...(추가 가능)
+KEYWORD_COLUMN_NAMES = ['Keywords', 'Phrase', 'Keyword Phrase']
+SEARCH_VOLUME_COLUMN_NAMES = ['Search Volume']
+COMPETING_COLUMN_NAMES = ['Competing Products', 'Keyword Sales']
+
+# '>100,000', ' 3,000 ', '<=5' 같은 값에서 부등호/천 단위 구분자를 제거한 뒤 숫자만 남깁니다.
+COUNT_STRIP_PATTERN = r'^[<>]=?|,'
+COUNT_PATTERN = r'^\d+(\.\d+)?$'
+
+HEADER_PEEK_BYTES = 64 * 1024
+
+# ====================================================================================================
+# 키워드 CSV 읽기
+def _read_header(data: bytes) -> List[str]:
+    head = data[:HEADER_PEEK_BYTES].decode('utf-8-sig', errors='ignore')
+    return next(csv.reader(io.StringIO(head)), [])
+
+def _find_column(header: List[str], candidates: List[str]) -> Optional[str]:
+    # 대소문자/앞뒤 공백 구분 없이 찾고, 실제 헤더 이름을 돌려줍니다.
+    header_map = {col.strip().lower(): col for col in header}
+    return next((header_map[name.lower()] for name in candidates if name.lower() in header_map), None)
+
+def _parse_count(array: pa.ChunkedArray) -> pa.ChunkedArray:
+    cleaned = pc.replace_substring_regex(pc.utf8_trim_whitespace(array), COUNT_STRIP_PATTERN, '')
+    valid = pc.match_substring_regex(cleaned, COUNT_PATTERN)
+    numbers = pc.cast(pc.if_else(valid, cleaned, pa.scalar(None, pa.string())), pa.float64())
+    return pc.cast(pc.trunc(numbers), pa.int64())
+
+def read_keyword_csv(data: bytes) -> Optional[pd.DataFrame]:
+    """
+    키워드 CSV 바이트를 keyword, search_volume, competing_products 컬럼의 DataFrame으로 읽습니다.
+    헤더만 먼저 확인해 필요한 세 컬럼만 pyarrow로 읽으며, 키워드 컬럼이 없으면 None을 반환합니다.
+    """
+    header = _read_header(data)
+    keyword_col = _find_column(header, KEYWORD_COLUMN_NAMES)
+    if keyword_col is None:
+        return None
+
+    volume_col = _find_column(header, SEARCH_VOLUME_COLUMN_NAMES)
+    competing_col = _find_column(header, COMPETING_COLUMN_NAMES)
+    include_columns = [col for col in (keyword_col, volume_col, competing_col) if col is not None]
+
+    table = pa_csv.read_csv(
+        io.BytesIO(data),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=include_columns,
+            column_types={col: pa.string() for col in include_columns},
+            strings_can_be_null=True,
+        ),
+    )
+
+    num_rows = table.num_rows
+    empty_counts = pa.nulls(num_rows, pa.int64())
+    table = pa.table({
+        'keyword': table[keyword_col],
+        'search_volume': _parse_count(table[volume_col]) if volume_col else empty_counts,
+        'competing_products': _parse_count(table[competing_col]) if competing_col else empty_counts,
+    })
+
+    return table.to_pandas(types_mapper={pa.string(): pd.StringDtype('pyarrow'), pa.int64(): pd.Int64Dtype()}.get)
+
+def _safe_read_keyword_csv(data: bytes) -> Union[Optional[pd.DataFrame], Exception]:
+    try:
+        return read_keyword_csv(data)
+    except Exception as e:
+        return e
+
+def read_keyword_csvs(files: List[Tuple[str, bytes]]) -> List[Union[Optional[pd.DataFrame], Exception]]:
+    """
+    여러 키워드 CSV 파일(이름, 바이트)을 읽습니다.
+    pyarrow는 파싱 중 GIL을 놓기 때문에 스레드 풀에서 파일별로 동시에 읽으며, 결과는 입력 순서를 따릅니다.
+    """
+    if len(files) <= 1:
+        return [_safe_read_keyword_csv(data) for _, data in files]
+
+    max_workers = min(len(files), config.getint('csv_loader', 'max_workers', fallback=4))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_safe_read_keyword_csv, [data for _, data in files]))
@@ -1,7 +1,9 @@
 import pandas as pd
 from typing import List
 from langchain_core.documents import Document
-from pypdf import PdfReader
+from schemas.keyword_table import KeywordTable
+from utils.csv_extract import read_keyword_csvs
+from utils.pdf_extract import extract_pdfs, pages_to_documents
 
 
 def load_keywords_csv_streamlit(uploaded_files):
@@ -9,63 +11,34 @@ def load_keywords_csv_streamlit(uploaded_files):
     if not uploaded_files:
         return None
     
-    # 들어올 csv 파일 형식들...(추가 가능)
-    required_cols_variants = [
-        ['Keywords', 'Search Volume', 'Competing Products'],
-        ['Phrase', 'Search Volume', 'Keyword Sales']
-    ]
-    
     dfs = []
     good_files = []
     messages = []
+    csv_files = []
 
     # 업로드된 파일들 처리
     for uploaded_file in uploaded_files:
         
         # 파일 읽기 시도
         try:
-            df = pd.read_csv(uploaded_file)
+            csv_files.append((uploaded_file.name, uploaded_file.getvalue()))
         except Exception as e:
             messages.append(f"파일 읽기 실패: {uploaded_file.name} ({e})")
             continue
-        
-        # 키워드 컬럼을 찾고, 존재하면 다른 컬럼은 옵션으로 처리 (대소문자 구분 없음)
-        df_col_map = {col.lower(): col for col in df.columns}
-        keyword_col_names = [variant[0] for variant in required_cols_variants]
-        
-        found_keyword_col_original_name = None
-        for name in keyword_col_names:
-            if name.lower() in df_col_map:
-                found_keyword_col_original_name = df_col_map[name.lower()]
-                break
-
-        if found_keyword_col_original_name:
-            df_processed = pd.DataFrame()
-            df_processed['keyword'] = df[found_keyword_col_original_name]
-
-            # Search Volume (optional)
-            sv_col_name = df_col_map.get('search volume')
-            if sv_col_name:
-                df_processed['search_volume'] = pd.to_numeric(df[sv_col_name], errors='coerce')
-            else:
-                df_processed['search_volume'] = pd.NA
+    
+    # 키워드/검색량/경쟁 상품 컬럼만 읽기 (여러 파일은 동시에 처리)
+    for (file_name, _), df in zip(csv_files, read_keyword_csvs(csv_files)):
+        if isinstance(df, Exception):
+            messages.append(f"파일 읽기 실패: {file_name} ({df})")
+            continue
 
-            # Competing Products / Keyword Sales (optional)
-            cp_col_name = df_col_map.get('competing products') or df_col_map.get('keyword sales')
-            if cp_col_name:
-                df_processed['competing_products'] = pd.to_numeric(df[cp_col_name].astype(str).str.replace('>', ''), errors='coerce')
-            else:
-                df_processed['competing_products'] = pd.NA
+        if df is None:
+            messages.append(f"컬럼 형식 불일치: {file_name} (키워드 컬럼 부재)")
+            continue
 
-            # Convert to nullable integer type
-            df_processed['search_volume'] = df_processed['search_volume'].astype('Int64')
-            df_processed['competing_products'] = df_processed['competing_products'].astype('Int64')
-            
-            dfs.append(df_processed)
-            good_files.append(uploaded_file.name)
-            messages.append(f"파일 처리 완료: {uploaded_file.name}")
-        else:
-            messages.append(f"컬럼 형식 불일치: {uploaded_file.name} (키워드 컬럼 부재)")
+        dfs.append(df)
+        good_files.append(file_name)
+        messages.append(f"파일 처리 완료: {file_name}")
     
     # 결과 반환
     if not good_files:
@@ -73,7 +46,7 @@ def load_keywords_csv_streamlit(uploaded_files):
     
     combined_df = pd.concat(dfs, ignore_index=True)
     
-    return combined_df.to_dict(orient='records'), messages, good_files
+    return KeywordTable.from_pandas(combined_df), messages, good_files
 
 def load_information_pdf_streamlit(uploaded_files):
     """Streamlit용 PDF 로더"""
@@ -83,25 +56,29 @@ def load_information_pdf_streamlit(uploaded_files):
     product_docs: List[Document] = []
     product_information = []
     messages = []
+    pdf_files = []
 
     # 업로드된 파일들 처리
     for uploaded_file in uploaded_files:
 
         # 파일 읽기 시도
         try:
-            reader = PdfReader(uploaded_file)
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-
-            product_docs.append(Document(page_content=text, metadata={"source": uploaded_file.name}))
-            product_information.append(text)
-            messages.append(f"읽어온 PDF 파일: {uploaded_file.name}")
-
+            pdf_files.append((uploaded_file.name, uploaded_file.getvalue()))
         except Exception as e:
             messages.append(f"파일 읽기 실패: {uploaded_file.name} ({e})")
             continue
     
+    # 페이지 텍스트 추출 (여러 파일은 병렬 처리)
+    for (file_name, _), pages in zip(pdf_files, extract_pdfs(pdf_files)):
+        if isinstance(pages, Exception):
+            messages.append(f"파일 읽기 실패: {file_name} ({pages})")
+            continue
+
+        docs, text = pages_to_documents(file_name, pages)
+        product_docs.extend(docs)
+        product_information.append(text)
+        messages.append(f"읽어온 PDF 파일: {file_name} ({len(pages)}페이지)")
+    
     if not product_docs:
         return None, 'Product information not found', ["PDF 파일을 읽을 수 없습니다. 리스팅 검증 과정을 생략합니다."]
 
@@ -0,0 +1,263 @@
+import os, json, time, threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from functools import wraps
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+from langgraph.config import get_config
+from utils.config_loader import config
+from utils.llm_usage import UsageCallbackHandler
+from utils import tracing
+
+# ====================================================================================================
+# 노드별 측정
+# 그래프 빌더가 모든 노드를 instrument_node로 감싸고, 실행하는 쪽은 instrument_run 블록 안에서 그래프를 돌립니다.
+# 노드가 실행되는 동안 LLM 콜백과 HTTP 재시도는 record()로 현재 노드의 측정값에 더해집니다.
+# (ContextVar는 LangGraph 노드, 병렬 브랜치, chain.batch 스레드에도 전달됩니다)
+#
+#     with instrument_run(product_name) as metrics:
+#         graph.invoke(inputs)
+#
+# 결과는 output/<상품명>_metrics_<시각>.jsonl(노드 실행마다 한 줄 + 마지막 요약 한 줄)과
+# 같은 이름의 .txt(노드별 요약 표)로 저장합니다. [tracing]이 켜져 있으면 같은 측정값을 OpenTelemetry 스팬 속성으로도 남깁니다.
+
+COUNTERS = ('llm_calls', 'cache_hits', 'prompt_tokens', 'completion_tokens', 'retries')
+
+_current_run: ContextVar[Optional['RunMetrics']] = ContextVar('instrumentation_run', default=None)
+_current_node: ContextVar[Optional['NodeMetrics']] = ContextVar('instrumentation_node', default=None)
+
+class NodeMetrics:
+    """노드 실행 한 번의 측정값. chain.batch 스레드들이 함께 더하므로 락으로 보호합니다."""
+
+    def __init__(self, node: str):
+        self.node = node
+        self.started_at = time.time()
+        self.wall_sec = 0.0
+        self.counts = dict.fromkeys(COUNTERS, 0)
+        self.cost_usd = 0.0
+        self.error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def add(self, cost_usd: float = 0.0, **counts: int) -> None:
+        with self._lock:
+            for key, value in counts.items():
+                self.counts[key] += value
+            self.cost_usd += cost_usd
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'node': self.node,
+            'started_at': datetime.fromtimestamp(self.started_at).isoformat(timespec='milliseconds'),
+            'wall_sec': round(self.wall_sec, 3),
+            **self.counts,
+            'cost_usd': round(self.cost_usd, 6),
+            'error': self.error,
+        }
+
+class RunMetrics:
+    """상품 실행 하나의 노드 측정값을 모아 JSON Lines로 기록하고, 끝나면 노드별 요약 표를 남깁니다."""
+
+    def __init__(self, product_name: str, output_dir: Optional[str] = 'output', **tags: Any):
+        """output_dir가 None이면 파일을 남기지 않고 측정값만 모읍니다. (트레이싱만 켠 경우)"""
+        self.product_name = product_name
+        self.tags = tags
+        self.nodes: List[NodeMetrics] = []
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self._lock = threading.Lock()
+
+        self.jsonl_path = self.table_path = self._file = None
+        if output_dir is not None:
+            os.makedirs(output_dir, exist_ok=True)
+            base = os.path.join(output_dir, f'{"_".join(product_name.split())}_metrics_{datetime.now().strftime("%Y_%m_%d_%H-%M-%S")}')
+            self.jsonl_path = base + '.jsonl'
+            self.table_path = base + '.txt'
+            self._file = open(self.jsonl_path, 'w', encoding='utf-8')
+
+    def _write(self, record: dict) -> None:
+        if self._file is None:
+            return
+        self._file.write(json.dumps({'product_name': self.product_name, **self.tags, **record}, ensure_ascii=False) + '\n')
+        self._file.flush()
+
+    def record(self, node: NodeMetrics) -> None:
+        with self._lock:
+            self.nodes.append(node)
+            self._write({'type': 'node', **node.as_dict()})
+
+    def summary_rows(self) -> List[Dict[str, Any]]:
+        """노드별(처음 실행된 순서) 합계와 마지막 TOTAL 행. TOTAL의 wall_sec은 병렬 브랜치를 겹쳐 센 값이 아닌 실제 경과 시간입니다."""
+        rows: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for node in self.nodes:
+                row = rows.setdefault(node.node, {'node': node.node, 'runs': 0, 'wall_sec': 0.0, **dict.fromkeys(COUNTERS, 0), 'cost_usd': 0.0})
+                row['runs'] += 1
+                row['wall_sec'] += node.wall_sec
+                row['cost_usd'] += node.cost_usd
+                for key in COUNTERS:
+                    row[key] += node.counts[key]
+
+        total = {'node': 'TOTAL', 'runs': sum(r['runs'] for r in rows.values()), 'wall_sec': (self.finished or time.perf_counter()) - self.started}
+        for key in COUNTERS + ('cost_usd',):
+            total[key] = sum(r[key] for r in rows.values())
+
+        result = list(rows.values()) + [total]
+        for row in result:
+            row['wall_sec'] = round(row['wall_sec'], 3)
+            row['cost_usd'] = round(row['cost_usd'], 6)
+        return result
+
+    def summary_table(self, rows: Optional[List[Dict[str, Any]]] = None) -> str:
+        rows = rows or self.summary_rows()
+        header = ('node', 'runs', 'wall(s)', 'share', 'llm', 'cache', 'prompt', 'completion', 'retries', 'cost($)')
+        total_wall = rows[-1]['wall_sec'] or 1.0
+        lines = [
+            (r['node'], r['runs'], f"{r['wall_sec']:.2f}", f"{r['wall_sec'] / total_wall:.0%}", r['llm_calls'], r['cache_hits'],
+             r['prompt_tokens'], r['completion_tokens'], r['retries'], f"{r['cost_usd']:.4f}")
+            for r in rows
+        ]
+        widths = [max(len(str(line[i])) for line in [header] + lines) for i in range(len(header))]
+
+        def fmt(line) -> str:
+            return '  '.join(str(v).ljust(w) if i == 0 else str(v).rjust(w) for i, (v, w) in enumerate(zip(line, widths)))
+
+        separator = '-' * len(fmt(header))
+        return '\n'.join([fmt(header), separator] + [fmt(line) for line in lines[:-1]] + [separator, fmt(lines[-1])])
+
+    def close(self) -> List[Dict[str, Any]]:
+        """요약을 JSON Lines 마지막 줄과 .txt 표로 기록하고 요약 행을 반환합니다."""
+        self.finished = time.perf_counter()
+        rows = self.summary_rows()
+        if self._file is None:
+            return rows
+
+        with self._lock:
+            self._write({'type': 'summary', 'nodes': rows[:-1], 'total': rows[-1]})
+            self._file.close()
+        with open(self.table_path, 'w', encoding='utf-8') as f:
+            f.write(f'[{self.product_name}] 노드별 소요 시간 / LLM 사용량\n\n{self.summary_table(rows)}\n')
+        return rows
+
+# ====================================================================================================
+# 측정 지점
+def record(cost_usd: float = 0.0, **counts: int) -> None:
+    """현재 실행 중인 노드의 측정값에 더합니다. 노드 밖이거나 측정 중이 아니면 무시합니다."""
+    node = _current_node.get()
+    if node is not None:
+        node.add(cost_usd, **counts)
+
+def _graph_node_name(default: str) -> str:
+    # 그래프에 등록된 노드 이름(generate_title 등)을 씁니다. 함수 이름(generate_title_node)과 다를 수 있습니다.
+    try:
+        return get_config()['metadata']['langgraph_node']
+    except (RuntimeError, KeyError):
+        return default
+
+@contextmanager
+def _measure(run: 'RunMetrics', default_name: str, state: Any):
+    """노드 하나를 측정하고 노드 스팬을 엽니다. 블록 안에서 노드의 반환값을 send_update로 넘기면 키워드 수를 스팬에 남깁니다."""
+    metrics = NodeMetrics(_graph_node_name(default_name))
+    with tracing.span(metrics.node, tracing.keyword_attributes(state)) as node_span:
+        token = _current_node.set(metrics)
+        started = time.perf_counter()
+        try:
+            yield lambda update: tracing.set_attributes(node_span, tracing.keyword_attributes(update=update))
+        except BaseException as e:
+            metrics.error = f'{type(e).__name__}: {e}'
+            raise
+        finally:
+            metrics.wall_sec = time.perf_counter() - started
+            _current_node.reset(token)
+            run.record(metrics)
+            tracing.set_attributes(node_span, tracing.usage_attributes(metrics.counts, metrics.cost_usd))
+
+def instrument_node(func):
+    """
+    노드 함수를 감싸 instrument_run 블록 안에서 실행될 때 소요 시간과 LLM 사용량을 기록합니다.
+    node_pair로 만든 노드는 비동기 버전(afunc)도 함께 감쌉니다. 측정 중이 아니면 원래 함수를 그대로 호출합니다.
+    """
+    afunc = getattr(func, 'afunc', None)
+
+    @wraps(func)
+    def sync_node(*args, **kwargs):
+        run = _current_run.get()
+        if run is None:
+            return func(*args, **kwargs)
+        with _measure(run, func.__name__, args[0] if args else None) as send_update:
+            update = func(*args, **kwargs)
+            send_update(update)
+            return update
+
+    if afunc is not None:
+        @wraps(afunc)
+        async def async_node(*args, **kwargs):
+            run = _current_run.get()
+            if run is None:
+                return await afunc(*args, **kwargs)
+            with _measure(run, func.__name__, args[0] if args else None) as send_update:
+                update = await afunc(*args, **kwargs)
+                send_update(update)
+                return update
+
+        sync_node.afunc = async_node
+    return sync_node
+
+@contextmanager
+def instrument_run(product_name: str, output_dir: str = 'output', **tags: Any):
+    """
+    with 블록 안에서 실행한 그래프 노드를 측정하고, 블록이 끝나면 요약을 기록합니다.
+    tags(thread_id 등)는 JSON Lines의 모든 줄과 루트 스팬(product_run)에 함께 기록됩니다.
+    [instrumentation]과 [tracing]이 모두 꺼져 있으면 None을 줍니다.
+    """
+    write_files = config.getboolean('instrumentation', 'enabled', fallback=False)
+    if not write_files and not tracing.enabled():
+        yield None
+        return
+
+    run = RunMetrics(product_name, output_dir if write_files else None, **tags)
+    token = _current_run.set(run)
+    try:
+        with tracing.span('product_run', {'product.name': product_name, **tags}) as root_span:
+            try:
+                yield run
+            finally:
+                total = run.close()[-1]
+                tracing.set_attributes(root_span, tracing.usage_attributes({key: total[key] for key in COUNTERS}, total['cost_usd']))
+    finally:
+        _current_run.reset(token)
+
+# ====================================================================================================
+# LLM 콜백
+def llm_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """
+    [llm_pricing]의 100만 토큰당 가격(입력, 출력 USD)으로 비용을 계산합니다.
+    응답의 모델 이름(gpt-4o-2024-08-06 등)과 가장 길게 일치하는 접두어의 가격을 쓰고, 없으면 0을 반환합니다.
+    """
+    if not model or not config.has_section('llm_pricing'):
+        return 0.0
+    matches = [key for key in config['llm_pricing'] if model.startswith(key)]
+    if not matches:
+        return 0.0
+    prompt_price, completion_price = (float(v) for v in config['llm_pricing'][max(matches, key=len)].split(','))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+class NodeMetricsCallback(UsageCallbackHandler):
+    """ChatOpenAI(callbacks=[...])에 붙여 호출 수, 캐시 적중, 토큰 사용량(OpenAI usage)과 비용을 현재 노드에 기록합니다."""
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages, *, run_id: UUID, **kwargs: Any) -> None:
+        record(llm_calls=1)
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any) -> None:
+        llm_output = self.llm_output(response, run_id)
+        if llm_output is None:
+            record(cache_hits=1)
+            return
+
+        usage = llm_output.get('token_usage') or {}
+        prompt_tokens = usage.get('prompt_tokens') or 0
+        completion_tokens = usage.get('completion_tokens') or 0
+        record(
+            llm_cost(llm_output.get('model_name'), prompt_tokens, completion_tokens),
+            prompt_tokens=prompt_tokens, completion_tokens=completion_tokens
+        )
@@ -1,140 +1,168 @@
-import streamlit as st
+import time
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.utils.json import parse_partial_json
 
 from schemas.global_state import State
 from schemas.schema import TitleOutput, BPOutput, DescriptionOutput
 from prompts.prompt_listing import title_prompt, bp_prompt, description_prompt
 from utils.config_loader import config
+from utils.runtime import chat_model
+from utils.llm_cache import cache_on_success
+from utils import progress
 
 load_dotenv()
 
 # LLM 정의
-llm = ChatOpenAI(model=config['llm_listing']['model'], temperature=float(config['llm_listing']['temperature']))
+llm = chat_model(config['llm_listing']['model'], float(config['llm_listing']['temperature']), node='generate_listing')
+# 생성 중인 문장을 토큰 단위로 보여주기 위한 스트리밍 LLM (같은 캐시를 쓰므로 캐시 적중 시에는 바로 결과를 돌려줍니다)
+streaming_llm = chat_model(
+    config['llm_listing']['model'], float(config['llm_listing']['temperature']), node='generate_listing',
+    streaming=True, stream_usage=True
+)
 
 # ====================================================================================================
-# Title 노드
-def generate_title(state: State):
-    
-    with st.status("Title 작성 중...", expanded=True) as status:
-        st.info('키워드를 기반으로 Title을 작성합니다.')
-        if not state['title_keyword']:
-            st.warning('Title 작성용 키워드가 존재하지 않습니다.')
-            if st.button("처음으로"):
-                st.session_state.current_step = '데이터 입력'
-                st.rerun()
+# 스트리밍 출력
+# 구조화 출력(JSON)을 받는 중간에 불완전한 JSON을 파싱해 field 값을 progress partial 이벤트로 보냅니다.
+# 최종 결과는 with_structured_output이 Pydantic 스키마로 검증한 객체를 그대로 씁니다.
+
+class PartialOutputCallback(BaseCallbackHandler):
+    """on_llm_new_token으로 받은 JSON 조각을 모아 field 값이 바뀔 때마다 send로 보냅니다. (interval초 간격)"""
+
+    def __init__(self, send, field: str, interval: float = 0.1):
+        self.send = send
+        self.field = field
+        self.interval = interval
+        self.buffer = ''
+        self.shown = None
+        self.last_sent = 0.0
+
+    def on_llm_new_token(self, token: str, **kwargs) -> None:
+        self.buffer += token
+        if time.monotonic() - self.last_sent < self.interval:
             return
-                
         try:
-            prompt = title_prompt.invoke(
-                {
-                    'product_name': state['product_name'], 
-                    'category': state['category'],
-                    'product_information': state['product_information'], 
-                    'title_keyword': state['title_keyword'],
-                }
-            )
-            structured_llm = llm.with_structured_output(TitleOutput)
-            res = structured_llm.invoke(prompt)
-            
-            st.success('Title 작성 성공')
-            st.write(res.title)
-            st.info(f'작성된 Title: 총 {len(res.title)}자')
-            status.update(label="Title 작성 완료", state="complete", expanded=False)
-
-            return {'title': res.title}
-
-        except Exception as e:
-            st.error(f"Title 작성 중 에러가 발생했습니다: {e}")
-            if st.button("처음으로"):
-                st.session_state.current_step = '데이터 입력'
-                st.rerun()
+            value = (parse_partial_json(self.buffer) or {}).get(self.field)
+        except Exception:
             return
+        if not value or value == self.shown:
+            return
+
+        self.shown = value
+        self.last_sent = time.monotonic()
+        self.send(value)
+
+def invoke_structured(schema, prompt, field: str):
+    """schema 구조화 출력으로 LLM을 호출합니다. [llm_listing] streaming이 켜져 있으면 생성 중인 field 값을 화면에 보냅니다."""
+    if not config.getboolean('llm_listing', 'streaming', fallback=False):
+        return cache_on_success(llm.with_structured_output(schema)).invoke(prompt)
+
+    # 화면은 노드의 다음 진행 이벤트(성공/에러)를 받으면 중간 출력을 지웁니다.
+    callback = PartialOutputCallback(progress.partial_writer(field), field)
+    return cache_on_success(streaming_llm.with_structured_output(schema)).invoke(prompt, config={'callbacks': [callback]})
+
+# ====================================================================================================
+# Title 노드
+def generate_title(state: State):
+    
+    progress.status("Title 작성 중...")
+    progress.info('키워드를 기반으로 Title을 작성합니다.')
+    if not state['title_keyword']:
+        progress.warning('Title 작성용 키워드가 존재하지 않습니다.', restart=True)
+        return
+
+    try:
+        prompt = title_prompt.invoke(
+            {
+                'product_name': state['product_name'], 
+                'category': state['category'],
+                'product_information': state['product_information'], 
+                'title_keyword': state['title_keyword'],
+            }
+        )
+        res = invoke_structured(TitleOutput, prompt, 'title')
+
+        progress.success('Title 작성 성공')
+        progress.write(res.title)
+        progress.info(f'작성된 Title: 총 {len(res.title)}자')
+        progress.complete("Title 작성 완료")
+
+        return {'title': res.title}
+
+    except Exception as e:
+        progress.error(f"Title 작성 중 에러가 발생했습니다: {e}")
+        return
 
 
 # ====================================================================================================
 # BP 노드
 def generate_bp(state: State):
     
-    with st.status("Bullet Point 작성 중...", expanded=True) as status:
-        st.info('키워드를 기반으로 Bullet Points를 작성합니다.')
-        if not state['bp_keyword']:
-            st.warning('Bullet Point 작성용 키워드가 존재하지 않습니다.')
-            if st.button("처음으로"):
-                st.session_state.current_step = '데이터 입력'
-                st.rerun()
-            return
-        
-        try:
-            prompt = bp_prompt.invoke(
-                {
-                    'product_name': state['product_name'], 
-                    'category': state['category'],
-                    'product_information': state['product_information'], 
-                    'bp_keyword': state['bp_keyword'],
-                }
-            )
-            structured_llm = llm.with_structured_output(BPOutput)
-            res = structured_llm.invoke(prompt)
-            bp_length = []
-            bps = res.bp
-
-            st.success('Bullet Point 작성 성공')
-
-            for bp in bps:
-                st.write(bp)
-                bp_length.append(str(len(bp)))    
-
-            st.info(f'작성된 Bullet Point: 각 {','.join(bp_length)}자')
-            status.update(label="Bullet Point 작성 완료", state="complete", expanded=False)
-
-            return {'bp': bps}
-        
-        except Exception as e:
-            st.error(f"Bullet Point 작성 중 에러가 발생했습니다: {e}")
-            if st.button("처음으로"):
-                st.session_state.current_step = '데이터 입력'
-                st.rerun()
-            return
+    progress.status("Bullet Point 작성 중...")
+    progress.info('키워드를 기반으로 Bullet Points를 작성합니다.')
+    if not state['bp_keyword']:
+        progress.warning('Bullet Point 작성용 키워드가 존재하지 않습니다.', restart=True)
+        return
+
+    try:
+        prompt = bp_prompt.invoke(
+            {
+                'product_name': state['product_name'], 
+                'category': state['category'],
+                'product_information': state['product_information'], 
+                'bp_keyword': state['bp_keyword'],
+            }
+        )
+        res = invoke_structured(BPOutput, prompt, 'bp')
+        bp_length = []
+        bps = res.bp
+
+        progress.success('Bullet Point 작성 성공')
+
+        for bp in bps:
+            progress.write(bp)
+            bp_length.append(str(len(bp)))    
+
+        progress.info(f'작성된 Bullet Point: 각 {','.join(bp_length)}자')
+        progress.complete("Bullet Point 작성 완료")
+
+        return {'bp': bps}
+
+    except Exception as e:
+        progress.error(f"Bullet Point 작성 중 에러가 발생했습니다: {e}")
+        return
 
 
 # ====================================================================================================
 # Description 노드
 def generate_description(state: State):
-    with st.status("Description 작성 중...", expanded=True) as status:
-        st.info('키워드를 기반으로 Description을 작성합니다.')
-        
-        if not state['description_keyword']:
-            st.warning('Description 작성용 키워드가 존재하지 않습니다.')
-            if st.button("처음으로"):
-                st.session_state.current_step = '데이터 입력'
-                st.rerun()
-            return
-                
-        try:
-            prompt = description_prompt.invoke(
-                {
-                    'bp_result': state['bp'],
-                    'product_name': state['product_name'], 
-                    'category': state['category'],
-                    'product_information': state['product_information'], 
-                    'description_keyword': state['description_keyword'],
-                }
-            )
-            structured_llm = llm.with_structured_output(DescriptionOutput)
-            res = structured_llm.invoke(prompt)
-            
-            st.success('Description 작성 성공')
-            st.write(res.description)
-            st.info(f'\n작성된 Description: 총 {len(res.description)}자')
-            
-            status.update(label="Description 작성 완료", state="complete", expanded=False)
-
-            return {'description': res.description}
-
-        except Exception as e:
-            st.error(f"Description 작성 중 에러가 발생했습니다: {e}")
-            if st.button("처음으로"):
-                st.session_state.current_step = '데이터 입력'
-                st.rerun()
-            return      
\ No newline at end of file
+    progress.status("Description 작성 중...")
+    progress.info('키워드를 기반으로 Description을 작성합니다.')
+
+    if not state['description_keyword']:
+        progress.warning('Description 작성용 키워드가 존재하지 않습니다.', restart=True)
+        return
+
+    try:
+        prompt = description_prompt.invoke(
+            {
+                'bp_result': state['bp'],
+                'product_name': state['product_name'], 
+                'category': state['category'],
+                'product_information': state['product_information'], 
+                'description_keyword': state['description_keyword'],
+            }
+        )
+        res = invoke_structured(DescriptionOutput, prompt, 'description')
+
+        progress.success('Description 작성 성공')
+        progress.write(res.description)
+        progress.info(f'\n작성된 Description: 총 {len(res.description)}자')
+
+        progress.complete("Description 작성 완료")
+
+        return {'description': res.description}
+
+    except Exception as e:
+        progress.error(f"Description 작성 중 에러가 발생했습니다: {e}")
+        return      
\ No newline at end of file
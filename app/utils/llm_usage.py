@@ -0,0 +1,48 @@
+import threading
+from typing import Any, Dict, Optional, Set
+from uuid import UUID
+from langchain_core.callbacks import BaseCallbackHandler
+
+# ====================================================================================================
+# LLM 응답 사용량
+# 일반 응답은 llm_output에 token_usage와 model_name이 있고, 캐시에서 꺼낸 응답은 llm_output이 없습니다.
+# 스트리밍 응답(ChatOpenAI(streaming=True))도 llm_output이 없으므로, 토큰을 받은 호출인지로 캐시 적중과 구분하고
+# 사용량은 마지막 청크가 generation_info에 남긴 값(없으면 메시지의 usage_metadata)에서 꺼냅니다.
+
+class UsageCallbackHandler(BaseCallbackHandler):
+    """사용량을 읽는 콜백의 공통 부모. on_llm_end에서 self.llm_output(response, run_id)로 llm_output 형식의 사용량을 얻습니다."""
+
+    def __init__(self):
+        self._streamed: Set[UUID] = set()
+        self._streamed_lock = threading.Lock()
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._streamed_lock:
+            self._streamed.add(run_id)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._streamed_lock:
+            self._streamed.discard(run_id)
+
+    def llm_output(self, response, run_id: UUID) -> Optional[Dict[str, Any]]:
+        """응답의 {'token_usage': ..., 'model_name': ...}. 캐시에서 꺼낸 응답이면 None을 반환합니다."""
+        with self._streamed_lock:
+            streamed = run_id in self._streamed
+            self._streamed.discard(run_id)
+
+        if response.llm_output is not None:
+            return response.llm_output
+        if not streamed:
+            return None
+
+        generation = response.generations[0][0]
+        info = generation.generation_info or {}
+        usage = info.get('token_usage')
+        if not usage:
+            metadata = getattr(generation.message, 'usage_metadata', None) or {}
+            usage = {
+                'prompt_tokens': metadata.get('input_tokens', 0),
+                'completion_tokens': metadata.get('output_tokens', 0),
+                'total_tokens': metadata.get('total_tokens', 0),
+            }
+        return {'token_usage': usage, 'model_name': info.get('model_name') or generation.message.response_metadata.get('model_name')}
@@ -0,0 +1,53 @@
+import io, multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple, Union
+from langchain_core.documents import Document
+from pypdf import PdfReader
+from utils.config_loader import config
+
+try:
+    import pymupdf
+except ImportError:
+    pymupdf = None
+
+# ====================================================================================================
+# PDF 페이지 추출
+def extract_pages(data: bytes) -> List[str]:
+    """PDF 바이트에서 페이지별 텍스트를 추출합니다. PyMuPDF가 있으면 사용하고, 없으면 pypdf를 사용합니다."""
+    if pymupdf is not None:
+        with pymupdf.open(stream=data, filetype='pdf') as doc:
+            return [page.get_text() for page in doc]
+
+    reader = PdfReader(io.BytesIO(data))
+    return [page.extract_text() or '' for page in reader.pages]
+
+def _safe_extract_pages(data: bytes) -> Union[List[str], Exception]:
+    # 프로세스 풀에서 한 파일의 실패가 전체를 멈추지 않도록 예외를 값으로 돌려줍니다.
+    try:
+        return extract_pages(data)
+    except Exception as e:
+        return e
+
+def extract_pdfs(files: List[Tuple[str, bytes]]) -> List[Union[List[str], Exception]]:
+    """
+    여러 PDF 파일(이름, 바이트)의 페이지 텍스트를 추출합니다.
+    파일이 두 개 이상이면 프로세스 풀에서 파일별로 병렬 추출하며, 결과는 입력 순서를 따릅니다.
+    """
+    if len(files) <= 1:
+        return [_safe_extract_pages(data) for _, data in files]
+
+    max_workers = min(len(files), config.getint('pdf_loader', 'max_workers', fallback=4))
+    # Streamlit 스크립트 스레드, 배치 워커 스레드 등 멀티스레드 프로세스에서 호출되므로 fork 대신 spawn으로 시작합니다.
+    # (fork하면 다른 스레드가 잡고 있던 레이트 리미터, SQLite, logging 락을 자식이 물려받아 멈출 수 있습니다)
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        return list(executor.map(_safe_extract_pages, [data for _, data in files]))
+
+def pages_to_documents(source: str, pages: List[str]) -> Tuple[List[Document], str]:
+    """페이지 텍스트를 페이지 단위 Document 리스트와 파일 전체 텍스트로 변환합니다."""
+    total_pages = len(pages)
+    docs = [
+        Document(page_content=text, metadata={'source': source, 'page': i, 'total_pages': total_pages})
+        for i, text in enumerate(pages, 1)
+    ]
+    text = ''.join(f'{page}\n' for page in pages)
+    return docs, text
@@ -1,56 +1,284 @@
-import re
+import json, time
 import pandas as pd
-import streamlit as st
 from sklearn.preprocessing import StandardScaler
 
 # LLM 필터링을 위한 라이브러리 추가
-from langchain_openai import ChatOpenAI
 from langchain.output_parsers import StructuredOutputParser, ResponseSchema
-from prompts.prompt_preprocess import filter_prompt
+from prompts.prompt_preprocess import filter_prompt, summarization_prompt_version
 from schemas.schema import FilteredKeywords
 from utils.config_loader import config
+from utils.token_func import count_tokens, split_by_tokens
+from utils.runtime import chat_model
+from utils.llm_cache import cache_on_success
+from utils.rate_limiter import backoff_policy
+from utils.summary_store import summary_store
+from utils.keyword_filter import prefilter_keywords
+from utils.relevance_model import local_relevance
+from utils import progress
 
-def clean_keyword_column(df: pd.DataFrame) -> pd.DataFrame:
-    
+# 키워드 허용 문자 (소문자 정규화 후 검사)
+# 두 패턴 모두 Arrow(RE2)에서 호출당 한 번 컴파일되어 열 전체에 적용됩니다.
+KEYWORD_PATTERN = r"[a-z0-9 &'().-]+"
+# 연속 공백과 탭/줄바꿈만 골라 한 칸 공백으로 바꿉니다. (단일 공백까지 매칭하는 \s+보다 훨씬 빠릅니다)
+MULTI_SPACE_PATTERN = r"\s{2,}|[\t\n\r\f\v]"
+
+def clean_keyword_column(df: pd.DataFrame) -> tuple[pd.DataFrame, dict]:
     if 'keyword' not in df.columns:
-        return df.copy()
+        return df.copy(), {}
 
     df_copy = df.copy()
-    valid_mask = df_copy['keyword'].apply(lambda x: bool(re.fullmatch(r"[A-Za-z0-9 &'().-]+", str(x))))
-    df_copy = df_copy[valid_mask].copy()
-    df_copy.drop_duplicates(subset=['keyword'], inplace=True)
+    total = len(df_copy)
+
+    # pyarrow 문자열로 바꿔 정규화/검사를 Arrow 연산으로 처리합니다.
+    # 대소문자와 공백을 정규화해 "Chicken Shredder"와 "chicken shredder "가 같은 키워드로 합쳐지도록 합니다.
+    keywords = (
+        df_copy['keyword'].astype('string[pyarrow]')
+        .str.strip()
+        .str.replace(MULTI_SPACE_PATTERN, ' ', regex=True)
+        .str.lower()
+    )
+    df_copy['keyword'] = keywords
+
+    missing_mask = (keywords.isna() | (keywords == '')).to_numpy(dtype=bool)
+    valid_mask = keywords.str.fullmatch(KEYWORD_PATTERN).fillna(False).to_numpy(dtype=bool)
+    invalid_mask = ~missing_mask & ~valid_mask
+
+    df_copy = df_copy[valid_mask]
+    before_dedup = len(df_copy)
+    df_copy = df_copy.drop_duplicates(subset=['keyword'])
     df_copy.reset_index(drop=True, inplace=True)
+
+    report = {
+        'total': total,
+        'missing': int(missing_mask.sum()),
+        'invalid_chars': int(invalid_mask.sum()),
+        'duplicate': before_dedup - len(df_copy),
+        'kept': len(df_copy),
+    }
     
-    return df_copy
+    return df_copy, report
+
+def prefilter_by_rules(df: pd.DataFrame) -> tuple[pd.DataFrame, dict, dict]:
+    """
+    규칙 기반 사전 필터(utils.keyword_filter)로 비영어/복수형/오타 키워드를 제거합니다.
+    (남은 df, 사유별 제거 수, 판단이 애매한 키워드 -> 비교 대상 키워드)를 반환합니다.
+    """
+    volumes = df['search_volume'].fillna(0).tolist() if 'search_volume' in df.columns else None
+    removed, ambiguous = prefilter_keywords(
+        df['keyword'].tolist(),
+        volumes,
+        min_typo_token_length=config.getint('keyword_filter', 'min_typo_token_length', fallback=4),
+        typo_frequency_ratio=config.getfloat('keyword_filter', 'typo_frequency_ratio', fallback=5.0),
+    )
+    counts = {reason: sum(1 for r in removed.values() if r == reason) for reason in ('non_english', 'plural', 'typo')}
+    return df[~df['keyword'].isin(set(removed))].copy(), counts, ambiguous
 
 def filter_by_llm(df: pd.DataFrame) -> pd.DataFrame:
     
     if df.empty:
         return df
 
+    df, counts, ambiguous = prefilter_by_rules(df)
+    progress.write(f"규칙 필터: 비영어 {counts['non_english']}개, 복수형 {counts['plural']}개, 오타 {counts['typo']}개 제거, 애매한 키워드 {len(ambiguous)}개")
+
+    if not ambiguous or not config.getboolean('keyword_filter', 'llm_residue', fallback=True):
+        return df
+
     try:
-        llm = ChatOpenAI(model=config['llm_keyword']['model'], temperature=float(config['llm_keyword']['temperature']))
+        llm = chat_model(config['llm_keyword']['model'], float(config['llm_keyword']['temperature']), node='filter_by_llm')
         
+        # 애매한 키워드와 비교 대상 키워드만 LLM에 보냅니다.
+        residue = list(dict.fromkeys([*ambiguous, *(other for others in ambiguous.values() for other in others)]))
         prompt = filter_prompt.invoke(
             {
-                'data': df['keyword'].tolist()
+                'data': residue
             }
         )
         
-        structured_llm = llm.with_structured_output(FilteredKeywords)
+        structured_llm = cache_on_success(llm.with_structured_output(FilteredKeywords))
         res = structured_llm.invoke(prompt)
 
         cleaned_keywords = set(res.keywords)
 
-        filtered_df = df[df['keyword'].isin(cleaned_keywords)].copy()
-        st.write(f"LLM 필터링 후 {len(filtered_df)}개 키워드 남음.")
+        rejected = {keyword for keyword in ambiguous if keyword not in cleaned_keywords}
+        filtered_df = df[~df['keyword'].isin(rejected)].copy()
+        progress.write(f"LLM 필터링 후 {len(filtered_df)}개 키워드 남음. (LLM 확인 {len(residue)}개 중 {len(rejected)}개 제거)")
         
         return filtered_df
     
     except Exception as e:
-        st.warning(f"LLM 필터링 중 오류가 발생하여 해당 단계를 건너뜁니다: {e}")
+        progress.warning(f"LLM 필터링 중 오류가 발생하여 애매한 키워드를 그대로 둡니다: {e}")
         return df
 
+# 응답 JSON에서 키워드 하나당 추가로 붙는 토큰 수 ({"keyword": ..., "relevance_category": ...})
+RELEVANCE_ITEM_OVERHEAD_TOKENS = 16
+
+def chunk_keywords(keywords: list[str], max_tokens: int, model: str) -> list[list[str]]:
+    """키워드 리스트를 예상 응답 토큰 수가 max_tokens를 넘지 않도록 청크로 나눕니다."""
+    chunks = []
+    current, current_tokens = [], 0
+    for keyword in keywords:
+        tokens = count_tokens(keyword, model) + RELEVANCE_ITEM_OVERHEAD_TOKENS
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(current)
+            current, current_tokens = [], 0
+        current.append(keyword)
+        current_tokens += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+def parse_relevance(response: str) -> dict:
+    """연관성 분류 응답(JSON 리스트)을 {키워드: 카테고리}로 바꿉니다. 형식이 맞지 않으면 예외가 발생합니다."""
+    return {item['keyword']: item['relevance_category'] for item in json.loads(response)}
+
+def split_chunk(chunk: list[str]) -> list[list[str]]:
+    """청크를 반으로 나눕니다. 키워드가 하나면 그대로 둡니다."""
+    if len(chunk) < 2:
+        return [chunk]
+    middle = len(chunk) // 2
+    return [chunk[:middle], chunk[middle:]]
+
+def classify_relevance_batched(chain, keywords: list[str], product_name: str, product_information: str,
+                               chunk_tokens: int, max_concurrency: int, max_retries: int, model: str) -> tuple[dict, list[str], int]:
+    """
+    키워드를 청크로 나눠 연관성 분류를 병렬로 요청합니다.
+    응답 파싱은 체인 안에서 하므로 형식이 잘못된 응답은 캐시에 남지 않습니다.
+    실패한 청크만 max_retries회까지 다시 요청하며, (classification_map, 실패 키워드, 청크 수)를 반환합니다.
+    temperature 0에서는 같은 프롬프트가 같은 잘못된 응답을 다시 내기 쉬우므로, 재시도할 때는 백오프 후
+    실패한 청크를 반으로 나눠 캐시를 거치지 않고 새로 요청합니다.
+    """
+    chunks = chunk_keywords(keywords, chunk_tokens, model)
+    classification_map = {}
+    pending = chunks
+    policy = backoff_policy()
+
+    for attempt in range(max_retries + 1):
+        if not pending:
+            break
+
+        if attempt:
+            time.sleep(policy.delay(attempt - 1))
+            pending = [part for chunk in pending for part in split_chunk(chunk)]
+
+        inputs = [
+            {
+                "product_name": product_name,
+                "product_information": product_information,
+                "keyword_list_str": json.dumps(chunk, ensure_ascii=False)
+            }
+            for chunk in pending
+        ]
+        parse_chain = cache_on_success(chain | parse_relevance, refresh=attempt > 0)
+        results = parse_chain.batch(inputs, config={'max_concurrency': max_concurrency}, return_exceptions=True)
+
+        failed = []
+        for chunk, res in zip(pending, results):
+            if isinstance(res, Exception):
+                failed.append(chunk)
+            else:
+                classification_map.update(res)
+        pending = failed
+
+    failed_keywords = [keyword for chunk in pending for keyword in chunk]
+    return classification_map, failed_keywords, len(chunks)
+
+def classify_relevance_locally(keywords: list[str], product_name: str, product_information: str) -> tuple[dict, list[str]]:
+    """
+    로컬 분류기가 확신하는 키워드는 바로 분류하고, 나머지는 LLM에 보낼 키워드로 돌려줍니다.
+    로컬 분류기가 꺼져 있거나 아직 학습되지 않았으면 모든 키워드를 LLM으로 보냅니다.
+    """
+    local = local_relevance()
+    if local is None:
+        return {}, list(keywords)
+
+    try:
+        return local.classify(keywords, product_name, str(product_information))
+    except Exception as e:
+        progress.warning(f"로컬 연관성 분류기를 사용할 수 없어 모든 키워드를 LLM으로 분류합니다: {e}")
+        return {}, list(keywords)
+
+def record_relevance_labels(product_name: str, product_information: str, labels: dict) -> None:
+    """LLM이 부여한 연관성 라벨을 로컬 분류기 학습용 저장소에 쌓습니다."""
+    local = local_relevance()
+    if local is None or not labels:
+        return
+
+    try:
+        local.record(product_name, str(product_information), labels)
+    except Exception as e:
+        progress.warning(f"연관성 라벨 저장 중 오류가 발생했습니다: {e}")
+
+def reduce_summaries(reduce_chain, summaries: list[str]) -> str:
+    """
+    부분 요약들을 [information_refine] summary_tokens 이하의 요약 하나로 합칩니다.
+    한 번에 넣기에 너무 길면 chunk_tokens 단위로 묶어 병렬로 합치는 과정을 반복합니다.
+    """
+    chunk_tokens = config.getint('information_refine', 'chunk_tokens')
+    summary_tokens = config.getint('information_refine', 'summary_tokens')
+    max_concurrency = config.getint('information_refine', 'max_concurrency')
+    max_rounds = config.getint('information_refine', 'max_reduce_rounds')
+    model = config['information_refine']['model']
+
+    for _ in range(max_rounds):
+        joined = "\n\n".join(summaries)
+        if len(summaries) == 1 and count_tokens(joined, model) <= summary_tokens:
+            return joined
+
+        if count_tokens(joined, model) <= chunk_tokens:
+            return reduce_chain.invoke({"summaries": joined, "max_tokens": summary_tokens}).content
+
+        groups = split_by_tokens(joined, chunk_tokens, model)
+        responses = reduce_chain.batch(
+            [{"summaries": group, "max_tokens": summary_tokens} for group in groups],
+            config={'max_concurrency': max_concurrency}
+        )
+        summaries = [response.content for response in responses]
+
+    return "\n\n".join(summaries)
+
+def summarize_documents(chain, reduce_chain, texts: list[str]) -> tuple[list[str], int]:
+    """
+    문서별로 요약을 만들고 (요약 리스트, 새로 요약한 문서 수)를 반환합니다.
+    저장소에 있는 문서는 저장된 요약을 쓰고, 새 문서만 요약합니다.
+    새 문서는 chunk_tokens 단위로 나눠 모든 청크를 병렬로 요약(map)한 뒤, 문서별로 부분 요약을 합칩니다(reduce).
+    """
+    chunk_tokens = config.getint('information_refine', 'chunk_tokens')
+    summary_tokens = config.getint('information_refine', 'summary_tokens')
+    max_concurrency = config.getint('information_refine', 'max_concurrency')
+    model = config['information_refine']['model']
+
+    # 청크 크기나 요약 예산이 바뀌면 요약 결과도 달라지므로 저장소 키에 함께 넣습니다.
+    version = f'{summarization_prompt_version}:{chunk_tokens}:{summary_tokens}'
+
+    store = summary_store()
+    keys = [store.key(text, version) for text in texts] if store else []
+    summaries = [store.get(key) for key in keys] if store else [None] * len(texts)
+
+    new_idx = [i for i, summary in enumerate(summaries) if summary is None]
+    if new_idx:
+        # map: 새 문서들의 청크를 한 번에 병렬 요약
+        chunk_owner = []
+        chunk_inputs = []
+        for i in new_idx:
+            for chunk in split_by_tokens(texts[i], chunk_tokens, model):
+                chunk_owner.append(i)
+                chunk_inputs.append({"product_text": chunk})
+
+        responses = chain.batch(chunk_inputs, config={'max_concurrency': max_concurrency})
+
+        partials = {i: [] for i in new_idx}
+        for i, response in zip(chunk_owner, responses):
+            partials[i].append(response.content)
+
+        # reduce: 문서별 부분 요약을 합침
+        for i in new_idx:
+            summaries[i] = reduce_summaries(reduce_chain, partials[i]) if partials[i] else ''
+            if store:
+                store.put(keys[i], summaries[i])
+
+    return summaries, len(new_idx)
+
 def clean_sv_column(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.Series]:
     
     df_copy = df.copy()
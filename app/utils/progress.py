@@ -0,0 +1,61 @@
+from typing import Any
+from langgraph.config import get_config, get_stream_writer
+
+# ====================================================================================================
+# 노드 진행 이벤트
+# 노드는 Streamlit을 직접 호출하지 않고 진행 상황을 LangGraph custom 스트림 이벤트로 보냅니다.
+# 화면은 그래프를 stream(stream_mode=STREAM_MODES)으로 실행하는 쪽(ui.ui_progress)이 이벤트를 받아 그립니다.
+# 그래프를 invoke로 실행하거나 그래프 밖에서 호출하면 이벤트는 버려집니다.
+#
+#     progress.status('Title 작성 중...')          → 노드의 st.status 박스를 엽니다
+#     progress.write(f'키워드 {n}개')              → 박스 안에 st.write
+#     progress.complete('Title 작성 완료')         → 박스를 완료 상태로 접습니다
+#
+# 이벤트: {'node': 노드 이름, 'kind': status | complete | info | write | success | warning | error | partial, 'text': ..., ...}
+
+STREAM_MODES = ['updates', 'custom', 'values']
+
+def _node_name() -> str:
+    return get_config()['metadata'].get('langgraph_node')
+
+def emit(kind: str, text: Any = None, **data: Any) -> None:
+    try:
+        writer = get_stream_writer()
+        node = _node_name()
+    except (RuntimeError, KeyError):
+        return
+    writer({'node': node, 'kind': kind, 'text': text, **data})
+
+def status(label: str) -> None:
+    emit('status', label)
+
+def complete(label: str) -> None:
+    emit('complete', label)
+
+def info(text: Any) -> None:
+    emit('info', text)
+
+def write(text: Any) -> None:
+    emit('write', text)
+
+def success(text: Any) -> None:
+    emit('success', text)
+
+def warning(text: Any, restart: bool = False) -> None:
+    """restart=True면 노드가 더 진행할 수 없다는 뜻으로, 화면이 분석을 멈추고 '처음으로' 버튼을 보여줍니다."""
+    emit('warning', text, restart=restart)
+
+def error(text: Any, restart: bool = True) -> None:
+    emit('error', text, restart=restart)
+
+def partial_writer(field: str):
+    """
+    생성 중인 field 값을 보내는 함수를 돌려줍니다. (노드 스레드에서 만들어 LLM 콜백에 넘깁니다)
+    화면은 같은 노드의 다음 이벤트가 오면 중간 출력을 지웁니다.
+    """
+    try:
+        writer = get_stream_writer()
+        node = _node_name()
+    except (RuntimeError, KeyError):
+        return lambda value: None
+    return lambda value: writer({'node': node, 'kind': 'partial', 'field': field, 'text': value})
@@ -0,0 +1,67 @@
+import math
+from typing import Any, Dict, List, Tuple
+from utils.token_func import count_tokens
+
+# 연관성 카테고리는 한 글자 코드로 보내고, 범례를 데이터 첫 줄에 붙입니다.
+CATEGORY_CODES = {
+    'Direct': 'D', 'Related': 'R', 'Indirect': 'I', 'NotRelated': 'N',
+    '직접': 'D', '중간': 'R', '간접': 'I', '없음': 'N', '분류 실패': '?',
+}
+CATEGORY_LEGEND = '# relevance_category codes: D=Direct, R=Related, I=Indirect, N=NotRelated, ?=Unclassified'
+
+# ====================================================================================================
+# 압축 표 형식
+def _format_value(value: Any, decimals: int) -> str:
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ''
+    if isinstance(value, float):
+        return f'{value:.{decimals}f}'.rstrip('0').rstrip('.')
+    text = str(value)
+    return f'"{text}"' if ',' in text or '"' in text else text
+
+def encode_rows(rows: List[Dict[str, Any]], columns: List[str], decimals: int = 3) -> List[str]:
+    """행 dict 리스트를 CSV 형식 줄 리스트로 바꿉니다. 실수는 반올림하고, relevance_category는 코드로 바꿉니다."""
+    lines = []
+    for row in rows:
+        values = []
+        for column in columns:
+            value = row.get(column)
+            if column == 'relevance_category':
+                value = CATEGORY_CODES.get(value, value)
+            values.append(_format_value(value, decimals))
+        lines.append(','.join(values))
+    return lines
+
+def render_table(columns: List[str], lines: List[str]) -> str:
+    header = [CATEGORY_LEGEND] if 'relevance_category' in columns else []
+    return '\n'.join(header + [','.join(columns)] + lines)
+
+# ====================================================================================================
+# 토큰 예산 플래너
+def plan_keyword_payload(render, rows: List[Dict[str, Any]], columns: List[str], max_tokens: int, model: str,
+                         priority: str = 'value_score', decimals: int = 3) -> Tuple[str, List[Dict[str, Any]], int]:
+    """
+    키워드 행을 압축 표로 만들고, 렌더링한 프롬프트 전체가 max_tokens를 넘지 않도록 우선순위가 낮은 행부터 잘라냅니다.
+    render는 표 문자열을 받아 완성된 프롬프트 문자열을 돌려주는 함수입니다.
+    (표 문자열, 프롬프트에 들어간 행, 프롬프트 토큰 수)를 반환합니다.
+    """
+    if priority in columns:
+        rows = sorted(rows, key=lambda row: -(row.get(priority) or 0))
+    lines = encode_rows(rows, columns, decimals)
+
+    # 줄별 토큰 수의 누적합으로 들어갈 행 수를 정한 뒤, 실제로 렌더링해 확인하며 넘치면 더 줄입니다.
+    base_tokens = count_tokens(render(render_table(columns, [])), model)
+    budget = max_tokens - base_tokens
+    used, count = 0, 0
+    for line in lines:
+        used += count_tokens(line, model) + 1
+        if used > budget:
+            break
+        count += 1
+
+    while True:
+        table = render_table(columns, lines[:count])
+        tokens = count_tokens(render(table), model)
+        if tokens <= max_tokens or count == 0:
+            return table, rows[:count], tokens
+        count = max(0, count - max(1, count // 20))
@@ -0,0 +1,328 @@
+import time, heapq, random, asyncio, itertools, threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+from uuid import UUID
+import httpx
+from utils.config_loader import config
+from utils.instrumentation import record
+from utils.llm_usage import UsageCallbackHandler
+from utils import tracing
+
+# 요청 우선순위. 숫자가 작을수록 먼저 처리합니다.
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 5
+PRIORITY_BATCH = 10
+
+# 이 상태 코드는 잠시 뒤 다시 요청하면 성공할 수 있으므로 재시도합니다.
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+_request_priority: ContextVar[int] = ContextVar('request_priority', default=PRIORITY_NORMAL)
+
+@contextmanager
+def request_priority(priority: int):
+    """with 블록 안에서 만든 LLM 요청의 기본 우선순위를 바꿉니다. (그래프 노드와 chain.batch 스레드에도 전달됩니다)"""
+    token = _request_priority.set(priority)
+    try:
+        yield
+    finally:
+        _request_priority.reset(token)
+
+def _current_priority(priority: Optional[int] = None) -> int:
+    """priority가 None이면 request_priority로 지정한 현재 컨텍스트의 우선순위"""
+    return priority if priority is not None else _request_priority.get()
+
+# ====================================================================================================
+# 토큰 버킷
+class TokenBucket:
+    """
+    초당 rate만큼 채워지고 capacity까지 쌓이는 버킷.
+    consume은 잔량이 음수가 되는 것도 허용합니다. (응답을 받은 뒤 실제 사용 토큰을 정산하는 용도)
+    """
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.level = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def consume(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.level -= amount
+
+    def time_until(self, amount: float, now: float) -> float:
+        """잔량이 amount 이상이 될 때까지 남은 시간(초)"""
+        self._refill(now)
+        return max(0.0, (amount - self.level) / self.rate)
+
+# ====================================================================================================
+# 프로세스 공용 레이트 리미터
+class RateLimiter:
+    """
+    분당 요청 수(RPM)와 분당 토큰 수(TPM) 버킷을 함께 지키는 프로세스 공용 리미터.
+    - 요청은 우선순위 순서(같으면 도착 순서)로 버킷을 차지하므로, 대화형 재생성 요청이 배치 작업보다 먼저 나갑니다.
+    - TPM은 요청 전에 프롬프트 길이로 추정해 예약하고, 응답을 받으면 실제 사용량으로 정산합니다.
+    - 429를 받으면 cool_down으로 모든 요청을 잠시 멈춰, 한도를 넘은 상태에서 재시도가 몰리지 않게 합니다.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float, burst_seconds: float = 10):
+        self._requests = TokenBucket(max(1.0, requests_per_minute / 60 * burst_seconds), requests_per_minute / 60)
+        self._tokens = TokenBucket(max(1.0, tokens_per_minute / 60 * burst_seconds), tokens_per_minute / 60)
+        self._cond = threading.Condition()
+        self._waiters = []
+        # 이벤트 루프에서 기다리는 요청: ticket → (루프, asyncio.Event)
+        self._async_waiters: Dict[tuple, tuple] = {}
+        self._sequence = itertools.count()
+        self._cooldown_until = 0.0
+
+    def _wait_time(self, now: float) -> float:
+        return max(
+            self._cooldown_until - now,
+            self._requests.time_until(1, now),
+            self._tokens.time_until(0, now),
+        )
+
+    def _notify_all(self) -> None:
+        """기다리는 스레드와 이벤트 루프의 대기 요청을 모두 깨웁니다. (self._cond를 잡은 상태에서 호출)"""
+        self._cond.notify_all()
+        for loop, event in self._async_waiters.values():
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # 이미 닫힌 루프
+                pass
+
+    def acquire(self, priority: int = PRIORITY_NORMAL) -> None:
+        """요청 하나를 보낼 수 있을 때까지 기다립니다. 앞선 우선순위의 대기 요청이 있으면 그 뒤에 섭니다."""
+        with self._cond:
+            ticket = (priority, next(self._sequence))
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    if self._waiters[0] != ticket:
+                        self._cond.wait()
+                        continue
+                    now = time.monotonic()
+                    wait = self._wait_time(now)
+                    if wait <= 0:
+                        self._requests.consume(1, now)
+                        return
+                    self._cond.wait(wait)
+            finally:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._notify_all()
+
+    async def aacquire(self, priority: int = PRIORITY_NORMAL) -> None:
+        """
+        acquire의 비동기 버전. 같은 대기열에 서지만 스레드를 붙잡지 않고 이벤트 루프에서 기다리므로,
+        대기 요청이 많아도 기본 스레드 풀(체크포인트 저장, InThread 단계)을 막지 않습니다.
+        """
+        event = asyncio.Event()
+        with self._cond:
+            ticket = (priority, next(self._sequence))
+            heapq.heappush(self._waiters, ticket)
+            self._async_waiters[ticket] = (asyncio.get_running_loop(), event)
+        try:
+            while True:
+                with self._cond:
+                    event.clear()
+                    timeout = None
+                    if self._waiters[0] == ticket:
+                        now = time.monotonic()
+                        timeout = self._wait_time(now)
+                        if timeout <= 0:
+                            self._requests.consume(1, now)
+                            return
+                # 앞선 요청이 빠지거나 토큰이 정산되면 깨어나고, 맨 앞이면 버킷이 찰 때까지만 기다립니다.
+                try:
+                    await asyncio.wait_for(event.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            with self._cond:
+                del self._async_waiters[ticket]
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._notify_all()
+
+    def charge_tokens(self, amount: float) -> None:
+        """TPM 버킷에서 amount만큼 차감합니다. 음수면 돌려줍니다."""
+        with self._cond:
+            self._tokens.consume(amount, time.monotonic())
+            self._notify_all()
+
+    def cool_down(self, seconds: float) -> None:
+        with self._cond:
+            self._cooldown_until = max(self._cooldown_until, time.monotonic() + seconds)
+
+# ====================================================================================================
+# LangChain 연결부
+class TokenUsageTracker(UsageCallbackHandler):
+    """요청 시작 시 프롬프트 토큰을 추정해 TPM을 예약하고, 응답의 token_usage로 정산합니다. 캐시 응답은 예약을 돌려받습니다."""
+
+    def __init__(self, limiter: RateLimiter):
+        super().__init__()
+        self.limiter = limiter
+        self._reserved: Dict[UUID, float] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages, *, run_id: UUID, **kwargs: Any) -> None:
+        # tiktoken을 부르지 않고 글자 수로 어림합니다. (영문 기준 4자 = 1토큰)
+        estimate = sum(len(str(message.content)) for batch in messages for message in batch) / 4
+        with self._lock:
+            self._reserved[run_id] = estimate
+        self.limiter.charge_tokens(estimate)
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            estimate = self._reserved.pop(run_id, 0.0)
+        usage = (self.llm_output(response, run_id) or {}).get('token_usage') or {}
+        self.limiter.charge_tokens((usage.get('total_tokens') or 0) - estimate)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        super().on_llm_error(error, run_id=run_id, **kwargs)
+        with self._lock:
+            estimate = self._reserved.pop(run_id, 0.0)
+        self.limiter.charge_tokens(-estimate)
+
+# ====================================================================================================
+# HTTP 재시도 (지수 백오프 + 지터)
+def _note_retry(attempt: int, delay: float, reason: str) -> None:
+    """재시도 횟수를 현재 노드의 측정값에 더하고, 노드 스팬에 재시도 이벤트를 남깁니다."""
+    record(retries=1)
+    tracing.add_event('http.retry', {'retry.attempt': attempt + 1, 'retry.delay_sec': round(delay, 3), 'retry.reason': reason})
+
+class BackoffPolicy:
+    def __init__(self, max_retries: int, base: float, cap: float):
+        self.max_retries = max_retries
+        self.base = base
+        self.cap = cap
+
+    def delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        """
+        서버가 retry-after(-ms)를 주면 그 값 이상을 기다리고, 아니면 base * 2^attempt(최대 cap)를 기준으로
+        full jitter(0~기준값 사이 무작위)를 적용합니다. 동시에 실패한 요청들이 같은 시각에 다시 몰리지 않게 합니다.
+        """
+        retry_after = None
+        if response is not None:
+            try:
+                if 'retry-after-ms' in response.headers:
+                    retry_after = float(response.headers['retry-after-ms']) / 1000
+                elif 'retry-after' in response.headers:
+                    retry_after = float(response.headers['retry-after'])
+            except ValueError:
+                retry_after = None
+
+        backoff = random.uniform(0, min(self.cap, self.base * 2 ** attempt))
+        return max(retry_after or 0.0, backoff)
+
+class RetryTransport(httpx.BaseTransport):
+    """
+    429/5xx와 연결 실패를 백오프하며 재시도하는 httpx 전송 계층. 429를 받으면 리미터 전체를 잠시 멈춥니다.
+    재시도를 포함한 모든 시도가 RateLimiter의 RPM/TPM 버킷과 우선순위 대기열을 거칩니다. (캐시 응답은 여기까지 오지 않습니다)
+    priority가 None이면 request_priority로 지정한 현재 컨텍스트의 우선순위로 기다립니다.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, limiter: RateLimiter, policy: BackoffPolicy, priority: Optional[int] = None):
+        self.transport = transport
+        self.limiter = limiter
+        self.policy = policy
+        self.priority = priority
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        for attempt in range(self.policy.max_retries + 1):
+            self.limiter.acquire(_current_priority(self.priority))
+            try:
+                response = self.transport.handle_request(request)
+            except httpx.ConnectError:
+                if attempt == self.policy.max_retries:
+                    raise
+                delay = self.policy.delay(attempt)
+                _note_retry(attempt, delay, 'connect_error')
+                time.sleep(delay)
+                continue
+
+            if response.status_code not in RETRY_STATUS_CODES or attempt == self.policy.max_retries:
+                return response
+
+            delay = self.policy.delay(attempt, response)
+            if response.status_code == 429:
+                self.limiter.cool_down(delay)
+            _note_retry(attempt, delay, str(response.status_code))
+            response.close()
+            time.sleep(delay)
+
+    def close(self) -> None:
+        self.transport.close()
+
+class AsyncRetryTransport(httpx.AsyncBaseTransport):
+    """RetryTransport의 비동기 버전. 리미터 대기도 스레드를 붙잡지 않고 이벤트 루프에서 합니다. (RateLimiter.aacquire)"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, limiter: RateLimiter, policy: BackoffPolicy, priority: Optional[int] = None):
+        self.transport = transport
+        self.limiter = limiter
+        self.policy = policy
+        self.priority = priority
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        for attempt in range(self.policy.max_retries + 1):
+            await self.limiter.aacquire(_current_priority(self.priority))
+            try:
+                response = await self.transport.handle_async_request(request)
+            except httpx.ConnectError:
+                if attempt == self.policy.max_retries:
+                    raise
+                delay = self.policy.delay(attempt)
+                _note_retry(attempt, delay, 'connect_error')
+                await asyncio.sleep(delay)
+                continue
+
+            if response.status_code not in RETRY_STATUS_CODES or attempt == self.policy.max_retries:
+                return response
+
+            delay = self.policy.delay(attempt, response)
+            if response.status_code == 429:
+                self.limiter.cool_down(delay)
+            _note_retry(attempt, delay, str(response.status_code))
+            await response.aclose()
+            await asyncio.sleep(delay)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+# ====================================================================================================
+# 공용 인스턴스
+_rate_limiter: Optional[RateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+def rate_limiter() -> RateLimiter:
+    """[rate_limit] 설정으로 만든 프로세스 공용 RateLimiter를 반환합니다."""
+    global _rate_limiter
+
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = RateLimiter(
+                requests_per_minute=config.getfloat('rate_limit', 'requests_per_minute', fallback=500),
+                tokens_per_minute=config.getfloat('rate_limit', 'tokens_per_minute', fallback=200000),
+                burst_seconds=config.getfloat('rate_limit', 'burst_seconds', fallback=10),
+            )
+    return _rate_limiter
+
+def backoff_policy(max_retries: Optional[int] = None) -> BackoffPolicy:
+    """max_retries를 주면 [rate_limit] max_retries 대신 그 횟수만큼 재시도합니다. (0이면 재시도하지 않음)"""
+    return BackoffPolicy(
+        max_retries=max_retries if max_retries is not None else config.getint('rate_limit', 'max_retries', fallback=5),
+        base=config.getfloat('rate_limit', 'backoff_base', fallback=1.0),
+        cap=config.getfloat('rate_limit', 'backoff_max', fallback=60.0),
+    )
+
+def http_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=config.getint('runtime', 'max_connections', fallback=20),
+        max_keepalive_connections=config.getint('runtime', 'max_keepalive_connections', fallback=10),
+    )
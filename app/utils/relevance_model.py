@@ -0,0 +1,243 @@
+import os, re, time, hashlib, sqlite3
+from contextlib import closing
+from typing import Dict, List, Optional, Tuple
+import joblib
+import numpy as np
+from scipy.sparse import csr_matrix, hstack
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import GroupShuffleSplit, train_test_split
+from utils.config_loader import config, config_path
+from utils.keyword_filter import singularize
+
+# LLM이 분류에 실패한 키워드에 붙는 값은 학습 라벨로 쓰지 않습니다.
+EXCLUDED_LABELS = {'분류 실패'}
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# ====================================================================================================
+# LLM 라벨 저장소
+class RelevanceLabelStore:
+    """
+    LLM이 부여한 (상품, 키워드, 연관성 카테고리)를 SQLite에 쌓아 둡니다.
+    상품 정보는 내용 해시로 한 번만 저장하고, 같은 상품의 같은 키워드는 마지막 라벨로 덮어씁니다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS products ('
+                'product_key TEXT PRIMARY KEY, product_name TEXT NOT NULL, product_information TEXT NOT NULL)'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS labels ('
+                'product_key TEXT NOT NULL, keyword TEXT NOT NULL, label TEXT NOT NULL, created_at REAL NOT NULL, '
+                'PRIMARY KEY (product_key, keyword))'
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def product_key(product_name: str, product_information: str) -> str:
+        return hashlib.sha256(f'{product_name}\n{product_information}'.encode('utf-8')).hexdigest()
+
+    def add(self, product_name: str, product_information: str, labels: Dict[str, str]) -> int:
+        rows = [(keyword, label) for keyword, label in labels.items() if label not in EXCLUDED_LABELS]
+        if not rows:
+            return 0
+
+        key = self.product_key(product_name, product_information)
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                'INSERT OR IGNORE INTO products (product_key, product_name, product_information) VALUES (?, ?, ?)',
+                (key, product_name, product_information)
+            )
+            conn.executemany(
+                'INSERT OR REPLACE INTO labels (product_key, keyword, label, created_at) VALUES (?, ?, ?, ?)',
+                [(key, keyword, label, now) for keyword, label in rows]
+            )
+        return len(rows)
+
+    def count(self) -> int:
+        with closing(self._connect()) as conn:
+            return conn.execute('SELECT COUNT(*) FROM labels').fetchone()[0]
+
+    def load(self) -> List[Tuple[str, str, str, str, str]]:
+        """(product_key, product_name, product_information, keyword, label) 목록을 반환합니다."""
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                'SELECT l.product_key, p.product_name, p.product_information, l.keyword, l.label '
+                'FROM labels l JOIN products p ON l.product_key = p.product_key'
+            ).fetchall()
+
+# ====================================================================================================
+# 경량 연관성 분류기
+def _tokens(text: str) -> set:
+    return {singularize(token) for token in TOKEN_PATTERN.findall((text or '').lower())}
+
+def _char_ngrams(text: str, n: int = 3) -> set:
+    text = f' {(text or "").lower()} '
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+def _jaccard(a: set, b: set) -> float:
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+class RelevanceClassifier:
+    """
+    키워드 자체의 char n-gram TF-IDF와, 상품명/상품 정보와의 어휘 겹침 특징을 합쳐 로지스틱 회귀로 분류합니다.
+    어휘 겹침 특징 덕분에 학습에 없던 상품에도 "상품명과 얼마나 겹치는가"를 기준으로 일반화됩니다.
+    """
+
+    def __init__(self):
+        self.vectorizer = TfidfVectorizer(analyzer='char_wb', ngram_range=(2, 4), min_df=2, sublinear_tf=True)
+        self.model = LogisticRegression(max_iter=2000, C=4.0)
+
+    @staticmethod
+    def overlap_features(keywords: List[str], product_name: str, product_information: str) -> np.ndarray:
+        name_tokens, info_tokens = _tokens(product_name), _tokens(product_information)
+        name_ngrams = _char_ngrams(product_name)
+        name_lower = (product_name or '').lower()
+
+        rows = []
+        for keyword in keywords:
+            tokens = _tokens(keyword)
+            size = len(tokens) or 1
+            rows.append([
+                len(tokens & name_tokens) / size,
+                len(tokens & info_tokens) / size,
+                _jaccard(tokens, name_tokens),
+                _jaccard(_char_ngrams(keyword), name_ngrams),
+                float(bool(name_lower) and name_lower in keyword),
+                min(len(tokens), 10) / 10,
+            ])
+        return np.asarray(rows, dtype=float)
+
+    def _features(self, keywords: List[str], overlap: np.ndarray):
+        return hstack([self.vectorizer.transform(keywords), csr_matrix(overlap)]).tocsr()
+
+    def fit(self, keywords: List[str], overlap: np.ndarray, labels: List[str]) -> 'RelevanceClassifier':
+        self.vectorizer.fit(keywords)
+        self.model.fit(self._features(keywords, overlap), labels)
+        return self
+
+    def predict(self, keywords: List[str], overlap: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(예측 라벨, 예측 확률)을 반환합니다."""
+        proba = self.model.predict_proba(self._features(keywords, overlap))
+        return self.model.classes_[proba.argmax(axis=1)], proba.max(axis=1)
+
+# ====================================================================================================
+# 로컬 분류 + LLM 라벨 축적
+class LocalRelevance:
+    """
+    LLM 라벨을 저장소에 쌓고, 충분히 쌓이면 RelevanceClassifier를 학습해 확신도가 높은 키워드를 로컬에서 분류합니다.
+    학습할 때 상품 단위로 나눈 검증 세트에서 확신 구간의 정확도가 min_precision 이상일 때만 로컬 분류를 사용합니다.
+    """
+
+    def __init__(self, store: RelevanceLabelStore, model_path: str, min_labels: int = 500, retrain_every: int = 200,
+                 min_confidence: float = 0.9, min_precision: float = 0.9):
+        self.store = store
+        self.model_path = model_path
+        self.min_labels = min_labels
+        self.retrain_every = retrain_every
+        self.min_confidence = min_confidence
+        self.min_precision = min_precision
+        self._state: Optional[dict] = None
+
+    def record(self, product_name: str, product_information: str, labels: Dict[str, str]) -> int:
+        return self.store.add(product_name, product_information, labels)
+
+    def _load_state(self) -> Optional[dict]:
+        if self._state is None and os.path.exists(self.model_path):
+            try:
+                self._state = joblib.load(self.model_path)
+            except Exception:
+                self._state = None
+        return self._state
+
+    def train(self) -> Optional[dict]:
+        """저장된 라벨로 분류기를 학습하고 검증 정확도와 함께 저장합니다. 라벨이 부족하면 None을 반환합니다."""
+        rows = self.store.load()
+        if len(rows) < self.min_labels or len({row[4] for row in rows}) < 2:
+            return None
+
+        groups = np.array([row[0] for row in rows])
+        keywords = [row[3] for row in rows]
+        labels = np.array([row[4] for row in rows])
+
+        overlap = np.zeros((len(rows), 6))
+        for key in set(groups):
+            idx = np.flatnonzero(groups == key)
+            name, information = rows[idx[0]][1], rows[idx[0]][2]
+            overlap[idx] = RelevanceClassifier.overlap_features([keywords[i] for i in idx], name, information)
+
+        # 새 상품에 대한 성능을 보기 위해 상품 단위로 검증 세트를 나눕니다. (상품이 적으면 행 단위)
+        if len(set(groups)) >= 3:
+            train_idx, test_idx = next(GroupShuffleSplit(n_splits=1, test_size=0.25, random_state=0).split(keywords, labels, groups))
+        else:
+            train_idx, test_idx = train_test_split(np.arange(len(rows)), test_size=0.25, random_state=0)
+
+        holdout = RelevanceClassifier().fit([keywords[i] for i in train_idx], overlap[train_idx], labels[train_idx].tolist())
+        predicted, confidence = holdout.predict([keywords[i] for i in test_idx], overlap[test_idx])
+        confident = confidence >= self.min_confidence
+        precision = float((predicted[confident] == labels[test_idx][confident]).mean()) if confident.any() else 0.0
+
+        state = {
+            'classifier': RelevanceClassifier().fit(keywords, overlap, labels.tolist()),
+            'n_labels': len(rows),
+            'holdout_precision': precision,
+            'holdout_coverage': float(confident.mean()),
+            'usable': precision >= self.min_precision,
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(self.model_path)), exist_ok=True)
+        joblib.dump(state, self.model_path)
+        self._state = state
+        return state
+
+    def ensure_model(self) -> Optional[dict]:
+        """라벨이 retrain_every개 이상 늘었으면 다시 학습하고, 현재 모델 상태를 반환합니다."""
+        state = self._load_state()
+        n_labels = self.store.count()
+        if n_labels >= self.min_labels and (state is None or n_labels - state['n_labels'] >= self.retrain_every):
+            state = self.train() or state
+        return state
+
+    def classify(self, keywords: List[str], product_name: str, product_information: str) -> Tuple[Dict[str, str], List[str]]:
+        """(로컬에서 분류한 키워드 -> 라벨, LLM에 보낼 불확실한 키워드)를 반환합니다."""
+        state = self.ensure_model()
+        if not keywords or state is None or not state['usable']:
+            return {}, list(keywords)
+
+        overlap = RelevanceClassifier.overlap_features(keywords, product_name, product_information)
+        predicted, confidence = state['classifier'].predict(keywords, overlap)
+
+        local_map, uncertain = {}, []
+        for keyword, label, score in zip(keywords, predicted, confidence):
+            if score >= self.min_confidence:
+                local_map[keyword] = str(label)
+            else:
+                uncertain.append(keyword)
+        return local_map, uncertain
+
+_local_relevance: Optional[LocalRelevance] = None
+
+def local_relevance() -> Optional[LocalRelevance]:
+    """[relevance_model] enabled가 켜져 있으면 공용 LocalRelevance를, 아니면 None을 반환합니다."""
+    global _local_relevance
+
+    if not config.getboolean('relevance_model', 'enabled', fallback=False):
+        return None
+
+    if _local_relevance is None:
+        base_dir = os.path.dirname(config_path)
+        _local_relevance = LocalRelevance(
+            RelevanceLabelStore(os.path.join(base_dir, config.get('relevance_model', 'label_path', fallback='.cache/relevance_labels.sqlite'))),
+            os.path.join(base_dir, config.get('relevance_model', 'model_path', fallback='.cache/relevance_model.joblib')),
+            min_labels=config.getint('relevance_model', 'min_labels', fallback=500),
+            retrain_every=config.getint('relevance_model', 'retrain_every', fallback=200),
+            min_confidence=config.getfloat('relevance_model', 'min_confidence', fallback=0.9),
+            min_precision=config.getfloat('relevance_model', 'min_precision', fallback=0.9),
+        )
+    return _local_relevance
@@ -0,0 +1,51 @@
+import os, hashlib
+from typing import Optional
+from utils.config_loader import config, config_path
+
+# ====================================================================================================
+# PDF 요약 저장소
+class SummaryStore:
+    """
+    추출된 PDF 텍스트와 요약 프롬프트 버전의 SHA-256 해시를 파일 이름으로 요약을 저장합니다.
+    같은 문서가 다시 업로드되면 LLM을 호출하지 않고 저장된 요약을 돌려줍니다.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(text: str, prompt_version: str) -> str:
+        return hashlib.sha256(f'{prompt_version}\n{text}'.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.txt')
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, summary: str) -> None:
+        # 쓰는 도중 중단되어도 깨진 파일이 남지 않도록 임시 파일에 쓴 뒤 교체합니다.
+        tmp_path = f'{self._path(key)}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(summary)
+        os.replace(tmp_path, self._path(key))
+
+_summary_store: Optional[SummaryStore] = None
+
+def summary_store() -> Optional[SummaryStore]:
+    """[summary_store] enabled가 켜져 있으면 공용 SummaryStore를, 아니면 None을 반환합니다."""
+    global _summary_store
+
+    if not config.getboolean('summary_store', 'enabled', fallback=False):
+        return None
+
+    if _summary_store is None:
+        _summary_store = SummaryStore(
+            os.path.join(os.path.dirname(config_path), config.get('summary_store', 'path', fallback='.cache/summaries'))
+        )
+    return _summary_store
@@ -0,0 +1,57 @@
+import tiktoken
+from functools import lru_cache
+
+@lru_cache(maxsize=None)
+def get_encoding(model: str):
+    """
+    모델에 맞는 tiktoken 인코딩을 가져옵니다. 모르는 모델이면 o200k_base를 사용합니다.
+    인코딩 파일을 받을 수 없는 환경(오프라인 등)이면 None을 반환하고, 이 결과도 캐시해 다시 시도하지 않습니다.
+    """
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding('o200k_base')
+    except Exception:
+        return None
+
+def count_tokens(text: str, model: str) -> int:
+    """텍스트의 토큰 수를 계산합니다. 인코딩을 불러올 수 없으면 글자 수 기반으로 추정합니다."""
+    encoding = get_encoding(model)
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text))
+
+def split_by_tokens(text: str, max_tokens: int, model: str) -> list[str]:
+    """
+    텍스트를 max_tokens 토큰 이하의 청크로 나눕니다.
+    줄 단위로 채워 넣고, 한 줄이 max_tokens보다 길면 토큰 단위로 잘라냅니다.
+    """
+    encoding = get_encoding(model)
+    chunks = []
+    current, current_tokens = [], 0
+
+    for line in text.splitlines(keepends=True):
+        tokens = count_tokens(line, model)
+
+        if tokens > max_tokens:
+            if current:
+                chunks.append(''.join(current))
+                current, current_tokens = [], 0
+            if encoding is not None:
+                encoded = encoding.encode(line)
+                chunks.extend(encoding.decode(encoded[i:i + max_tokens]) for i in range(0, len(encoded), max_tokens))
+            else:
+                step = max_tokens * 4
+                chunks.extend(line[i:i + step] for i in range(0, len(line), step))
+            continue
+
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(''.join(current))
+            current, current_tokens = [], 0
+        current.append(line)
+        current_tokens += tokens
+
+    if current:
+        chunks.append(''.join(current))
+    return chunks
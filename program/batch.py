@@ -0,0 +1,226 @@
+"""
+배치 모드: 매니페스트에 적힌 상품들을 사용자 입력 없이 한 번에 처리합니다.
+
+매니페스트(JSON)는 상품 목록이며, 경로와 glob 패턴은 매니페스트 파일 위치 기준입니다.
+    [
+        {"product_name": "chicken shredder", "category": "Kitchen",
+         "csv": ["../test_data/chicken shredder/1.*.csv"], "pdf": ["../test_data/chicken shredder/*.pdf"]}
+    ]
+
+상품은 [batch] max_workers개의 스레드로 동시에 처리하고, 사용자 피드백 단계 없이 최종 결과물을 output/에 저장합니다.
+--async를 주면 스레드 대신 하나의 이벤트 루프에서 graph.ainvoke로 최대 [batch] max_in_flight개 상품을 동시에 처리합니다.
+실행 결과(상품별 성공 여부, 소요 시간, LLM 사용량)는 output/batch_summary_<시각>.jsonl에,
+노드별 측정값은 output/<상품명>_metrics_<시각>.jsonl(.txt)에 기록합니다.
+
+[checkpoint]가 켜져 있으면 상품마다 노드가 끝날 때마다 상태를 저장합니다. 같은 매니페스트를 다시 실행하면
+중단된 상품은 마지막으로 끝난 노드 다음부터 이어서 실행하고, 이미 끝난 상품은 건너뜁니다. (--fresh면 모두 처음부터 실행)
+
+실행 (program 디렉토리에서):
+    python batch.py batch_manifest.example.json --workers 4
+    python batch.py batch_manifest.example.json --async --in-flight 32
+    python batch.py batch_manifest.example.json --fresh
+"""
+import os, sys, glob, json, time, asyncio, argparse
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
+from utils.config_loader import config
+
+load_dotenv()
+
+def expand_paths(patterns: List[str], base_dir: Path) -> List[Path]:
+    """glob 패턴 목록을 base_dir 기준으로 펼쳐 중복 없는 파일 경로 목록을 반환합니다."""
+    paths = []
+    for pattern in patterns:
+        matched = sorted(glob.glob(str(base_dir / pattern)))
+        if not matched:
+            print(f"[Warning] 일치하는 파일 없음: {pattern}")
+        paths.extend(Path(p) for p in matched)
+    return list(dict.fromkeys(paths))
+
+def load_manifest(path: str) -> List[dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        products = json.load(f)
+
+    base_dir = Path(path).resolve().parent
+    for product in products:
+        if not product.get('product_name') or not product.get('csv'):
+            raise ValueError(f'product_name과 csv는 필수입니다: {product}')
+        product['csv_paths'] = expand_paths(product['csv'], base_dir)
+        product['pdf_paths'] = expand_paths(product.get('pdf', []), base_dir)
+    return products
+
+def load_inputs(product: dict) -> Optional[dict]:
+    """상품의 CSV/PDF를 읽어 그래프 입력을 만듭니다. 형식에 맞는 CSV가 없으면 None을 반환합니다."""
+    from utils.data_loader import read_keywords_csv, read_information_pdf
+
+    name = product['product_name']
+    data = read_keywords_csv(name, product['csv_paths'])
+    if data is None:
+        return None
+
+    product_docs, product_information = read_information_pdf(product['pdf_paths'])
+    return {
+        'product_name': name,
+        'category': product.get('category', ''),
+        'data': data,
+        'product_docs': product_docs,
+        'product_information': product_information
+    }
+
+def plan_run(graph, inputs: dict, fresh: bool = False):
+    """
+    체크포인트를 확인해 (실행 방식, 그래프 입력, 실행 config)를 반환합니다.
+    - 'resume': 중단된 실행을 마지막으로 끝난 노드 다음부터 이어서 합니다. 그래프 입력은 None입니다.
+    - 'skip': 이미 끝난 실행입니다. 다시 실행하지 않습니다.
+    - 'new': 처음부터 실행합니다. fresh면 기존 체크포인트를 지우고 처음부터 실행합니다.
+    """
+    from utils.checkpoint import run_thread_id, run_config, run_status
+
+    run_cfg = run_config(run_thread_id(inputs))
+    status, _ = run_status(graph, run_cfg)
+    if status != 'new' and fresh:
+        graph.checkpointer.delete_thread(run_cfg['configurable']['thread_id'])
+    elif status == 'interrupted':
+        return 'resume', None, run_cfg
+    elif status == 'finished':
+        return 'skip', None, run_cfg
+    return 'new', inputs, run_cfg
+
+def add_metrics(summary: dict, metrics) -> None:
+    """상품 요약에 LLM 사용량 합계와 노드별 측정 파일 경로를 더합니다."""
+    if metrics is None:
+        return
+    total = metrics.summary_rows()[-1]
+    summary.update({key: total[key] for key in ('llm_calls', 'cache_hits', 'prompt_tokens', 'completion_tokens', 'retries', 'cost_usd')})
+    summary['metrics'] = metrics.jsonl_path
+
+def run_product(graph, product: dict, fresh: bool = False) -> dict:
+    """상품 하나를 그래프로 처리하고 결과 요약을 반환합니다. 실패해도 예외를 밖으로 던지지 않습니다."""
+    from utils.rate_limiter import request_priority, PRIORITY_BATCH
+    from utils.checkpoint import DURABILITY
+    from utils.instrumentation import instrument_run
+
+    started = time.perf_counter()
+    summary = {'product_name': product['product_name'], 'status': 'FAILED'}
+
+    try:
+        inputs = load_inputs(product)
+        if inputs is None:
+            summary['error'] = '형식에 맞는 CSV 파일이 없습니다.'
+            return summary
+
+        mode, graph_input, run_cfg = plan_run(graph, inputs, fresh)
+        summary['run'] = mode
+        if mode == 'skip':
+            result = graph.get_state(run_cfg).values
+        else:
+            # 같은 프로세스의 대화형 요청이 있으면 그 뒤로 양보합니다.
+            with request_priority(PRIORITY_BATCH), instrument_run(product['product_name'], thread_id=run_cfg['configurable']['thread_id']) as metrics:
+                result = graph.invoke(graph_input, run_cfg, durability=DURABILITY)
+            add_metrics(summary, metrics)
+            if graph.checkpointer is not None:
+                graph.checkpointer.compact_thread(run_cfg['configurable']['thread_id'])
+        summary['status'] = result.get('status') or 'FINISHED'
+    # preprocess_data 등은 치명적인 오류에서 sys.exit를 호출하므로 SystemExit도 상품 단위 실패로 처리합니다.
+    except (Exception, SystemExit) as e:
+        summary['error'] = f'{type(e).__name__}: {e}'
+    finally:
+        summary['elapsed_sec'] = round(time.perf_counter() - started, 2)
+    return summary
+
+async def arun_product(graph, product: dict, semaphore: asyncio.Semaphore, fresh: bool = False) -> dict:
+    """run_product의 비동기 버전. 파일 읽기와 체크포인트 확인은 스레드에서, 그래프는 ainvoke로 실행합니다."""
+    from utils.rate_limiter import request_priority, PRIORITY_BATCH
+    from utils.checkpoint import DURABILITY
+    from utils.instrumentation import instrument_run
+
+    async with semaphore:
+        started = time.perf_counter()
+        summary = {'product_name': product['product_name'], 'status': 'FAILED'}
+
+        try:
+            inputs = await asyncio.to_thread(load_inputs, product)
+            if inputs is None:
+                summary['error'] = '형식에 맞는 CSV 파일이 없습니다.'
+                return summary
+
+            mode, graph_input, run_cfg = await asyncio.to_thread(plan_run, graph, inputs, fresh)
+            summary['run'] = mode
+            if mode == 'skip':
+                result = (await graph.aget_state(run_cfg)).values
+            else:
+                with request_priority(PRIORITY_BATCH), instrument_run(product['product_name'], thread_id=run_cfg['configurable']['thread_id']) as metrics:
+                    result = await graph.ainvoke(graph_input, run_cfg, durability=DURABILITY)
+                add_metrics(summary, metrics)
+                if graph.checkpointer is not None:
+                    await asyncio.to_thread(graph.checkpointer.compact_thread, run_cfg['configurable']['thread_id'])
+            summary['status'] = result.get('status') or 'FINISHED'
+        except (Exception, SystemExit) as e:
+            summary['error'] = f'{type(e).__name__}: {e}'
+        finally:
+            summary['elapsed_sec'] = round(time.perf_counter() - started, 2)
+        return summary
+
+def write_summary(f, summary: dict) -> bool:
+    """요약 한 줄을 기록하고 출력합니다. 실패한 상품이면 True를 반환합니다."""
+    f.write(json.dumps(summary, ensure_ascii=False) + '\n')
+    f.flush()
+
+    if summary['status'] == 'FAILED':
+        print(f"\n[Error] {summary['product_name']} 처리 실패 ({summary['elapsed_sec']}초): {summary.get('error')}")
+        return True
+    if summary.get('run') == 'skip':
+        print(f"\n[Skip] {summary['product_name']} 이미 완료된 실행입니다. (다시 실행하려면 --fresh)")
+        return False
+    resumed = ' (이어서 실행)' if summary.get('run') == 'resume' else ''
+    print(f"\n[Done] {summary['product_name']} ({summary['elapsed_sec']}초){resumed}")
+    return False
+
+async def arun_batch(graph, products: List[dict], in_flight: int, f, fresh: bool = False) -> int:
+    """모든 상품을 하나의 이벤트 루프에서 최대 in_flight개씩 동시에 처리하고, 실패한 상품 수를 반환합니다."""
+    semaphore = asyncio.Semaphore(max(1, in_flight))
+    tasks = [asyncio.create_task(arun_product(graph, product, semaphore, fresh)) for product in products]
+    failed = 0
+    for task in asyncio.as_completed(tasks):
+        failed += write_summary(f, await task)
+    return failed
+
+def main():
+    parser = argparse.ArgumentParser(description='매니페스트의 상품들을 배치로 처리합니다.')
+    parser.add_argument('manifest', help='상품 목록 JSON 파일')
+    parser.add_argument('--workers', type=int, default=config.getint('batch', 'max_workers', fallback=2))
+    parser.add_argument('--async', dest='use_async', action='store_true', help='하나의 이벤트 루프에서 graph.ainvoke로 처리')
+    parser.add_argument('--in-flight', type=int, default=config.getint('batch', 'max_in_flight', fallback=16))
+    parser.add_argument('--fresh', action='store_true', help='체크포인트를 무시하고 모든 상품을 처음부터 실행')
+    args = parser.parse_args()
+
+    products = load_manifest(args.manifest)
+    concurrency = args.in_flight if args.use_async else args.workers
+    print(f'상품 {len(products)}개를 최대 {concurrency}개씩 동시에 처리합니다.' + (' (async)' if args.use_async else ''))
+
+    from graph.builder import build_graph
+    from utils.checkpoint import checkpointer
+    graph = build_graph(interactive=False, checkpointer=checkpointer())
+
+    os.makedirs('output', exist_ok=True)
+    summary_path = os.path.join('output', f'batch_summary_{datetime.now().strftime("%Y_%m_%d_%H-%M-%S")}.jsonl')
+
+    failed = 0
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        if args.use_async:
+            failed = asyncio.run(arun_batch(graph, products, args.in_flight, f, args.fresh))
+        else:
+            with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+                futures = [executor.submit(run_product, graph, product, args.fresh) for product in products]
+                for future in as_completed(futures):
+                    failed += write_summary(f, future.result())
+
+    print(f'\n배치 완료: 성공 {len(products) - failed}개, 실패 {failed}개. 요약: {summary_path}')
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
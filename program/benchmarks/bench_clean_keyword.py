@@ -0,0 +1,82 @@
+"""
+clean_keyword_column 마이크로 벤치마크.
+
+test_data/*의 CSV에서 키워드를 모아 대소문자/공백/허용되지 않는 문자 변형을 섞은 합성 데이터(기본 100k행)를 만들고,
+기존 행 단위 apply 구현과 벡터화된 구현의 소요 시간을 비교합니다.
+
+실행 (program 디렉토리에서):
+    python benchmarks/bench_clean_keyword.py --rows 100000 --repeat 5
+"""
+import os, re, sys, glob, time, argparse
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from utils.preprocess_func import clean_keyword_column
+
+TEST_DATA_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'test_data')
+KEYWORD_COLUMNS = ['keywords', 'phrase', 'keyword phrase']
+
+def legacy_clean_keyword_column(df: pd.DataFrame) -> pd.DataFrame:
+    """변경 전 구현 (비교용)"""
+    df_copy = df.copy()
+    valid_mask = df_copy['keyword'].apply(lambda x: bool(re.fullmatch(r"[A-Za-z0-9 &'().-]+", str(x))))
+    df_copy = df_copy[valid_mask].copy()
+    df_copy.drop_duplicates(subset=['keyword'], inplace=True)
+    df_copy.reset_index(drop=True, inplace=True)
+    return df_copy
+
+def load_test_keywords() -> list[str]:
+    keywords = []
+    for path in glob.glob(os.path.join(TEST_DATA_DIR, '*', '*.csv')):
+        try:
+            df = pd.read_csv(path)
+        except Exception:
+            continue
+        col = next((c for c in df.columns if c.lower() in KEYWORD_COLUMNS), None)
+        if col:
+            keywords.extend(df[col].dropna().astype(str).tolist())
+    return keywords
+
+def make_synthetic(keywords: list[str], rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    base = pd.Series(rng.choice(keywords, size=rows), dtype=object)
+    variant = rng.integers(0, 6, size=rows)
+
+    base[variant == 1] = base[variant == 1].str.title()
+    base[variant == 2] = base[variant == 2] + '  '
+    base[variant == 3] = base[variant == 3].str.replace(' ', '  ', n=1)
+    base[variant == 4] = base[variant == 4] + ' é'
+    base[rng.random(rows) < 0.01] = None
+
+    return pd.DataFrame({'keyword': base, 'search_volume': rng.integers(0, 10000, size=rows)})
+
+def best_of(func, df: pd.DataFrame, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(df)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    keywords = load_test_keywords()
+    df = make_synthetic(keywords, args.rows)
+    print(f'test_data 키워드 {len(keywords)}개로 합성 데이터 {len(df)}행 생성')
+
+    legacy_time = best_of(legacy_clean_keyword_column, df, args.repeat)
+    new_time = best_of(clean_keyword_column, df, args.repeat)
+
+    _, report = clean_keyword_column(df)
+    print(f'legacy (apply + re.fullmatch): {legacy_time * 1000:8.1f} ms -> {len(legacy_clean_keyword_column(df))}행')
+    print(f'vectorized (str.fullmatch):    {new_time * 1000:8.1f} ms -> {report["kept"]}행')
+    print(f'speedup: {legacy_time / new_time:.1f}x')
+    print(f'report: {report}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,363 @@
+"""
+리스팅 파이프라인 오프라인 벤치마크.
+
+ChatOpenAI 대신 benchmarks/fake_llm.py의 FakeChatModel을 넣어 program의 build_graph()와 app의
+build_initial_graph() + build_feedback_graph()를 API 키 없이 처음부터 끝까지 실행합니다.
+네트워크 지연을 빼고 파이프라인 자체 비용(pandas 처리, 프롬프트 렌더링, 체크포인트 직렬화, 그래프 디스패치)만 잽니다.
+
+- 노드별 CPU 시간(process_time)과 경과 시간, 메모리 peak(tracemalloc으로 한 번 더 실행해 측정)
+- (graph) 행: 전체에서 노드 합계를 뺀 값 (그래프 디스패치와 체크포인트 저장)
+- test_data/* 상품별 결과와, 키워드 수(기본 10 ~ 100k)에 따른 스케일링 곡선
+- 전체 결과는 output/bench_pipeline_<시각>.json에 저장합니다.
+
+program과 app은 같은 모듈 이름(utils, models, graph 등)을 쓰므로 (트리, 입력)마다 별도 프로세스에서 실행합니다.
+노드별 CPU 시간을 나눠 재기 위해 그래프는 max_concurrency=1로 노드를 하나씩 실행합니다.
+LLM 캐시, PDF 요약 저장소, 로컬 연관성 분류기, 측정/트레이싱 기록은 끄고, 체크포인트는 임시 디렉토리에 씁니다.
+app 노드는 화면을 직접 그리지 않고 진행 이벤트만 보내므로 Streamlit 없이 invoke로 실행합니다. (invoke에서는 진행 이벤트가 버려집니다.
+stream은 이벤트 대기에 실행 슬롯을 쓰므로 max_concurrency=1로 노드를 하나씩 실행할 수 없습니다)
+program 그래프는 피드백 한 번(세 항목 모두 재생성) 후 /finish로 끝나도록 사용자 입력을 대신 넣습니다.
+
+실행 (program 디렉토리에서):
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --tree program --sizes 10 1000 100000 --latency 0.05
+    python benchmarks/bench_pipeline.py --no-products --sizes 100 10000 --no-checkpoint
+"""
+import os, sys, glob, json, time, argparse, builtins, resource, tempfile, subprocess, tracemalloc
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime
+from functools import wraps
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.join(BENCH_DIR, '..', '..')
+TEST_DATA_DIR = os.path.join(REPO_DIR, 'test_data')
+TREES = ('program', 'app')
+DEFAULT_SIZES = [10, 100, 1_000, 10_000, 100_000]
+
+# 스케일링 실행에 쓰는 상품 정보 (PDF가 있어 information_refine, listing_verificate까지 실행됩니다)
+SCALING_PRODUCT = 'chicken shredder'
+USER_FEEDBACK = '제목은 더 짧게, BP는 소재를 언급하고, 설명은 더 친근하게 써 주세요'
+
+def offline_config(workdir: str, checkpoint: bool) -> dict:
+    """워커가 config.ini 위에 덮어쓰는 설정"""
+    return {
+        'llm_cache': {'enabled': 'false'},
+        'summary_store': {'enabled': 'false'},
+        'relevance_model': {'enabled': 'false'},
+        'instrumentation': {'enabled': 'false'},
+        'tracing': {'enabled': 'false'},
+        'checkpoint': {'enabled': str(checkpoint).lower(), 'path': os.path.join(workdir, 'checkpoints.sqlite')},
+    }
+
+# ====================================================================================================
+# 입력 데이터
+def load_test_keywords() -> list[str]:
+    from utils.csv_extract import read_keyword_csv
+
+    keywords = []
+    for path in sorted(glob.glob(os.path.join(TEST_DATA_DIR, '*', '*.csv'))):
+        df = read_keyword_csv(open(path, 'rb').read())
+        if df is not None:
+            keywords.extend(df['keyword'].dropna().astype(str).tolist())
+    return list(dict.fromkeys(keywords))
+
+def make_synthetic(keywords: list[str], rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    test_data 키워드에 다른 키워드의 단어를 붙여 서로 다른 키워드 rows개를 만듭니다.
+    (같은 키워드를 뽑으면 정제 단계에서 중복으로 제거되어 뒤 노드의 입력 크기가 늘지 않습니다)
+    """
+    rng = np.random.default_rng(seed)
+    words = sorted({word for keyword in keywords for word in keyword.split()})
+    result = list(dict.fromkeys(keywords[:rows]))
+    seen = set(result)
+    while len(result) < rows:
+        base = rng.choice(keywords, size=rows)
+        extra = rng.choice(words, size=rows)
+        for keyword in (f'{b} {e}' for b, e in zip(base, extra)):
+            if keyword not in seen:
+                seen.add(keyword)
+                result.append(keyword)
+                if len(result) == rows:
+                    break
+
+    return pd.DataFrame({
+        'keyword': pd.array(result, dtype=pd.StringDtype('pyarrow')),
+        'search_volume': pd.array(rng.integers(0, 10000, size=rows), dtype=pd.Int64Dtype()),
+        'competing_products': pd.array(rng.integers(0, 5000, size=rows), dtype=pd.Int64Dtype()),
+    })
+
+def load_product(name: str, rows: int = None) -> dict:
+    """test_data/<name>의 CSV/PDF로 그래프 입력을 만듭니다. rows를 주면 키워드는 합성 데이터 rows개를 씁니다."""
+    from utils.csv_extract import read_keyword_csv
+    from utils.pdf_extract import extract_pdfs, pages_to_documents
+    from schemas.keyword_table import KeywordTable
+
+    product_dir = os.path.join(TEST_DATA_DIR, name)
+    if rows is None:
+        dfs = [read_keyword_csv(open(path, 'rb').read()) for path in sorted(glob.glob(os.path.join(product_dir, '*.csv')))]
+        dfs = [df for df in dfs if df is not None]
+        if not dfs:
+            return None
+        df = pd.concat(dfs, ignore_index=True)
+    else:
+        df = make_synthetic(load_test_keywords(), rows)
+
+    pdfs = [(path, open(path, 'rb').read()) for path in sorted(glob.glob(os.path.join(product_dir, '*.pdf')))]
+    product_docs, product_information = [], []
+    for (path, _), pages in zip(pdfs, extract_pdfs(pdfs)):
+        if not isinstance(pages, Exception):
+            docs, text = pages_to_documents(path, pages)
+            product_docs.extend(docs)
+            product_information.append(text)
+
+    return {
+        'product_name': name,
+        'category': '',
+        'data': KeywordTable.from_pandas(df),
+        'product_docs': product_docs or None,
+        'product_information': product_information or 'Product information not found',
+    }
+
+# ====================================================================================================
+# 노드 측정
+class NodeProfiler:
+    """그래프 빌더의 instrument_node 자리에 넣어 노드마다 CPU 시간, 경과 시간, (켜져 있으면) tracemalloc peak를 잽니다."""
+
+    def __init__(self):
+        self.rows = []
+        self.trace_memory = False
+
+    @contextmanager
+    def measure(self, name: str):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        cpu, wall = time.process_time(), time.perf_counter()
+        try:
+            yield
+        finally:
+            row = {'node': name, 'cpu_sec': time.process_time() - cpu, 'wall_sec': time.perf_counter() - wall}
+            if self.trace_memory:
+                row['peak_mb'] = (tracemalloc.get_traced_memory()[1] - base) / 1e6
+            self.rows.append(row)
+
+    def wrap(self, func):
+        from langgraph.config import get_config
+
+        def node_name() -> str:
+            try:
+                return get_config()['metadata']['langgraph_node']
+            except (RuntimeError, KeyError):
+                return func.__name__
+
+        afunc = getattr(func, 'afunc', None)
+
+        @wraps(func)
+        def node(*args, **kwargs):
+            with self.measure(node_name()):
+                return func(*args, **kwargs)
+
+        if afunc is not None:
+            @wraps(afunc)
+            async def anode(*args, **kwargs):
+                with self.measure(node_name()):
+                    return await afunc(*args, **kwargs)
+            node.afunc = anode
+        return node
+
+    def totals(self) -> dict:
+        """노드별(처음 실행된 순서) 합계"""
+        totals = {}
+        for row in self.rows:
+            total = totals.setdefault(row['node'], {'runs': 0, 'cpu_sec': 0.0, 'wall_sec': 0.0, 'peak_mb': 0.0})
+            total['runs'] += 1
+            total['cpu_sec'] += row['cpu_sec']
+            total['wall_sec'] += row['wall_sec']
+            total['peak_mb'] = max(total['peak_mb'], row.get('peak_mb', 0.0))
+        return totals
+
+# ====================================================================================================
+# 워커 (트리 하나, 입력 하나)
+def build_runner(tree: str, profiler: NodeProfiler):
+    """트리의 그래프를 만들고, 입력 하나를 끝까지 실행하는 함수를 돌려줍니다."""
+    from utils.checkpoint import checkpointer, run_config, DURABILITY
+
+    def config(i: int) -> dict:
+        # 노드를 하나씩 실행해 노드별 CPU 시간이 섞이지 않게 합니다.
+        return {**run_config(f'bench-{i}'), 'max_concurrency': 1}
+
+    if tree == 'program':
+        import graph.builder
+        graph.builder.instrument_node = profiler.wrap
+        graph_ = graph.builder.build_graph(checkpointer=checkpointer())
+
+        def run(inputs: dict, i: int) -> dict:
+            answers = iter([USER_FEEDBACK, '/finish'])
+            original_input, builtins.input = builtins.input, lambda prompt='': next(answers)
+            try:
+                return graph_.invoke(inputs, config(i), durability=DURABILITY)
+            finally:
+                builtins.input = original_input
+        return run
+
+    import graph.builder_st
+    graph.builder_st.instrument_node = profiler.wrap
+    initial_graph = graph.builder_st.build_initial_graph(checkpointer=checkpointer())
+    feedback_graph = graph.builder_st.build_feedback_graph()
+
+    def run(inputs: dict, i: int) -> dict:
+        result = initial_graph.invoke(inputs, config(i), durability=DURABILITY)
+        return feedback_graph.invoke({**result, 'user_feedback': USER_FEEDBACK}, {'max_concurrency': 1})
+    return run
+
+def measure_run(run, inputs: dict, i: int, profiler: NodeProfiler) -> dict:
+    profiler.rows = []
+    cpu, wall = time.process_time(), time.perf_counter()
+    result = run(inputs, i)
+    return {
+        'cpu_sec': time.process_time() - cpu,
+        'wall_sec': time.perf_counter() - wall,
+        'nodes': profiler.totals(),
+        'outputs': {
+            'title_chars': len(result.get('title') or ''),
+            'bp_items': len(result.get('bp') or []),
+            'description_chars': len(result.get('description') or ''),
+        },
+    }
+
+def worker(spec: dict) -> dict:
+    tree_dir = os.path.abspath(os.path.join(REPO_DIR, spec['tree']))
+    sys.path.insert(0, tree_dir)
+    sys.path.insert(0, BENCH_DIR)
+    workdir = tempfile.mkdtemp(prefix='bench_pipeline_')
+    os.chdir(workdir)
+
+    from utils.config_loader import config
+    config.read_dict(offline_config(workdir, spec['checkpoint']))
+
+    # 노드 모듈이 chat_model을 불러오기 전에 가짜 LLM으로 바꿉니다.
+    import utils.runtime
+    from fake_llm import fake_chat_model_factory
+    utils.runtime.chat_model = fake_chat_model_factory(spec['latency'])
+
+    profiler = NodeProfiler()
+    with redirect_stdout(open(os.devnull, 'w')):
+        run = build_runner(spec['tree'], profiler)
+        inputs = load_product(spec['product'], spec.get('rows'))
+        if inputs is None:
+            return {**spec, 'error': '형식에 맞는 CSV 파일이 없습니다.'}
+
+        # 워밍업: tiktoken 인코딩 로딩 등 처음 한 번만 드는 비용을 측정에서 뺍니다.
+        run(load_product(SCALING_PRODUCT, 10), 0)
+
+        timing = measure_run(run, inputs, 1, profiler)
+        tracemalloc.start()
+        profiler.trace_memory = True
+        memory = measure_run(run, inputs, 2, profiler)
+        tracemalloc.stop()
+
+    for name, node in timing['nodes'].items():
+        node['peak_mb'] = memory['nodes'].get(name, {}).get('peak_mb', 0.0)
+    return {
+        **spec,
+        'keywords': len(inputs['data']),
+        'cpu_sec': timing['cpu_sec'],
+        'wall_sec': timing['wall_sec'],
+        'nodes': timing['nodes'],
+        'outputs': timing['outputs'],
+        'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+# ====================================================================================================
+# 실행/보고
+def run_worker(spec: dict) -> dict:
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--worker', json.dumps(spec)],
+        capture_output=True, text=True, env={**os.environ, 'OPENAI_API_KEY': os.environ.get('OPENAI_API_KEY', 'offline')}
+    )
+    if proc.returncode != 0:
+        return {**spec, 'error': proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f'exit {proc.returncode}'}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def format_table(header: tuple, lines: list) -> str:
+    widths = [max(len(str(line[i])) for line in [header] + lines) for i in range(len(header))]
+
+    def fmt(line) -> str:
+        return '  '.join(str(v).ljust(w) if i == 0 else str(v).rjust(w) for i, (v, w) in enumerate(zip(line, widths)))
+
+    return '\n'.join([fmt(header), '-' * len(fmt(header))] + [fmt(line) for line in lines])
+
+def node_table(result: dict) -> str:
+    lines = [
+        (name, node['runs'], f"{node['cpu_sec'] * 1000:.1f}", f"{node['wall_sec'] * 1000:.1f}", f"{node['peak_mb']:.1f}")
+        for name, node in result['nodes'].items()
+    ]
+    graph_cpu = result['cpu_sec'] - sum(node['cpu_sec'] for node in result['nodes'].values())
+    graph_wall = result['wall_sec'] - sum(node['wall_sec'] for node in result['nodes'].values())
+    lines.append(('(graph)', '', f'{graph_cpu * 1000:.1f}', f'{graph_wall * 1000:.1f}', ''))
+    lines.append(('TOTAL', '', f"{result['cpu_sec'] * 1000:.1f}", f"{result['wall_sec'] * 1000:.1f}", f"{result['max_rss_mb']:.0f} (rss)"))
+    return format_table(('node', 'runs', 'cpu(ms)', 'wall(ms)', 'peak(MB)'), lines)
+
+def scaling_table(results: list) -> str:
+    # 키워드 수에 따라 가장 크게 늘어나는 노드 3개를 함께 보여줍니다.
+    largest = results[-1]['nodes']
+    top = sorted(largest, key=lambda name: -largest[name]['cpu_sec'])[:3]
+    lines = [
+        (result['rows'], f"{result['cpu_sec'] * 1000:.0f}", f"{result['wall_sec'] * 1000:.0f}",
+         f"{max(node['peak_mb'] for node in result['nodes'].values()):.1f}", f"{result['max_rss_mb']:.0f}",
+         *(f"{result['nodes'].get(name, {}).get('cpu_sec', 0) * 1000:.0f}" for name in top))
+        for result in results
+    ]
+    return format_table(('keywords', 'cpu(ms)', 'wall(ms)', 'peak(MB)', 'rss(MB)', *(f'{name}(ms)' for name in top)), lines)
+
+def main():
+    parser = argparse.ArgumentParser(description='가짜 LLM으로 리스팅 파이프라인의 노드별 CPU 시간/메모리와 스케일링을 잽니다.')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    parser.add_argument('--tree', choices=TREES, nargs='+', default=list(TREES))
+    parser.add_argument('--sizes', type=int, nargs='*', default=DEFAULT_SIZES, help='스케일링 곡선의 키워드 수')
+    parser.add_argument('--no-products', action='store_true', help='test_data 상품별 실행을 건너뜀')
+    parser.add_argument('--latency', type=float, default=0.0, help='가짜 LLM 호출마다 기다릴 시간(초)')
+    parser.add_argument('--no-checkpoint', action='store_true', help='체크포인트 저장 없이 실행')
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(worker(json.loads(args.worker)), ensure_ascii=False))
+        return
+
+    base = {'latency': args.latency, 'checkpoint': not args.no_checkpoint}
+    products = [] if args.no_products else sorted(
+        name for name in os.listdir(TEST_DATA_DIR) if os.path.isdir(os.path.join(TEST_DATA_DIR, name))
+    )
+    report = {'started_at': datetime.now().isoformat(timespec='seconds'), **base, 'products': [], 'scaling': []}
+
+    for tree in args.tree:
+        for product in products:
+            result = run_worker({**base, 'tree': tree, 'product': product})
+            report['products'].append(result)
+            print(f'\n=== [{tree}] {product} ===')
+            print(f"[Error] {result['error']}" if 'error' in result else f"키워드 {result['keywords']}개\n{node_table(result)}")
+
+        scaling = []
+        for rows in args.sizes:
+            result = run_worker({**base, 'tree': tree, 'product': SCALING_PRODUCT, 'rows': rows})
+            report['scaling'].append(result)
+            if 'error' in result:
+                print(f"\n[Error] [{tree}] 키워드 {rows}개: {result['error']}")
+            else:
+                scaling.append(result)
+                print(f"\n[{tree}] 키워드 {rows}개: cpu {result['cpu_sec'] * 1000:.0f}ms, wall {result['wall_sec'] * 1000:.0f}ms")
+        if scaling:
+            print(f'\n=== [{tree}] 키워드 수에 따른 스케일링 ({SCALING_PRODUCT} 상품 정보) ===')
+            print(scaling_table(scaling))
+            print(f'\n[{tree}] 키워드 {scaling[-1]["rows"]}개 노드별:')
+            print(node_table(scaling[-1]))
+
+    os.makedirs('output', exist_ok=True)
+    report_path = os.path.join('output', f'bench_pipeline_{datetime.now().strftime("%Y_%m_%d_%H-%M-%S")}.json')
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f'\n결과: {report_path}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+CLI 시작 시간(import 시간) 회귀 검사.
+
+`python -X importtime -c "import main"`을 여러 번 실행해 main 모듈의 누적 import 시간 중앙값이 예산 안인지,
+첫 입력 전에 무거운 라이브러리(LLM 클라이언트, pandas, scikit-learn 등)를 불러오지 않는지 확인합니다.
+예산을 넘거나 금지된 모듈이 import되면 종료 코드 1로 끝납니다.
+
+실행 (program 디렉토리에서):
+    python benchmarks/check_startup_time.py --budget-ms 300 --repeat 5
+"""
+import os, re, sys, argparse, subprocess, statistics
+
+PROGRAM_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# 첫 프롬프트 전에 불러오면 안 되는 모듈 (노드나 그래프가 처음 쓰일 때 불러와야 합니다)
+HEAVY_MODULES = [
+    'langchain_openai', 'openai', 'langgraph', 'langchain', 'pandas', 'pyarrow', 'sklearn', 'streamlit',
+    'tiktoken', 'pypdf', 'graph.builder', 'models.node_preprocess', 'utils.data_loader',
+]
+IMPORTTIME_PATTERN = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)')
+
+def measure_once() -> tuple[float, set]:
+    """main import 한 번의 (누적 시간 ms, import된 모듈 이름 집합)을 반환합니다."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import main'],
+        cwd=PROGRAM_DIR, capture_output=True, text=True, check=True
+    )
+
+    cumulative_us, modules = None, set()
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_PATTERN.match(line)
+        if not match:
+            continue
+        modules.add(match.group(4))
+        if match.group(4) == 'main' and not match.group(3):
+            cumulative_us = int(match.group(2))
+
+    if cumulative_us is None:
+        raise RuntimeError('importtime 출력에서 main 모듈을 찾지 못했습니다.')
+    return cumulative_us / 1000, modules
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--budget-ms', type=float, default=300, help='main import 누적 시간 예산 (ms)')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    timings, imported = [], set()
+    for _ in range(args.repeat):
+        elapsed, modules = measure_once()
+        timings.append(elapsed)
+        imported |= modules
+
+    median = statistics.median(timings)
+    print(f'main import: median {median:.1f}ms, min {min(timings):.1f}ms, max {max(timings):.1f}ms (budget {args.budget_ms:.0f}ms)')
+
+    heavy = sorted(name for name in HEAVY_MODULES if name in imported)
+    failed = False
+    if heavy:
+        print(f'[FAIL] 첫 입력 전에 무거운 모듈을 불러옵니다: {", ".join(heavy)}')
+        failed = True
+    if median > args.budget_ms:
+        print(f'[FAIL] 시작 시간이 예산을 넘었습니다: {median:.1f}ms > {args.budget_ms:.0f}ms')
+        failed = True
+
+    if failed:
+        sys.exit(1)
+    print('[OK] 시작 시간 예산 안입니다.')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+"""
+오프라인 벤치마크용 가짜 LLM.
+
+ChatOpenAI 대신 그래프에 넣어 API 키와 네트워크 없이 파이프라인을 끝까지 실행합니다.
+프롬프트 내용(노드별 프롬프트의 고정 문구)과 with_structured_output 스키마를 보고 노드가 기대하는 형식의 응답을
+만들며, 같은 프롬프트에는 항상 같은 응답을 돌려줍니다. latency를 주면 호출마다 그만큼 기다립니다. (CPU는 쓰지 않음)
+streaming=True로 만든 모델(chat_model(..., streaming=True))은 응답을 조각으로 나눠 on_llm_new_token으로 흘려보냅니다.
+
+program과 app 어느 쪽의 utils.runtime.chat_model 자리에도 넣을 수 있도록 두 트리의 모듈을 import하지 않습니다.
+"""
+import ast, csv, json, time, asyncio, zlib
+from functools import lru_cache
+from typing import Any, Iterator, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel, generate_from_stream
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+
+# 스트리밍 응답 조각의 글자 수 (대략 OpenAI 토큰 하나)
+CHUNK_CHARS = 4
+
+# 연관성 분류 응답의 카테고리 비율 (crc32 % 100 기준): Direct 40%, Related 30%, Indirect 20%, NotRelated 10%
+RELEVANCE_BUCKETS = ((40, 'Direct'), (70, 'Related'), (90, 'Indirect'), (100, 'NotRelated'))
+
+FILLER = (
+    'Built from durable food-grade materials with an ergonomic grip, this tool handles everyday kitchen prep quickly '
+    'and cleans up in seconds, making it a practical gift for home cooks, busy parents and anyone who meal preps. '
+)
+
+def _crc(text: str) -> int:
+    return zlib.crc32(text.encode('utf-8'))
+
+def _text(messages: List[BaseMessage]) -> str:
+    return '\n'.join(str(message.content) for message in messages)
+
+def _fill(prefix: str, length: int) -> str:
+    text = prefix
+    while len(text) < length:
+        text += FILLER
+    return text[:length].rstrip()
+
+def _section(text: str, start: str, end: Optional[str] = None) -> str:
+    """start 다음부터 end 전까지(없으면 끝까지)의 문자열"""
+    body = text.split(start, 1)[1]
+    return body.split(end, 1)[0] if end and end in body else body
+
+def _table_keywords(text: str) -> List[str]:
+    """utils.prompt_budget.render_table 형식(keyword,... 헤더 + CSV 줄)의 표에서 keyword 열을 꺼냅니다."""
+    lines = text.splitlines()
+    start = next((i for i, line in enumerate(lines) if line.startswith('keyword,') or line == 'keyword'), None)
+    if start is None:
+        return []
+    rows = []
+    for line in lines[start + 1:]:
+        if not line.strip():
+            break
+        rows.append(line)
+    return [row[0] for row in csv.reader(rows) if row]
+
+# ====================================================================================================
+# 노드별 응답
+def relevance_response(text: str) -> str:
+    keywords = json.loads(text.strip().splitlines()[-1])
+    return json.dumps([
+        {'keyword': keyword, 'relevance_category': next(label for bound, label in RELEVANCE_BUCKETS if _crc(keyword) % 100 < bound)}
+        for keyword in keywords
+    ])
+
+def filter_keywords(text: str) -> List[str]:
+    # 애매한 키워드 중 약 10%를 제거합니다.
+    keywords = ast.literal_eval(_section(text, '[데이터]', '[출력]').strip())
+    return [keyword for keyword in keywords if _crc(keyword) % 10]
+
+def select_response(text: str) -> str:
+    count = int(_section(text, 'Please select the top ').split('.', 1)[0])
+    return json.dumps(_table_keywords(text)[:count])
+
+def verification_response(text: str) -> str:
+    # 검증 대상 내용을 그대로 돌려줍니다.
+    return _section(text, '[Content to Verify - ').split('\n', 1)[1].strip()
+
+def summary_response(text: str) -> str:
+    words = ' '.join(text.split()).split(' ')
+    return 'Summary: ' + ' '.join(words[-120:])
+
+def keyword_distribute_response(text: str) -> dict:
+    keywords = _table_keywords(text)
+    parts = {'title_keyword': [], 'bp_keyword': [], 'description_keyword': [], 'leftover': []}
+    for i, keyword in enumerate(keywords):
+        slot = i % 10
+        key = 'title_keyword' if slot < 3 else 'bp_keyword' if slot < 6 else 'description_keyword' if slot < 9 else 'leftover'
+        parts[key].append(keyword)
+    return parts
+
+def title_response(text: str) -> dict:
+    return {'title': _fill(f'Listing {_crc(text):08x} - ', 180)}
+
+def bp_response(text: str) -> dict:
+    seed = _crc(text)
+    return {'bp': [_fill(f'POINT {i + 1} ({seed:08x}): ', 150 + (seed >> i) % 90) for i in range(5)]}
+
+def description_response(text: str) -> dict:
+    return {'description': _fill(f'Description {_crc(text):08x}. ', 1500)}
+
+def feedback_response(text: str) -> dict:
+    # 피드백 재생성 노드가 모두 실행되도록 세 항목에 모두 수정사항을 넣습니다.
+    return {'title': 'Make the title shorter', 'bp': 'Mention the materials', 'description': 'Use a friendlier tone'}
+
+STRUCTURED_RESPONSES = {
+    'KeywordDistribute': keyword_distribute_response,
+    'TitleOutput': title_response,
+    'BPOutput': bp_response,
+    'DescriptionOutput': description_response,
+    'Feedback': feedback_response,
+    'FilteredKeywords': lambda text: {'keywords': filter_keywords(text)},
+}
+
+def respond(text: str, schema: Optional[str] = None) -> str:
+    """프롬프트 문자열(과 구조화 출력 스키마 이름)에 대한 응답 본문"""
+    if schema is not None:
+        if schema not in STRUCTURED_RESPONSES:
+            raise ValueError(f'가짜 LLM이 지원하지 않는 스키마입니다: {schema}')
+        return json.dumps(STRUCTURED_RESPONSES[schema](text), ensure_ascii=False)
+
+    if '[Content to Verify - ' in text:
+        return verification_response(text)
+    if 'Please classify the following keywords' in text:
+        return relevance_response(text)
+    if 'Please select the top ' in text:
+        return select_response(text)
+    if '[데이터]' in text:
+        return '```json\n' + json.dumps({'keywords': filter_keywords(text)}, ensure_ascii=False) + '\n```'
+    if 'Product Text:' in text or 'Partial Summaries:' in text:
+        return summary_response(text)
+    raise ValueError('가짜 LLM이 알 수 없는 프롬프트입니다: ' + text[:80])
+
+# ====================================================================================================
+# 채팅 모델
+class FakeChatModel(BaseChatModel):
+    """
+    ChatOpenAI 대신 쓰는 결정적 채팅 모델. 응답마다 llm_output에 token_usage(글자 수 / 4로 추정)와 model_name을 넣어
+    사용량 콜백이 실제 응답과 같은 경로를 타게 합니다.
+    """
+
+    model: str = 'fake-llm'
+    latency: float = 0.0
+    streaming: bool = False
+
+    @property
+    def _llm_type(self) -> str:
+        return 'fake-listing-llm'
+
+    def _response(self, messages: List[BaseMessage], response_schema: Optional[str]):
+        prompt = _text(messages)
+        content = respond(prompt, response_schema)
+        usage = {'prompt_tokens': len(prompt) // 4, 'completion_tokens': len(content) // 4}
+        usage['total_tokens'] = usage['prompt_tokens'] + usage['completion_tokens']
+        return content, {'token_usage': usage, 'model_name': self.model}
+
+    def _result(self, messages: List[BaseMessage], response_schema: Optional[str]) -> ChatResult:
+        content, llm_output = self._response(messages, response_schema)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))], llm_output=llm_output)
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, response_schema: Optional[str] = None, **kwargs: Any) -> ChatResult:
+        if self.streaming:
+            return generate_from_stream(self._stream(messages, stop, run_manager, response_schema=response_schema, **kwargs))
+        if self.latency:
+            time.sleep(self.latency)
+        return self._result(messages, response_schema)
+
+    def _stream(self, messages: List[BaseMessage], stop=None, run_manager=None, response_schema: Optional[str] = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        # ChatOpenAI 스트리밍처럼 마지막 빈 조각의 generation_info에 사용량과 모델 이름을 싣습니다.
+        if self.latency:
+            time.sleep(self.latency)
+        content, llm_output = self._response(messages, response_schema)
+        for i in range(0, len(content), CHUNK_CHARS):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=content[i:i + CHUNK_CHARS]))
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+        yield ChatGenerationChunk(message=AIMessageChunk(content=''), generation_info=llm_output)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop=None, run_manager=None, response_schema: Optional[str] = None, **kwargs: Any) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._result(messages, response_schema)
+
+    def with_structured_output(self, schema, **kwargs: Any):
+        # 응답 JSON을 스키마로 검증하므로, 실제 구조화 출력처럼 Pydantic 검증 비용이 측정에 들어갑니다.
+        return self.bind(response_schema=schema.__name__) | RunnableLambda(lambda message: schema.model_validate_json(message.content))
+
+def fake_chat_model_factory(latency: float = 0.0):
+    """utils.runtime.chat_model과 같은 인자를 받아 FakeChatModel을 돌려주는 함수. 같은 설정이면 같은 인스턴스를 재사용합니다."""
+
+    @lru_cache(maxsize=None)
+    def chat_model(model: str, temperature: float = 0, node: str = None, priority: int = None, **kwargs):
+        return FakeChatModel(model=model, latency=latency, streaming=kwargs.get('streaming', False))
+    return chat_model
@@ -1,36 +1,62 @@
 from dotenv import load_dotenv
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import START, END, StateGraph
 from schemas.global_state import State
-from models.node_preprocess import preprocess_data, relevance_categorize, select_keywords, information_refine
-from models.node_listing import generate_listing, keyword_distribute, listing_verificate
-from models.node_feedback import user_input, parse_user_feedback, feedback_check
-from models.node_regenerate import regenerate_title, regenerate_bp, regenerate_description
 
 from graph.router import status_router, feedback_router, no_pdf_router
+from utils.instrumentation import instrument_node
 
 load_dotenv()
 
-def build_graph():
+def _node(func):
+    """
+    모든 노드는 instrument_node로 감싸 소요 시간과 LLM 사용량을 기록합니다.
+    node_pair로 만든 노드 함수는 비동기 버전(afunc)과 묶어, 그래프를 invoke하면 동기로, ainvoke하면 비동기로 실행되게 합니다.
+    비동기 버전이 없는 노드(사용자 입력 등)는 그대로 두며, ainvoke에서는 스레드에서 실행됩니다.
+    """
+    func = instrument_node(func)
+    afunc = getattr(func, 'afunc', None)
+    return RunnableLambda(func, afunc=afunc, name=func.__name__) if afunc else func
+
+def build_graph(interactive: bool = True, checkpointer=None):
+    """
+    interactive=False(배치 모드)이면 사용자 피드백 단계 대신 최종 결과물을 바로 저장하고 종료합니다.
+    checkpointer(utils.checkpoint.checkpointer())를 주면 노드가 끝날 때마다 상태를 저장해, 중단된 실행을 이어서 할 수 있습니다.
+    """
+    # 노드 모듈은 pandas, langchain 등 무거운 라이브러리를 불러오므로 그래프를 만들 때 가져옵니다.
+    from models.node_preprocess import preprocess_data, relevance_categorize, select_keywords, information_refine
+    from models.node_listing import keyword_distribute, generate_title_node, generate_bp_description_node, generate_listing, listing_verificate
+    from models.node_feedback import user_input, auto_finish, parse_user_feedback, feedback_check
+    from models.node_regenerate import regenerate_title, regenerate_bp, regenerate_description
+
     builder = StateGraph(State)
     
     # 키워드 분배
-    builder.add_sequence([preprocess_data, relevance_categorize, select_keywords])
-    builder.add_node('information_refine', information_refine)
+    builder.add_sequence([(node.__name__, _node(node)) for node in (preprocess_data, relevance_categorize, select_keywords)])
+    builder.add_node('information_refine', _node(information_refine))
     
     # 초안 작성
     builder.add_edge("select_keywords", "keyword_distribute")
-    builder.add_sequence([keyword_distribute, generate_listing])
-    builder.add_node('listing_verificate', listing_verificate)
+    builder.add_node('keyword_distribute', _node(keyword_distribute))
+    
+    # Title / (BP → Description) 병렬 작성 → 합류
+    builder.add_node('generate_title', _node(generate_title_node))
+    builder.add_node('generate_bp_description', _node(generate_bp_description_node))
+    builder.add_node('generate_listing', _node(generate_listing))
+    builder.add_edge('keyword_distribute', 'generate_title')
+    builder.add_edge('keyword_distribute', 'generate_bp_description')
+    builder.add_edge(['generate_title', 'generate_bp_description'], 'generate_listing')
+    builder.add_node('listing_verificate', _node(listing_verificate))
 
     # 사용자 피드백
-    builder.add_node('user_input', user_input)
-    builder.add_node('parse_user_feedback', parse_user_feedback)
-    builder.add_node('feedback_check', feedback_check)
+    builder.add_node('user_input', _node(user_input if interactive else auto_finish))
+    builder.add_node('parse_user_feedback', _node(parse_user_feedback))
+    builder.add_node('feedback_check', _node(feedback_check))
 
     # 재생성 노드
-    builder.add_node('regenerate_title', regenerate_title)
-    builder.add_node('regenerate_bp', regenerate_bp)
-    builder.add_node('regenerate_description', regenerate_description)
+    builder.add_node('regenerate_title', _node(regenerate_title))
+    builder.add_node('regenerate_bp', _node(regenerate_bp))
+    builder.add_node('regenerate_description', _node(regenerate_description))
     
     # ====================================================================================================
     # 연결
@@ -83,4 +109,4 @@ def build_graph():
     builder.add_edge('regenerate_bp', 'feedback_check')
     builder.add_edge('regenerate_description', 'feedback_check')    
     
-    return builder.compile()
\ No newline at end of file
+    return builder.compile(checkpointer=checkpointer)
\ No newline at end of file
@@ -1,7 +1,5 @@
 import os
 from dotenv import load_dotenv
-from graph.builder import build_graph
-from utils.data_loader import load_keywords_csv, load_information_pdf
 
 load_dotenv()
 
@@ -17,19 +15,49 @@ def main():
     while category in ['/return']:
         product_name = input('\n상품명: ')
         category = input('\n상품의 카테고리를 적어주세요: ')
+
+    # 그래프, 데이터 로더는 무거운 라이브러리를 불러오므로 첫 입력을 받은 뒤에 가져옵니다.
+    from graph.builder import build_graph
+    from utils.data_loader import load_keywords_csv, load_information_pdf
     
     raw_df = load_keywords_csv(product_name)
     product_docs, product_information = load_information_pdf()
 
-    # 그래프 실행
-    graph = build_graph()
-    graph.invoke({
+    inputs = {
         'product_name': product_name,
         'category': category,
         'data': raw_df, 
         'product_docs': product_docs,
         'product_information': product_information
-    })
+    }
+
+    # 그래프 실행
+    # 같은 입력으로 중간에 멈춘 실행이 있으면, 마지막으로 끝난 노드 다음부터 이어서 실행할 수 있습니다.
+    from utils.checkpoint import checkpointer, run_thread_id, run_config, run_status, DURABILITY
+    from utils.instrumentation import instrument_run
+
+    saver = checkpointer()
+    graph = build_graph(checkpointer=saver)
+    thread_id = run_thread_id(inputs)
+    run_cfg = run_config(thread_id)
+
+    graph_input = inputs
+    status, next_nodes = run_status(graph, run_cfg)
+    if status == 'interrupted':
+        answer = input(f"\n같은 입력으로 중단된 실행이 있습니다. ({', '.join(next_nodes)} 단계부터) 이어서 실행할까요? (y/n): ")
+        if answer.strip().lower() in ['y', 'yes', 'ㅇ']:
+            graph_input = None
+    if graph_input is not None and status != 'new':
+        saver.delete_thread(thread_id)
+
+    # 노드별 소요 시간과 LLM 사용량은 output/에 기록하고, 끝나면 요약 표를 출력합니다.
+    with instrument_run(product_name, thread_id=thread_id) as metrics:
+        graph.invoke(graph_input, run_cfg, durability=DURABILITY)
+    if saver is not None:
+        saver.compact_thread(thread_id)
+    if metrics is not None and metrics.jsonl_path:
+        print(f'\n=== 노드별 소요 시간 / LLM 사용량 ({metrics.jsonl_path}) ===')
+        print(metrics.summary_table())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,15 +1,53 @@
 from dotenv import load_dotenv
 from datetime import datetime
-from langchain_openai import ChatOpenAI
 from schemas.global_state import State
 from schemas.schema import Feedback
 from prompts.prompt_feedback import feedback_prompt
 from utils.config_loader import config
+from utils.runtime import chat_model
+from utils.rate_limiter import PRIORITY_INTERACTIVE
+from utils.node_runner import node_pair, LLMCall
 import os, sys
 
 load_dotenv()
 
-llm = ChatOpenAI(model=config['llm_feedback']['model'], temperature=float(config['llm_feedback']['temperature']))
+# LLM은 import 시점이 아니라 노드가 처음 호출할 때 만들어지고, 이후에는 재사용됩니다. (utils.runtime.chat_model)
+# 사용자가 기다리는 대화형 요청이므로 배치 작업보다 먼저 처리합니다.
+def _llm():
+    return chat_model(config['llm_feedback']['model'], float(config['llm_feedback']['temperature']), priority=PRIORITY_INTERACTIVE)
+
+# ====================================================================================================
+# 결과물 저장
+def write_listing(filename: str, title, bp_list, description, leftover) -> str:
+    """리스팅을 output/filename에 저장하고 파일 경로를 반환합니다."""
+    save_dir = 'output'
+    os.makedirs(save_dir, exist_ok=True)
+    file_path = os.path.join(save_dir, filename)
+    
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write(f'\n[Title]\n{title}\n')
+        f.write('\n[Bullet Point]\n')
+        for bp in bp_list:
+            f.write(str(bp) + '\n')
+        f.write(f'\n[Description]\n{description}\n')
+        f.write('\nLeftover Keywords: ' + ', '.join(map(str, leftover)))
+    return file_path
+
+def save_final_listing(state: State) -> str:
+    """현재 리스팅을 최종 결과물 파일로 저장하고 파일 이름을 반환합니다."""
+    filename = f'{"_".join(state.get('product_name').split())}_Keyword_Listing_Final.txt'
+    write_listing(
+        filename, state.get('title'), state.get('bp') or [], state.get('description'),
+        sorted((state.get('leftover') or []) + (state.get('backend_keywords') or []))
+    )
+    return filename
+
+# ====================================================================================================
+# 배치 모드: 사용자 입력 없이 최종 결과물을 저장하고 종료
+def auto_finish(state: State):
+    filename = save_final_listing(state)
+    print(f'\n[{state.get("product_name")}] 최종 결과물을 {filename} 파일에 저장합니다.')
+    return {'user_feedback': '', 'status': 'FINISHED'}
 
 # ====================================================================================================
 # 사용자 피드백 입력
@@ -31,21 +69,8 @@ def user_input(state: State):
         if user_feedback in ['/finish']:
             print('\n작동을 종료합니다.')
             
-            save_dir = 'output'
-            
-            os.makedirs(save_dir, exist_ok=True)
-            filename = f'{"_".join(state.get('product_name').split())}_Keyword_Listing_Final.txt'
-            file_path = os.path.join(save_dir, filename)
-            
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(f'\n[Title]\n{state.get('title')}\n')
-                f.write('\n[Bullet Point]\n')
-                for bp in state.get('bp'):
-                    f.write(str(bp) + '\n')
-                f.write(f'\n[Description]\n{state.get('description')}\n')
-                f.write('\nLeftover Keywords: ' + ', '.join(map(str, sorted(state.get('leftover') + state.get('backend_keywords')))))
-                        
-                print(f'최종 결과물을 {filename} 파일에 저장합니다. ')
+            filename = save_final_listing(state)
+            print(f'최종 결과물을 {filename} 파일에 저장합니다. ')
             
             return {'user_feedback': '', 'status': 'FINISHED'}
         
@@ -56,18 +81,8 @@ def user_input(state: State):
         elif user_feedback in ['/export']:
             now = datetime.now().strftime("%Y_%m_%d_%H-%M-%S")
             
-            save_dir = 'output'
-            os.makedirs(save_dir, exist_ok=True)
             filename = f'{"_".join(state.get('product_name').split())}_Temp_Listing({now}).txt'
-            file_path = os.path.join(save_dir, filename)
-            
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(f'\n[Title]\n{title}\n')
-                f.write('\n[Bullet Point]\n')
-                for bp in bp_list:
-                    f.write(str(bp) + '\n')
-                f.write(f'\n[Description]\n{description}\n')
-                f.write('\nLeftover Keywords: ' + ', '.join(map(str, leftover)))
+            write_listing(filename, title, bp_list, description, leftover)
                         
             print(f'\n현재 초안을 {filename} 파일에 저장합니다. ')
         
@@ -87,16 +102,16 @@ def user_input(state: State):
 
 # ====================================================================================================
 # 피드백 분류
-def parse_user_feedback(state: State):
+def parse_user_feedback_steps(state: State):
     print('\n--- 피드백 내용을 정리합니다... ---')
     
-    structured_llm = llm.with_structured_output(Feedback)
+    structured_llm = _llm().with_structured_output(Feedback)
     prompt = feedback_prompt.invoke(
         {
             'user_feedback': state['user_feedback'],
         }
     )
-    res = structured_llm.invoke(prompt)
+    res = yield LLMCall(structured_llm, prompt)
     
     feedback_title = res.title or ''
     
@@ -123,6 +138,8 @@ def parse_user_feedback(state: State):
         'user_feedback_bp': feedback_bp,
         'user_feedback_description': feedback_description
     }     
+
+parse_user_feedback, aparse_user_feedback = node_pair(parse_user_feedback_steps)
     
 # ====================================================================================================
 # 피드백 라우팅용 노드
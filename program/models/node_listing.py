@@ -1,4 +1,4 @@
-import os
+import os, time
 from typing import List
 from langchain_core.documents import Document
 from pypdf import PdfReader
@@ -6,19 +6,31 @@ from langchain_core.prompts import ChatPromptTemplate
 from schemas.global_state import State
 from schemas.schema import KeywordDistribute, TitleOutput, BPOutput, DescriptionOutput
 from prompts.prompt_listing import keyword_prompt, verification_prompt
-from utils.listing_func import generate_title, generate_bp, generate_description
-from langchain_openai import ChatOpenAI
+from utils.listing_func import generate_title_steps, generate_bp_steps, generate_description_steps
 from utils.config_loader import config
+from utils.runtime import chat_model, with_deadline
+from utils.node_runner import node_pair, LLMCall, LLMBatch
+from utils.token_func import count_tokens
+from utils.prompt_budget import plan_keyword_payload
 from dotenv import load_dotenv
 from datetime import datetime
 
 load_dotenv()
 
-llm = ChatOpenAI(model=config['llm_listing']['model'], temperature=float(config['llm_listing']['temperature']))
+# LLM은 import 시점이 아니라 노드가 처음 호출할 때 만들어지고, 이후에는 재사용됩니다. (utils.runtime.chat_model)
+def _llm():
+    return chat_model(config['llm_listing']['model'], float(config['llm_listing']['temperature']), node='keyword_distribute')
+
+# 검증용 체인. 섹션마다 [listing_verificate] timeout초 안에 끝나지 않으면 재시도하지 않고 실패로 처리합니다.
+def _verification_chain():
+    timeout = config.getfloat('listing_verificate', 'timeout')
+    llm = chat_model("gpt-4o", 0, node='listing_verificate', retries=0, timeout=timeout)
+    return with_deadline(verification_prompt | llm, timeout)
 
 # ====================================================================================================
 # 키워드 분배 노드
-def keyword_distribute(state: State):
+KEYWORD_PROMPT_COLUMNS = ['keyword', 'relevance_category', 'value_score']
+def keyword_distribute_steps(state: State):
     
     if not state['data']:
         print("\n[Skipped] 데이터가 없어 키워드 분배를 종료합니다.")
@@ -27,16 +39,27 @@ def keyword_distribute(state: State):
     print(f'\n--- 키워드 {len(state['data'])}개에 대해 분배를 시작합니다... ---')
     
     try:
-        prompt = keyword_prompt.invoke(
-            {
-                'product_name': state['product_name'], 
-                'category': state['category'],
-                'product_information': state['product_information'], 
-                'data': state['data'],
-            }
+        inputs = {
+            'product_name': state['product_name'], 
+            'category': state['category'],
+            'product_information': state['product_information'], 
+        }
+
+        # 키워드 표를 압축하고 토큰 예산을 넘으면 value_score가 낮은 키워드부터 잘라 Leftover로 보냅니다.
+        model = config['llm_listing']['model']
+        rows = state['data'].to_records(KEYWORD_PROMPT_COLUMNS)
+        before_tokens = count_tokens(keyword_prompt.format(**inputs, data=state['data'].to_records()), model)
+        table, prompt_rows, after_tokens = plan_keyword_payload(
+            lambda table: keyword_prompt.format(**inputs, data=table),
+            rows, KEYWORD_PROMPT_COLUMNS, config.getint('prompt_budget', 'keyword_distribute'), model
         )
-        structured_llm = llm.with_structured_output(KeywordDistribute)
-        res = structured_llm.invoke(prompt)
+        prompt_keywords = {row['keyword'] for row in prompt_rows}
+        trimmed = [row['keyword'] for row in rows if row['keyword'] not in prompt_keywords]
+        print(f"프롬프트 토큰: {before_tokens} → {after_tokens} (키워드 {len(prompt_rows)}/{len(rows)}개)")
+
+        prompt = keyword_prompt.invoke({**inputs, 'data': table})
+        structured_llm = _llm().with_structured_output(KeywordDistribute)
+        res = yield LLMCall(structured_llm, prompt)
         
         print('\n=== 키워드 분배 결과 ===')
         print(f' Title Keyword: {len(res.title_keyword)}개')
@@ -48,47 +71,74 @@ def keyword_distribute(state: State):
             'title_keyword': res.title_keyword, 
             'bp_keyword': res.bp_keyword, 
             'description_keyword': res.description_keyword, 
-            'leftover': res.leftover
+            'leftover': res.leftover + trimmed,
+            'listing_started': time.time(),
         }    
 
     except Exception as e:
         print(f"\n[Error] 키워드 분배 중 에러가 발생했습니다: {e}")
         return {}
 
+keyword_distribute, akeyword_distribute = node_pair(keyword_distribute_steps)
+
+# ====================================================================================================
+# 리스팅 작성 브랜치
+# keyword_distribute 이후 Title 브랜치와 BP → Description 브랜치를 병렬로 작성합니다.
+# LangGraph는 한 단계(superstep)의 노드가 모두 끝나야 다음 단계로 넘어가므로, Description을 별도 노드로 두면
+# Title이 끝날 때까지 기다리게 됩니다. BP가 끝나면 바로 Description을 쓰도록 두 작업을 한 노드에서 이어서 실행합니다.
+def _timed(name, steps_func, state: State):
+    """리스팅 작성 함수를 실행하고 (State 업데이트, {name: 소요 시간})을 반환합니다."""
+    start = time.perf_counter()
+    update = (yield from steps_func(state)) or {}
+    return update, {name: time.perf_counter() - start}
+
+def generate_title_node_steps(state: State):
+    update, latency = yield from _timed('title', generate_title_steps, state)
+    return {**update, 'listing_latency': latency}
+
+def generate_bp_description_node_steps(state: State):
+    """BP를 작성한 뒤 그 결과로 바로 Description을 작성합니다. BP를 작성하지 못했으면 Description도 건너뜁니다."""
+    bp_update, bp_latency = yield from _timed('bp', generate_bp_steps, state)
+    if not bp_update.get('bp'):
+        print('\n[Skipped] Bullet Point가 없어 Description 작성을 건너뜁니다.')
+        return {'listing_latency': bp_latency}
+    description_update, description_latency = yield from _timed('description', generate_description_steps, {**state, **bp_update})
+    return {**bp_update, **description_update, 'listing_latency': {**bp_latency, **description_latency}}
+
+generate_title_node, agenerate_title_node = node_pair(generate_title_node_steps)
+generate_bp_description_node, agenerate_bp_description_node = node_pair(generate_bp_description_node_steps)
+
 # ====================================================================================================
-# 노드 작성
+# 리스팅 합류 노드
 def generate_listing(state: State):
     """
-    Title, Bullet Points, Description을 순차적으로 생성하기 위해
-    기존의 개별 생성 함수들을 호출하는 메인 함수.
+    Title 브랜치와 BP → Description 브랜치가 모두 끝난 뒤 실행되는 합류 노드.
+    브랜치별 소요 시간과, 브랜치 시작부터 합류까지 실제로 걸린 시간을 출력합니다.
     """
-    print("\n--- 통합 리스팅 생성을 시작합니다... ---")
+    latency = state.get('listing_latency') or {}
+    title_time = latency.get('title', 0.0)
+    bp_time = latency.get('bp', 0.0)
+    description_time = latency.get('description', 0.0)
+    started = state.get('listing_started')
     
-    title_update = generate_title(state)
-    bp_update = generate_bp(state)
-    
-    # Description에서 bp가 필요해서 임시로 업데이트
-    temp_state = state.copy()
-    temp_state.update(bp_update)
-        
-    description_update = generate_description(temp_state)
-    
-    # 모든 결과를 취합하여 최종 업데이트 딕셔너리 생성
-    final_update = {}
-    final_update.update(title_update)
-    final_update.update(bp_update)
-    final_update.update(description_update)
+    print('\n=== 리스팅 작성 소요 시간 ===')
+    print(f' Title: {title_time:.1f}초')
+    print(f' Bullet Point: {bp_time:.1f}초')
+    print(f' Description: {description_time:.1f}초')
+    if started:
+        print(f' 전체(병렬): {time.time() - started:.1f}초')
     
     print("\n--- 통합 리스팅 생성 완료 ---")
-    return final_update
+    return {}
 
 # ====================================================================================================
 # Listing Verification 노드
 
-def listing_verificate(state: State) -> dict:
+def listing_verificate_steps(state: State):
     """
-    Verifies and corrects the title, bullet points, and description separately based on product information,
-    using three distinct LLM calls.
+    Verifies and corrects the title, bullet points, and description based on product information.
+    The three sections are independent, so they are verified concurrently with a single batch call.
+    If a section fails or times out, its unverified text is kept.
 
     Args:
         state (State): The current graph state.
@@ -98,52 +148,54 @@ def listing_verificate(state: State) -> dict:
     """
     print("---Executing Verification Node---")
 
-    # 1. State에서 현재 리스팅 정보와 제품 사실 정보를 올바른 방식으로 가져옵니다.
+    # 1. State에서 현재 리스팅 정보와 제품 사실 정보를 가져옵니다.
     current_title = state["title"]
     current_bp = state["bp"]
     current_description = state["description"]
     product_information = state["product_information"]
 
-    # 2. LLM을 초기화하고 검증 체인을 생성합니다.
-    llm = ChatOpenAI(model="gpt-4o", temperature=0)
-    verification_chain = verification_prompt | llm
-
-    # 3. API 호출 1: Title 검증
-    print("Verifying Title...")
-    title_response = verification_chain.invoke({
-        "product_information": product_information,
-        "content_type": "Title",
-        "content_to_verify": current_title
-    })
-    verified_title = title_response.content
-
-    # 4. API 호출 2: Bullet Points 검증
-    print("Verifying Bullet Points...")
-    bp_as_string = "\n".join(current_bp)
-    bp_response = verification_chain.invoke({
-        "product_information": product_information,
-        "content_type": "Bullet Points",
-        "content_to_verify": bp_as_string
-    })
+    # 2. Title, Bullet Points, Description 검증을 동시에 요청합니다.
+    sections = [
+        ("Title", current_title),
+        ("Bullet Points", "\n".join(current_bp)),
+        ("Description", current_description),
+    ]
+    print("Verifying Title, Bullet Points, Description...")
+    responses = yield LLMBatch(
+        _verification_chain(),
+        [
+            {
+                "product_information": product_information,
+                "content_type": content_type,
+                "content_to_verify": content_to_verify
+            }
+            for content_type, content_to_verify in sections
+        ],
+        config={'max_concurrency': len(sections)},
+        return_exceptions=True
+    )
+
+    # 3. 실패하거나 시간 초과된 섹션은 검증 전 내용을 유지합니다.
+    verified = {}
+    for (content_type, _), response in zip(sections, responses):
+        if isinstance(response, Exception):
+            print(f"[Warning] {content_type} 검증에 실패하여 기존 내용을 유지합니다: {response}")
+            verified[content_type] = None
+        else:
+            verified[content_type] = response.content
+
+    verified_title = verified["Title"] if verified["Title"] is not None else current_title
     # LLM의 문자열 응답을 다시 리스트 형태로 변환합니다.
-    verified_bp = bp_response.content.strip().split('\n')
-
-    # 5. API 호출 3: Description 검증
-    print("Verifying Description...")
-    description_response = verification_chain.invoke({
-        "product_information": product_information,
-        "content_type": "Description",
-        "content_to_verify": current_description
-    })
-    verified_description = description_response.content
+    verified_bp = verified["Bullet Points"].strip().split('\n') if verified["Bullet Points"] is not None else current_bp
+    verified_description = verified["Description"] if verified["Description"] is not None else current_description
 
     print("---Verification Complete---")
     
-    # 6. 검증 완료된 콘텐츠를 State 업데이트를 위해 반환합니다.
+    # 4. 검증 완료된 콘텐츠를 State 업데이트를 위해 반환합니다.
     return {
         "title": verified_title,
         "bp": verified_bp,
         "description": verified_description,
     }
 
-  
+listing_verificate, alisting_verificate = node_pair(listing_verificate_steps)
@@ -2,20 +2,28 @@ import json, sys, re
 import pandas as pd
 from typing import Dict
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
 from langchain_core.output_parsers import StrOutputParser
 from langchain.output_parsers import StructuredOutputParser, ResponseSchema
-from prompts.prompt_preprocess import filter_prompt, relevance_prompt, select_prompt, summarization_prompt, select_count
+from prompts.prompt_preprocess import filter_prompt, relevance_prompt, select_prompt, summarization_prompt, summary_reduce_prompt, select_count
 from schemas.global_state import State
-from utils.preprocess_func import clean_keyword_column, filter_by_llm, clean_cp_column, clean_sv_column, scaler_and_score
+from schemas.keyword_table import KeywordTable
+from utils.preprocess_func import clean_keyword_column, filter_by_llm_steps, clean_cp_column, clean_sv_column, scaler_and_score, classify_relevance_batched_steps, classify_relevance_locally, record_relevance_labels, summarize_documents_steps, reduce_summaries_steps
+from utils.token_func import count_tokens
+from utils.prompt_budget import plan_keyword_payload
+from utils.keyword_ranking import rank_keywords
 from utils.config_loader import config
-import streamlit as st
+from utils.runtime import chat_model
+from utils.node_runner import node_pair, LLMCall, InThread
 
 load_dotenv()
 
+# ====================================================================================================
+# 노드는 LLM 호출 지점마다 요청을 yield하는 제너레이터로 작성하고, node_pair로 동기/비동기 노드 함수를 함께 만듭니다.
+# (예: preprocess_data는 .invoke, apreprocess_data는 .ainvoke로 LLM을 호출합니다. utils.node_runner 참고)
+
 # ====================================================================================================
 # 키워드 정제
-def preprocess_data(state: State):
+def preprocess_data_steps(state: State):
     if not state['data']:
         print("\n[Skipped] 데이터가 없어 키워드 정제를 종료합니다.")
         return sys.exit(1)
@@ -25,18 +33,12 @@ def preprocess_data(state: State):
         데이터프레임 전체에 대해 정제, 스케일링, 점수 계산을 순차적으로 수행합니다.
         """
         print("\n--- 데이터 정제 및 스케일링 시작... ---")
-        df = pd.DataFrame(state["data"])
-        df = clean_keyword_column(df)
-        df = filter_by_llm(df)
-        df, sv_imputed_mask = clean_sv_column(df)
-        df, cp_imputed_mask = clean_cp_column(df)
-
-        df['is_imputed'] = sv_imputed_mask | cp_imputed_mask
-
-        df = scaler_and_score(df)
-
-        df.drop(columns=['is_imputed'], inplace=True, errors='ignore')
-        processed_df = df.to_dict(orient='records')
+        df = state["data"].to_pandas()
+        df, keyword_report = yield InThread(clean_keyword_column, df)
+        if keyword_report:
+            print(f"키워드 정제: 전체 {keyword_report['total']}개 중 누락 {keyword_report['missing']}개, 허용되지 않은 문자 {keyword_report['invalid_chars']}개, 중복 {keyword_report['duplicate']}개 제거")
+        df = yield from filter_by_llm_steps(df)
+        processed_df = yield InThread(_score_keywords, df)
 
         print(f"\n최종 {len(processed_df)}개 키워드 정제 및 점수 계산 완료.")
         return {'data': processed_df}
@@ -44,163 +46,186 @@ def preprocess_data(state: State):
         print(f"\n[Error] 키워드 정제 중 에러가 발생했습니다: {e}")
         return {}
 
+def _score_keywords(df: pd.DataFrame) -> KeywordTable:
+    """검색량/경쟁 상품 수를 정제하고 value_score를 계산합니다."""
+    df, sv_imputed_mask = clean_sv_column(df)
+    df, cp_imputed_mask = clean_cp_column(df)
+
+    df['is_imputed'] = sv_imputed_mask | cp_imputed_mask
+
+    df = scaler_and_score(df)
+
+    df.drop(columns=['is_imputed'], inplace=True, errors='ignore')
+    return KeywordTable.from_pandas(df)
+
+preprocess_data, apreprocess_data = node_pair(preprocess_data_steps)
+
 
 # ====================================================================================================
 # 노드 함수 정의
 
-llm = ChatOpenAI(model=config['llm_relevance']['model'], temperature=float(config['llm_keyword']['temperature']))
+# LLM은 import 시점이 아니라 노드가 처음 호출할 때 만들어지고, 이후에는 재사용됩니다. (utils.runtime.chat_model)
+def _relevance_llm():
+    return chat_model(config['llm_relevance']['model'], float(config['llm_keyword']['temperature']), node='relevance_categorize')
+
+def _select_llm():
+    return chat_model(config['llm_relevance']['model'], float(config['llm_keyword']['temperature']), node='select_keywords')
 
-def relevance_categorize(state: State) -> Dict:
+def relevance_categorize_steps(state: State):
     """
     LLM을 사용하여 각 키워드의 연관성을 4가지 카테고리(직접, 중간, 간접, 없음)로 분류합니다.
     """
     print("\n--- 연관성 분류를 시작합니다... ---\n")
     product_name = state.get("product_name")
     product_information = state.get("product_information")
-    data = state.get("data", [])
+    data = state.get("data")
 
     # 데이터가 비어있으면 중단
     if not data:
         print("\n[Skipped] 데이터가 없어 연관성 분류를 건너뜁니다.")
         return {}
 
-    # DataFrame을 dict 리스트로 변환 (만약 DataFrame으로 들어올 경우)
-    if isinstance(data, pd.DataFrame):
-        data = data.to_dict(orient='records')
-
-    keywords = [row['keyword'] for row in data if 'keyword' in row]
+    keywords = data.keywords if 'keyword' in data else []
     if not keywords:
         print("\n[Warning] 키워드가 없어 연관성 분류를 건너뜁니다.")
         return {}
 
     
-    chain = relevance_prompt | llm | StrOutputParser()
+    chain = relevance_prompt | _relevance_llm() | StrOutputParser()
+
+    # 로컬 분류기가 확신하는 키워드는 LLM 없이 분류하고, 나머지만 LLM에 요청
+    local_map, llm_keywords = yield InThread(classify_relevance_locally, keywords, product_name, product_information)
+    if local_map:
+        print(f"로컬 분류기로 {len(local_map)}개 키워드를 분류했습니다.")
     
-    print(f"--- {len(keywords)}개 키워드의 연관성 분류를 요청합니다... ---")
+    print(f"--- {len(llm_keywords)}개 키워드의 연관성 분류를 요청합니다... ---")
     
     try:
-        response_str = chain.invoke({
-            "product_name": product_name,
-            "product_information": product_information,
-            "keyword_list_str": json.dumps(keywords, ensure_ascii=False)
-        })
-        
+        classification_map, failed_keywords, chunk_count = yield from classify_relevance_batched_steps(
+            chain,
+            llm_keywords,
+            product_name,
+            product_information,
+            chunk_tokens=int(config['relevance_categorize']['chunk_tokens']),
+            max_concurrency=int(config['relevance_categorize']['max_concurrency']),
+            max_retries=int(config['relevance_categorize']['max_retries']),
+            model=config['llm_relevance']['model'],
+        )
+        yield InThread(record_relevance_labels, product_name, product_information, classification_map)
+        classification_map = {**classification_map, **local_map}
+        failed_set = set(failed_keywords)
         
-        classifications = json.loads(response_str)
-        
-        classification_map = {item['keyword']: item['relevance_category'] for item in classifications}
-        
-        for row in data:
-            if 'keyword' in row:
-                row['relevance_category'] = classification_map.get(row['keyword'], '없음')
+        categories = ['분류 실패' if keyword in failed_set else classification_map.get(keyword, '없음') for keyword in keywords]
+        data = data.with_column('relevance_category', categories)
         
+        print(f"\n{chunk_count}개 청크로 나눠 분류를 요청했습니다.")
+        if failed_keywords:
+            print(f"\n[Warning] 재시도 후에도 실패한 키워드 {len(failed_keywords)}개는 '분류 실패'로 표시합니다.")
         print("\n모든 키워드에 연관성 카테고리를 부여했습니다")
         return {"data": data}
 
     except Exception as e:
         print(f"\n[Error] 연관성 분류 중 에러가 발생했습니다: {e}")
-        for row in data:
-            row['relevance_category'] = '분류 실패'
-        return {"data": data}
+        return {"data": data.with_column('relevance_category', ['분류 실패'] * len(data))}
+
+relevance_categorize, arelevance_categorize = node_pair(relevance_categorize_steps)
 
 
 # ====================================================================================================
 # 상위 키워드 선택
+SELECT_PROMPT_COLUMNS = ['keyword', 'relevance_category', 'value_score']
 
-def select_keywords(state: State) -> Dict:
+def select_keywords_steps(state: State):
     """
-    LLM을 사용해 상위 키워드를 선별하고, 나머지는 backend_keywords에 저장합니다.
-    실패 시 최대 3회 재시도하고, 최종 실패 시 대체 로직을 실행합니다.
+    복합 점수(value_score, 연관성 카테고리, 롱테일 패널티)로 상위 키워드를 로컬에서 선별하고, 나머지는 backend_keywords에 저장합니다.
+    [keyword_ranking] llm_rerank가 켜져 있으면 상위 후보 목록만 LLM에 보내 최종 선택을 맡기며, 실패하면 로컬 순위를 그대로 사용합니다.
     """
     print("\n--- 상위 키워드 선별 및 백엔드 키워드를 저장합니다... ---")
     
-    data = state.get("data", [])
+    data = state.get("data")
 
     if not data:
         print("\n[Skipped] 데이터가 없어 키워드 선별을 건너뜁니다.")
-        return {"data": [], "backend_keywords": []}
+        return {"data": KeywordTable(), "backend_keywords": []}
+
+    simplified_data = data.to_records(SELECT_PROMPT_COLUMNS)
+    keywords = data.keywords
+    value_scores = [row.get('value_score') for row in simplified_data]
+    categories = [row.get('relevance_category') for row in simplified_data]
+
+    # 로컬 순위: LLM 재선별을 쓰면 select_count * rerank_pool개, 아니면 select_count개
+    rerank = config.getboolean('keyword_ranking', 'llm_rerank', fallback=False)
+    pool_size = select_count * config.getint('keyword_ranking', 'rerank_pool', fallback=2) if rerank else select_count
+    ranked = rank_keywords(keywords, value_scores, categories, pool_size)
+    selected = ranked[:select_count]
+    print(f"\n복합 점수로 {len(keywords)}개 후보 중 상위 {len(ranked)}개를 골랐습니다.")
+
+    if rerank and len(ranked) > select_count:
+        shortlist = [simplified_data[i] for i in ranked]
+
+        # 후보 목록을 압축 표로 만들고 토큰 예산을 넘으면 value_score가 낮은 후보부터 잘라냅니다.
+        model = config['llm_relevance']['model']
+        render = lambda table: select_prompt.format(select_count=select_count, data_list_str=table)
+        before_tokens = count_tokens(render(json.dumps(simplified_data, ensure_ascii=False)), model)
+        data_list_str, prompt_rows, after_tokens = plan_keyword_payload(
+            render, shortlist, SELECT_PROMPT_COLUMNS, config.getint('prompt_budget', 'select_keywords'), model
+        )
+        print(f"프롬프트 토큰: {before_tokens} → {after_tokens} (후보 {len(prompt_rows)}/{len(simplified_data)}개)")
 
-    simplified_data = [
-        {
-            "keyword": row.get("keyword"),
-            "relevance_category": row.get("relevance_category"),
-            "value_score": row.get("value_score")  # If문 걸기
-        }
-        for row in data
-    ]
-
-    chain = select_prompt | llm | StrOutputParser()
-
-    max_retries = 3
-    retries = 0
-    
-    while retries < max_retries:
         try:
-            print(f"\n--- {len(simplified_data)}개 후보 중 상위 키워드 선별을 요청합니다... --- (시도 {retries + 1}/{max_retries})")
-            
-            response_str = chain.invoke({
+            print(f"\n--- {len(prompt_rows)}개 후보 중 상위 키워드 재선별을 요청합니다... ---")
+            chain = select_prompt | _select_llm() | StrOutputParser() | json.loads
+            picked_keywords = yield LLMCall(chain, {
                 'select_count': select_count,
-                "data_list_str": json.dumps(simplified_data, ensure_ascii=False)
+                "data_list_str": data_list_str
             })
-            
-            top_keywords_list = json.loads(response_str)
-            top_keywords_set = set(top_keywords_list)
 
-            final_data = [row for row in data if row.get("keyword") in top_keywords_set]
-            
-            all_keywords_set = {row.get("keyword") for row in data}
-            backend_keywords_set = all_keywords_set - top_keywords_set
-            backend_keywords_list = list(backend_keywords_set)
-
-            print(f"\n최종 {len(final_data)}개 키워드를 선별했습니다. 탈락한 키워드{len(backend_keywords_list)}개를 백엔드 키워드로 저장합니다.")
-            
-            return {"data": final_data, "backend_keywords": backend_keywords_list}
+            # LLM이 고른 후보를 앞에 두고, 모자라면 로컬 순위로 채웁니다.
+            index_of = {keywords[i]: i for i in ranked}
+            picked = [index_of[k] for k in dict.fromkeys(picked_keywords) if k in index_of]
+            selected = (picked + [i for i in ranked if i not in picked])[:select_count]
 
         # 에러 발생 시
         except Exception as e:
-            retries += 1
-            print(f"\n[Error] 상위 키워드 선별 중 에러가 발생했습니다: {e}")
-            if retries < max_retries:
-                print(f"\n--- 재시도합니다... --- ({retries}/{max_retries})")
-            else:
-                print(f"\n[Error] 최대 재시도 횟수({max_retries}회)를 초과했습니다. LLM 호출에 실패했습니다.")
-                break
-
-    # LLM 호출이 최종 실패했을 때 실행되는 대체 로직
-    print("\n에러 발생으로 인해, value_score 기준 상위 40개를 대신 선택합니다.")
-    
-    data_copy = [d for d in data if d.get('relevance_category') in ['직접', '중간']]
-    if not data_copy:
-        data_copy = data
+            print(f"\n[Warning] LLM 재선별 중 에러가 발생해 복합 점수 순위를 그대로 사용합니다: {e}")
 
-    sorted_data = sorted(data_copy, key=lambda x: x.get('value_score', 0), reverse=True)
-    final_data = sorted_data[:40]
+    final_data = data.take(selected)
 
-    top_keywords_set = {row.get("keyword") for row in final_data}
-    all_keywords_set = {row.get("keyword") for row in data}
-    backend_keywords_set = all_keywords_set - top_keywords_set
+    top_keywords_set = set(final_data.keywords)
+    backend_keywords_set = set(keywords) - top_keywords_set
     backend_keywords_list = list(backend_keywords_set)
 
+    print(f"\n최종 {len(final_data)}개 키워드를 선별했습니다. 탈락한 키워드{len(backend_keywords_list)}개를 백엔드 키워드로 저장합니다.")
+
     return {"data": final_data, "backend_keywords": backend_keywords_list}
 
-def information_refine(state: State):
+select_keywords, aselect_keywords = node_pair(select_keywords_steps)
+
+def information_refine_steps(state: State):
     
     print("--- PDF 내용을 요약합니다... ---")
     
     all_extracted_text = state['product_information']
-    
-    # LLM을 사용하여 텍스트 요약
-    full_text = "\n\n---\n\n".join(all_extracted_text)
+    if isinstance(all_extracted_text, str):
+        all_extracted_text = [all_extracted_text]
 
     # LLM 초기화 및 요약 체인 구성
-    llm = ChatOpenAI(model="gpt-4o", temperature=0)
+    llm = chat_model(config['information_refine']['model'], 0, node='information_refine')
 
     summarization_chain = summarization_prompt | llm
+    reduce_chain = summary_reduce_prompt | llm
 
-    # LLM 호출하여 요약 생성
-    response = summarization_chain.invoke({"product_text": full_text})
-    product_information = response.content
+    # 문서별 요약 (이미 요약한 문서는 저장된 요약 사용, 긴 문서는 청크별 요약 후 병합)
+    summaries, new_count = yield from summarize_documents_steps(summarization_chain, reduce_chain, all_extracted_text)
+    print(f"\n{len(summaries)}개 문서 중 {new_count}개를 새로 요약하고, {len(summaries) - new_count}개는 저장된 요약을 사용했습니다.")
+    
+    # 여러 문서의 요약을 합친 결과도 요약 예산을 넘지 않도록 한 번 더 병합
+    product_information = "\n\n---\n\n".join(summaries)
+    if len(summaries) > 1 and count_tokens(product_information, config['information_refine']['model']) > config.getint('information_refine', 'summary_tokens'):
+        product_information = yield from reduce_summaries_steps(reduce_chain, summaries)
     print(f"\n=== 요약된 제품 정보 ===\n{product_information}")
 
     # State 업데이트
-    return {"product_information": product_information}
\ No newline at end of file
+    return {"product_information": product_information}
+
+information_refine, ainformation_refine = node_pair(information_refine_steps)
@@ -1,17 +1,22 @@
 from schemas.global_state import State
 from schemas.schema import TitleOutput, BPOutput, DescriptionOutput
 from prompts.prompt_listing import title_prompt, bp_prompt, description_prompt
-from langchain_openai import ChatOpenAI
 from utils.config_loader import config
+from utils.runtime import chat_model
+from utils.rate_limiter import PRIORITY_INTERACTIVE
+from utils.node_runner import node_pair, LLMCall
 from dotenv import load_dotenv
 
 load_dotenv()
 
-llm = ChatOpenAI(model=config['llm_listing']['model'], temperature=float(config['llm_listing']['temperature']))
+# LLM은 import 시점이 아니라 노드가 처음 호출할 때 만들어지고, 이후에는 재사용됩니다. (utils.runtime.chat_model)
+# 사용자가 기다리는 대화형 요청이므로 배치 작업보다 먼저 처리합니다.
+def _llm():
+    return chat_model(config['llm_listing']['model'], float(config['llm_listing']['temperature']), priority=PRIORITY_INTERACTIVE)
 
 # ====================================================================================================
 # Title 노드
-def regenerate_title(state: State):
+def regenerate_title_steps(state: State):
     
     if not state['title_keyword']:
         print('\n[Skipped] Title 재작성용 키워드가 존재하지 않습니다.')
@@ -36,8 +41,8 @@ def regenerate_title(state: State):
             title= state['title']
         )
         
-        structured_llm = llm.with_structured_output(TitleOutput)
-        res = structured_llm.invoke(prompt)
+        structured_llm = _llm().with_structured_output(TitleOutput)
+        res = yield LLMCall(structured_llm, prompt)
         print(f'\n재작성된 Title: 총 {len(res.title)}자')
         return {'title': res.title, 'user_feedback_title': ''}
 
@@ -45,9 +50,11 @@ def regenerate_title(state: State):
         print(f"\n[Error] Title 재작성 중 에러가 발생했습니다: {e}")
         return {'user_feedback_title': ''}
 
+regenerate_title, aregenerate_title = node_pair(regenerate_title_steps)
+
 # ====================================================================================================
 # BP 노드
-def regenerate_bp(state: State):
+def regenerate_bp_steps(state: State):
     
     if not state['bp_keyword']:
         print('\n[Skipped] Bullet Point 재작성용 키워드가 존재하지 않습니다.')
@@ -72,8 +79,8 @@ def regenerate_bp(state: State):
             bp= state['bp']
         )
         
-        structured_llm = llm.with_structured_output(BPOutput)
-        res = structured_llm.invoke(prompt)
+        structured_llm = _llm().with_structured_output(BPOutput)
+        res = yield LLMCall(structured_llm, prompt)
         bp_length = []
         for bp in res.bp:
             bp_length.append(len(bp))    
@@ -84,9 +91,11 @@ def regenerate_bp(state: State):
         print(f"\n[Error] Bullet Point 재작성 중 에러가 발생했습니다: {e}")
         return {'user_feedback_bp': ''}
 
+regenerate_bp, aregenerate_bp = node_pair(regenerate_bp_steps)
+
 # ====================================================================================================
 # Description 노드
-def regenerate_description(state: State):
+def regenerate_description_steps(state: State):
     
     if not state['description_keyword']:
         print('\n[Skipped] Description 재작성용 키워드가 존재하지 않습니다.')
@@ -112,12 +121,14 @@ def regenerate_description(state: State):
             description= state['description']
         )
 
-        structured_llm = llm.with_structured_output(DescriptionOutput)
-        res = structured_llm.invoke(prompt)
+        structured_llm = _llm().with_structured_output(DescriptionOutput)
+        res = yield LLMCall(structured_llm, prompt)
         print(f'\n재작성된 Description: 총 {len(res.description)}자')
         return {'description': res.description, 'user_feedback_description': ''}
 
     except Exception as e:
         print(f"\n[Error] Description 재작성 중 에러가 발생했습니다: {e}")
         return {'user_feedback_description': ''}
-    
\ No newline at end of file
+    
+
+regenerate_description, aregenerate_description = node_pair(regenerate_description_steps)
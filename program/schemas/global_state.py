@@ -1,11 +1,13 @@
 from langgraph.graph import MessagesState
 from langchain_core.documents import Document
-from typing_extensions import List, Dict
+import operator
+from typing_extensions import List, Dict, Annotated
 from pydantic import Field
+from schemas.keyword_table import KeywordTable
 
 class State(MessagesState):
     # input data
-    data: List[Dict]
+    data: KeywordTable
     product_name: str
     product_docs: List[Document]
     product_information: str
@@ -25,6 +27,10 @@ class State(MessagesState):
     bp: List[str] = Field(default_factory=list)
     description: str = ''
     
+    # 리스팅 브랜치별 소요 시간(초)과 브랜치 시작 시각(time.time(), keyword_distribute가 끝난 시점)
+    listing_latency: Annotated[Dict[str, float], operator.or_]
+    listing_started: float
+    
     # 사용자 요청
     user_feedback: str = ''
     user_feedback_title: str = ''
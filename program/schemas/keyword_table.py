@@ -0,0 +1,79 @@
+from typing import Any, Dict, Iterable, List, Optional
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+class KeywordTable:
+    """
+    그래프 State의 data에 저장하는 열 기반 키워드 테이블입니다. (pyarrow.Table 래퍼)
+    노드 사이에서는 변환 없이 그대로 전달하고, 필요한 노드만 to_pandas()/to_records()로 꺼내 씁니다.
+    테이블은 불변이므로 컬럼 추가나 필터링은 새 KeywordTable을 반환합니다.
+    """
+
+    def __init__(self, table: Optional[pa.Table] = None, ipc: Optional[bytes] = None):
+        if table is None:
+            table = pa.ipc.open_stream(ipc).read_all() if ipc else pa.table({'keyword': pa.array([], pa.string())})
+        self.table = table
+
+    # ------------------------------------------------------------------------------------------------
+    # 생성/변환
+    @classmethod
+    def from_pandas(cls, df: pd.DataFrame) -> 'KeywordTable':
+        return cls(pa.Table.from_pandas(df, preserve_index=False))
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> 'KeywordTable':
+        return cls.from_pandas(pd.DataFrame(records))
+
+    def to_pandas(self) -> pd.DataFrame:
+        return self.table.to_pandas(types_mapper={pa.int64(): pd.Int64Dtype()}.get)
+
+    def to_records(self, columns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """프롬프트에 넣을 때처럼 행 단위가 필요한 경우에만 dict 리스트로 변환합니다."""
+        table = self.table.select([c for c in columns if c in self.table.column_names]) if columns else self.table
+        return table.to_pylist()
+
+    # ------------------------------------------------------------------------------------------------
+    # 조회
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.table.column_names
+
+    @property
+    def keywords(self) -> List[str]:
+        return self.table['keyword'].to_pylist()
+
+    def column(self, name: str) -> np.ndarray:
+        return self.table[name].to_numpy()
+
+    # ------------------------------------------------------------------------------------------------
+    # 변경 (새 테이블 반환)
+    def with_column(self, name: str, values: Iterable) -> 'KeywordTable':
+        array = values if isinstance(values, (pa.Array, pa.ChunkedArray)) else pa.array(values)
+        if name in self.table.column_names:
+            return KeywordTable(self.table.set_column(self.table.column_names.index(name), name, array))
+        return KeywordTable(self.table.append_column(name, array))
+
+    def filter(self, mask) -> 'KeywordTable':
+        return KeywordTable(self.table.filter(pa.array(mask, pa.bool_())))
+
+    def take(self, indices) -> 'KeywordTable':
+        return KeywordTable(self.table.take(pa.array(indices, pa.int64())))
+
+    # ------------------------------------------------------------------------------------------------
+    # 체크포인트 직렬화
+    def to_ipc(self) -> bytes:
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, self.table.schema) as writer:
+            writer.write_table(self.table)
+        return sink.getvalue().to_pybytes()
+
+    def _asdict(self) -> Dict[str, bytes]:
+        # LangGraph 체크포인트 직렬화기(JsonPlusSerializer)는 _asdict()의 결과를 생성자 키워드 인자로 저장합니다.
+        # 행마다 dict를 만들지 않고 Arrow IPC 바이트 하나로 저장되며, 복원 시 KeywordTable(ipc=...)로 읽습니다.
+        return {'ipc': self.to_ipc()}
+
+    def __repr__(self) -> str:
+        return f'KeywordTable(rows={len(self)}, columns={self.table.column_names})'
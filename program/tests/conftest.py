@@ -0,0 +1,10 @@
+"""
+program 디렉토리에서 실행합니다:
+    python -m pytest tests
+벤치마크와 같은 방식으로 program과 benchmarks를 import 경로에 넣어 utils.*, fake_llm을 그대로 불러옵니다.
+"""
+import os, sys
+
+PROGRAM_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, PROGRAM_DIR)
+sys.path.insert(0, os.path.join(PROGRAM_DIR, 'benchmarks'))
@@ -0,0 +1,89 @@
+import json, asyncio, sqlite3
+import pytest
+from langchain_core.output_parsers import StrOutputParser
+
+import fake_llm
+from fake_llm import FakeChatModel
+from utils.llm_cache import SQLiteLLMCache, cache_on_success
+
+GOOD = '[{"keyword": "chicken shredder", "relevance_category": "Direct"}]'
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SQLiteLLMCache(str(tmp_path / 'llm_cache.sqlite'))
+
+@pytest.fixture
+def replies(monkeypatch):
+    """프롬프트별로 미리 정한 응답을 차례대로 돌려주고, 실제로 LLM이 호출된 횟수를 셉니다."""
+    queued = {}
+    calls = []
+
+    def respond(text, schema=None):
+        calls.append(text)
+        return queued[text].pop(0)
+
+    monkeypatch.setattr(fake_llm, 'respond', respond)
+    return queued, calls
+
+def rows(cache):
+    with sqlite3.connect(cache.path) as conn:
+        return conn.execute('SELECT COUNT(*) FROM llm_cache').fetchone()[0]
+
+def parse_chain(cache):
+    return FakeChatModel(cache=cache) | StrOutputParser() | json.loads
+
+
+def test_malformed_response_is_not_replayed(cache, replies):
+    queued, calls = replies
+    queued['classify'] = ['[{"keyword": "chicken shre', GOOD]
+    chain = cache_on_success(parse_chain(cache))
+
+    with pytest.raises(json.JSONDecodeError):
+        chain.invoke('classify')
+    assert rows(cache) == 0
+
+    # 다시 요청하면 캐시된 잘못된 응답 대신 새 응답을 받고, 파싱에 성공한 응답만 저장됩니다.
+    assert chain.invoke('classify') == json.loads(GOOD)
+    assert rows(cache) == 1
+
+    # 이후에는 LLM을 부르지 않고 캐시에서 돌려줍니다.
+    assert chain.invoke('classify') == json.loads(GOOD)
+    assert len(calls) == 2
+
+def test_async_call_caches_only_after_success(cache, replies):
+    queued, calls = replies
+    queued['classify'] = ['oops', GOOD]
+    chain = cache_on_success(parse_chain(cache))
+
+    with pytest.raises(json.JSONDecodeError):
+        asyncio.run(chain.ainvoke('classify'))
+    assert rows(cache) == 0
+
+    assert asyncio.run(chain.ainvoke('classify')) == json.loads(GOOD)
+    assert asyncio.run(chain.ainvoke('classify')) == json.loads(GOOD)
+    assert len(calls) == 2
+
+def test_batch_caches_each_input_separately(cache, replies):
+    queued, calls = replies
+    queued['good'] = [GOOD]
+    queued['bad'] = ['oops', GOOD]
+    chain = cache_on_success(parse_chain(cache))
+
+    results = chain.batch(['good', 'bad'], return_exceptions=True)
+    assert results[0] == json.loads(GOOD)
+    assert isinstance(results[1], json.JSONDecodeError)
+    assert rows(cache) == 1
+
+    assert chain.batch(['good', 'bad']) == [json.loads(GOOD)] * 2
+    assert calls.count('good') == 1 and calls.count('bad') == 2
+
+def test_refresh_skips_cached_response(cache, replies):
+    queued, calls = replies
+    queued['classify'] = ['[]', GOOD]
+
+    assert cache_on_success(parse_chain(cache)).invoke('classify') == []
+    # refresh는 캐시를 읽지 않고 새 응답을 받아 기존 항목을 덮어씁니다.
+    assert cache_on_success(parse_chain(cache), refresh=True).invoke('classify') == json.loads(GOOD)
+    assert cache_on_success(parse_chain(cache)).invoke('classify') == json.loads(GOOD)
+    assert len(calls) == 2
@@ -0,0 +1,94 @@
+import json, asyncio
+import pytest
+from langchain_core.output_parsers import StrOutputParser
+
+import fake_llm
+from fake_llm import FakeChatModel
+from prompts.prompt_preprocess import relevance_prompt
+from utils import preprocess_func
+from utils.llm_cache import SQLiteLLMCache
+from utils.node_runner import run_steps, arun_steps
+from utils.rate_limiter import BackoffPolicy
+
+KEYWORDS = [f'chicken shredder {i}' for i in range(8)]
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(preprocess_func, 'backoff_policy', lambda: BackoffPolicy(0, 0, 0))
+
+@pytest.fixture
+def requests(monkeypatch):
+    """
+    temperature 0 모델처럼 같은 프롬프트에는 항상 같은 응답을 주되, 키워드가 max_keywords개보다 많은 청크에는
+    잘린 JSON을 돌려줍니다. 요청마다 청크의 키워드 리스트를 기록합니다.
+    """
+    sent = []
+
+    def respond(text, schema=None):
+        keywords = json.loads(text.strip().splitlines()[-1])
+        sent.append(keywords)
+        response = fake_llm.relevance_response(text)
+        return response[:len(response) // 2] if len(keywords) > respond.max_keywords else response
+
+    respond.max_keywords = 4
+    monkeypatch.setattr(fake_llm, 'respond', respond)
+    return respond, sent
+
+@pytest.fixture
+def chain(tmp_path):
+    cache = SQLiteLLMCache(str(tmp_path / 'llm_cache.sqlite'))
+    return relevance_prompt | FakeChatModel(cache=cache) | StrOutputParser()
+
+def classify(chain, max_retries, run=run_steps):
+    steps = preprocess_func.classify_relevance_batched_steps(
+        chain, KEYWORDS, 'chicken shredder', 'info',
+        chunk_tokens=10_000, max_concurrency=4, max_retries=max_retries, model='gpt-4o-mini'
+    )
+    return run(steps)
+
+
+def test_retry_splits_chunk_that_keeps_failing(chain, requests):
+    respond, sent = requests
+
+    classification_map, failed, chunk_count = classify(chain, max_retries=2)
+
+    assert chunk_count == 1
+    assert failed == []
+    assert sorted(classification_map) == sorted(KEYWORDS)
+    # 8개 청크가 실패한 뒤 4개씩 두 청크로 나눠 다시 요청합니다.
+    assert [len(keywords) for keywords in sent] == [8, 4, 4]
+
+def test_retry_gives_up_after_max_retries(chain, requests):
+    respond, sent = requests
+    respond.max_keywords = 1
+
+    classification_map, failed, _ = classify(chain, max_retries=2)
+
+    assert classification_map == {}
+    assert failed == KEYWORDS
+    # 8 → 4, 4 → 2, 2, 2, 2 로 나눠 두 번 재시도한 뒤 포기합니다.
+    assert sorted(len(keywords) for keywords in sent) == [2, 2, 2, 2, 4, 4, 8]
+
+def test_malformed_response_is_not_replayed_on_next_run(chain, requests):
+    respond, sent = requests
+    respond.max_keywords = 0
+
+    # 모든 응답이 잘려 실패하면 캐시에는 아무것도 남지 않습니다.
+    _, failed, _ = classify(chain, max_retries=0)
+    assert failed == KEYWORDS
+
+    # 모델이 정상 응답을 주게 되면 다음 실행은 캐시된 잘못된 응답 대신 새 응답을 받습니다.
+    respond.max_keywords = 100
+    classification_map, failed, _ = classify(chain, max_retries=0)
+    assert failed == [] and sorted(classification_map) == sorted(KEYWORDS)
+    assert len(sent) == 2
+
+def test_async_retry(chain, requests):
+    respond, sent = requests
+
+    classification_map, failed, _ = asyncio.run(classify(chain, max_retries=1, run=arun_steps))
+
+    assert failed == []
+    assert sorted(classification_map) == sorted(KEYWORDS)
+    assert sorted(len(keywords) for keywords in sent) == [4, 4, 8]
@@ -1,34 +1,39 @@
 import shlex, sys
 import pandas as pd
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 from langchain_core.documents import Document
-from pypdf import PdfReader
+from schemas.keyword_table import KeywordTable
+from utils.csv_extract import read_keyword_csvs
+from utils.pdf_extract import extract_pdfs, pages_to_documents
+
+def _parse_dropped_paths(input_str: str) -> List[Path]:
+    """드래그 앤 드롭으로 입력된 경로 문자열을 Path 목록으로 바꿉니다. (Git Bash의 /c/ 경로 포함)"""
+    file_list = []
+    for p in shlex.split(input_str):
+        if p.startswith('/c/') or p.startswith('/C/'):
+            p = 'C:' + p[2:]
+        file_list.append(Path(p))
+    return file_list
 
 def load_keywords_csv(product_name):
     print('키워드가 들어있는 CSV 파일들이 필요합니다')
     print('키워드 관련 파일 끌어오기')
     print('↓'*25)
 
-    input_str = input()
-    
-    raw_paths = shlex.split(input_str)
-    
-    file_list = []
-    for p in raw_paths:
-        if p.startswith('/c/') or p.startswith('/C/'):
-            p = 'C:' + p[2:]
-        file_list.append(Path(p))
-    
-    # 들어올 csv 파일 형식들...(추가 가능)
-    required_cols_variants = [
-        ['Keywords', 'Search Volume', 'Competing Products'],
-        ['Phrase', 'Search Volume', 'Keyword Sales'],
-        ['Keyword Phrase', 'Search Volume', 'Keyword Sales']
-    ]
-    
-    dfs = []
-    good_files = []
+    data = read_keywords_csv(product_name, _parse_dropped_paths(input()))
+
+    # 형식 없으면 바로 종료
+    if data is None:
+        sys.exit(1)
+    return data
+
+def read_keywords_csv(product_name: str, file_list: List[Path]) -> Optional[KeywordTable]:
+    """
+    CSV 파일 목록에서 키워드 데이터를 읽어 하나의 KeywordTable로 합치고, 원본 데이터를 output/에 저장합니다.
+    형식에 맞는 CSV 파일이 하나도 없으면 None을 반환합니다.
+    """
+    csv_files = []
 
     # 입력 파일 존재 여부 확인
     for file_path in file_list:
@@ -45,53 +50,31 @@ def load_keywords_csv(product_name):
         
         # 파일 에러
         try:
-            df = pd.read_csv(file_path)
+            csv_files.append((file_path, file_path.read_bytes()))
         except Exception as e:
             print(f"[Error] 파일 읽기 실패: {file_path} ({e})")
             continue
-        
-        # 키워드 컬럼을 찾고, 존재하면 다른 컬럼은 옵션으로 처리
-        keyword_col_names = [cols[0] for cols in required_cols_variants]
-        found_keyword_col = next((col for col in keyword_col_names if col in df.columns), None)
-
-        if found_keyword_col:
-            # 'keyword' 컬럼을 필수로 포함하는 새 DataFrame 생성
-            df_processed = pd.DataFrame()
-            df_processed['keyword'] = df[found_keyword_col]
-
-            # 'search_volume' 컬럼이 있으면 추가, 없으면 NA로 채움
-            if 'Search Volume' in df.columns:
-                df_processed['search_volume'] = pd.to_numeric(df['Search Volume'], errors='coerce')
-            else:
-                df_processed['search_volume'] = pd.NA
-
-            # 'competing_products' 컬럼 처리
-            competing_col = None
-            if 'Competing Products' in df.columns:
-                competing_col = 'Competing Products'
-            elif 'Keyword Sales' in df.columns:
-                competing_col = 'Keyword Sales'
-            
-            if competing_col:
-                df_processed['competing_products'] = pd.to_numeric(df[competing_col].astype(str).str.replace('>', ''), errors='coerce').fillna(pd.NA)
-            else:
-                df_processed['competing_products'] = pd.NA
-            
-            # 최종적으로 데이터 타입 변환
-            df_processed['search_volume'] = df_processed['search_volume'].astype('Int64')
-            df_processed['competing_products'] = df_processed['competing_products'].astype('Int64')
-
-            dfs.append(df_processed)
-            good_files.append(file_path.name)
+    
+    dfs = []
+    good_files = []
+
+    # 키워드/검색량/경쟁 상품 컬럼만 읽기 (여러 파일은 동시에 처리)
+    for (file_path, _), df in zip(csv_files, read_keyword_csvs(csv_files)):
+        if isinstance(df, Exception):
+            print(f"[Error] 파일 읽기 실패: {file_path} ({df})")
+            continue
         
         # 컬럼 불일치
-        else:
+        if df is None:
             print(f"[Skipped] 키워드 컬럼을 찾을 수 없음: {file_path}")
+            continue
+        
+        dfs.append(df)
+        good_files.append(file_path.name)
 
-    # 형식 없으면 바로 종료
     if not good_files:
         print("\n[Warning] 형식에 맞는 CSV 파일이 없습니다.")
-        sys.exit(1)
+        return None
 
     combined_df = pd.concat(dfs, ignore_index=True)
     print("\n작업 완료:", good_files)
@@ -102,7 +85,7 @@ def load_keywords_csv(product_name):
     output_file = output_dir / f'{"_".join(product_name.split())}_keyword_raw_data.csv'
     combined_df.to_csv(output_file, index=False)
 
-    return combined_df.to_dict(orient='records')
+    return KeywordTable.from_pandas(combined_df)
 
 def load_information_pdf():
     print('상품정보가 들어있는 PDF 파일들이 필요합니다')
@@ -116,16 +99,16 @@ def load_information_pdf():
         print('주어진 PDF 파일이 없습니다. 리스팅 검증 과정을 생략합니다.')
         return None, 'Product information not found'
 
-    raw_paths = shlex.split(input_str)
-    
-    file_list = []
-    for p in raw_paths:
-        if p.startswith('/c/') or p.startswith('/C/'):
-            p = 'C:' + p[2:]
-        file_list.append(Path(p))
-    
+    return read_information_pdf(_parse_dropped_paths(input_str))
+
+def read_information_pdf(file_list: List[Path]):
+    """
+    PDF 파일 목록에서 상품 정보를 읽어 (Document 목록, 파일별 텍스트 목록)을 반환합니다.
+    읽을 수 있는 PDF가 없으면 (None, 'Product information not found')를 반환합니다.
+    """
     product_docs: List[Document] = []
     product_information = []
+    pdf_files = []
 
     # 입력 파일 존재 여부 확인
     for file_path in file_list:
@@ -142,19 +125,22 @@ def load_information_pdf():
         
         # 파일 에러
         try:
-            reader = PdfReader(file_path)
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-
-            product_docs.append(Document(page_content=text, metadata={"source": file_path}))
-            product_information.append(text)
-            print(f'읽어온 PDF 파일 : {file_path}')
-
+            pdf_files.append((file_path, file_path.read_bytes()))
         except Exception as e:
             print(f"[Error] 파일 읽기 실패: {file_path} ({e})")
             continue
     
+    # 페이지 텍스트 추출 (여러 파일은 병렬 처리)
+    for (file_path, _), pages in zip(pdf_files, extract_pdfs(pdf_files)):
+        if isinstance(pages, Exception):
+            print(f"[Error] 파일 읽기 실패: {file_path} ({pages})")
+            continue
+        
+        docs, text = pages_to_documents(str(file_path), pages)
+        product_docs.extend(docs)
+        product_information.append(text)
+        print(f'읽어온 PDF 파일 : {file_path} ({len(pages)}페이지)')
+    
     if not product_docs:
         print('주어진 파일 중 PDF 파일을 읽을 수 없습니다. 리스팅 검증 과정을 생략합니다.')
         return None, 'Product information not found'
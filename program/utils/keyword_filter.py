@@ -0,0 +1,178 @@
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+# ====================================================================================================
+# 단수/복수 정규화 (규칙 기반 lemmatizer)
+# 같은 키워드의 단수형과 복수형이 동시에 있을 때만 쓰이므로, 잘못 변환되더라도 짝이 없으면 영향이 없습니다.
+IRREGULAR_PLURALS = {
+    'men': 'man', 'women': 'woman', 'children': 'child', 'people': 'person', 'feet': 'foot', 'teeth': 'tooth',
+    'mice': 'mouse', 'geese': 'goose', 'knives': 'knife', 'wives': 'wife', 'lives': 'life', 'shelves': 'shelf',
+    'halves': 'half', 'leaves': 'leaf', 'loaves': 'loaf', 'wolves': 'wolf', 'calves': 'calf', 'scarves': 'scarf',
+    'potatoes': 'potato', 'tomatoes': 'tomato', 'heroes': 'hero', 'echoes': 'echo',
+}
+# 복수형처럼 보이지만 단수로 바꾸면 뜻이 달라지거나 원래 단수인 단어
+UNINFLECTED = {
+    'series', 'species', 'news', 'scissors', 'pants', 'shorts', 'jeans', 'trousers', 'tongs', 'pliers',
+    'tweezers', 'clothes', 'glasses', 'goggles', 'binoculars', 'leggings', 'overalls', 'lens', 'always', 'christmas',
+}
+
+def singularize(word: str) -> str:
+    """영어 단어 하나를 단수형으로 바꿉니다."""
+    if len(word) <= 3 or not word.isalpha() or word in UNINFLECTED:
+        return word
+    if word in IRREGULAR_PLURALS:
+        return IRREGULAR_PLURALS[word]
+    if word.endswith(('ss', 'us', 'is')):
+        return word
+    if word.endswith('ies') and len(word) > 4:
+        return word[:-3] + 'y'
+    if word.endswith(('ches', 'shes', 'xes', 'zes', 'sses')):
+        return word[:-2]
+    if word.endswith('s'):
+        return word[:-1]
+    return word
+
+def lemma_key(keyword: str) -> Tuple[str, ...]:
+    return tuple(singularize(token) for token in keyword.split())
+
+# ====================================================================================================
+# 오타 탐지 (SymSpell 삭제 인덱스)
+def levenshtein(a: str, b: str) -> int:
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+class DeleteIndex:
+    """
+    SymSpell 방식의 편집 거리 인덱스.
+    단어마다 글자를 최대 max_distance개 지운 변형을 미리 색인해 두고, 찾을 때도 같은 방식으로 변형을 만들어 후보를 모은 뒤
+    후보에 대해서만 편집 거리를 계산합니다. 어휘 전체와 비교하지 않아 수천 개 토큰에서도 빠릅니다.
+    """
+
+    def __init__(self, words, max_distance: int = 2):
+        self.max_distance = max_distance
+        self.index = defaultdict(set)
+        for word in words:
+            for variant in self._deletes(word, max_distance):
+                self.index[variant].add(word)
+
+    @staticmethod
+    def _deletes(word: str, distance: int) -> set:
+        variants, frontier = {word}, {word}
+        for _ in range(distance):
+            frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+            variants |= frontier
+        return variants
+
+    def search(self, word: str, radius: int) -> List[Tuple[str, int]]:
+        radius = min(radius, self.max_distance)
+        candidates = set()
+        for variant in self._deletes(word, radius):
+            candidates |= self.index.get(variant, set())
+
+        found = []
+        for candidate in candidates:
+            if abs(len(candidate) - len(word)) > radius:
+                continue
+            distance = levenshtein(word, candidate)
+            if distance <= radius:
+                found.append((candidate, distance))
+        return found
+
+def typo_radius(token: str) -> int:
+    return 2 if len(token) >= 8 else 1
+
+# ====================================================================================================
+# 비영어 탐지 (문자 체계 + 기능어)
+# 라틴 문자를 쓰는 다른 언어에서 자주 나오는 기능어. 영어 키워드에도 우연히 나올 수 있어 삭제하지 않고 LLM 확인으로 넘깁니다.
+FOREIGN_FUNCTION_WORDS = {
+    'de', 'del', 'las', 'los', 'el', 'para', 'con', 'por', 'und', 'mit', 'fur', 'fuer', 'der', 'das',
+    'pour', 'avec', 'les', 'des', 'une', 'sans', 'sur', 'dans', 'ohne', 'uma',
+}
+
+def keyword_scripts(keyword: str) -> set:
+    """키워드에 쓰인 문자 체계(LATIN, HANGUL, CJK 등)를 반환합니다."""
+    return {unicodedata.name(ch, 'UNKNOWN').split()[0] for ch in keyword if ch.isalpha()}
+
+# ====================================================================================================
+# 규칙 기반 사전 필터
+def prefilter_keywords(keywords: List[str], search_volumes: Optional[List[float]] = None,
+                       min_typo_token_length: int = 4, typo_frequency_ratio: float = 5.0) -> Tuple[Dict[str, str], Dict[str, List[str]]]:
+    """
+    filter_prompt의 세 조건(비영어, 복수형, 오타)을 규칙으로 먼저 적용합니다.
+    (삭제할 키워드 -> 사유, 판단이 애매한 키워드 -> LLM이 비교할 상대 키워드 목록)을 반환합니다.
+    사유는 'non_english', 'plural', 'typo' 중 하나입니다.
+    """
+    volumes = dict(zip(keywords, search_volumes)) if search_volumes is not None else {}
+    removed: Dict[str, str] = {}
+    ambiguous: Dict[str, List[str]] = {}
+
+    # 1. 비영어: 라틴 문자가 아닌 글자가 있으면 삭제, 라틴 문자라도 비ASCII 글자나 외국어 기능어가 있으면 애매
+    for keyword in keywords:
+        scripts = keyword_scripts(keyword)
+        if scripts - {'LATIN'}:
+            removed[keyword] = 'non_english'
+        elif not keyword.isascii() or FOREIGN_FUNCTION_WORDS.intersection(keyword.split()):
+            ambiguous[keyword] = []
+
+    remaining = [k for k in keywords if k not in removed]
+
+    # 2. 복수형: 같은 단수형으로 모이는 키워드 중 복수 토큰이 가장 적은 것(동률이면 검색량이 큰 것)만 남김
+    groups = defaultdict(list)
+    for keyword in remaining:
+        groups[lemma_key(keyword)].append(keyword)
+
+    for key, members in groups.items():
+        if len(members) < 2:
+            continue
+        def plural_count(keyword):
+            return sum(token != lemma for token, lemma in zip(keyword.split(), key))
+        keep = min(members, key=lambda k: (plural_count(k), -(volumes.get(k) or 0)))
+        for keyword in members:
+            if keyword != keep:
+                removed[keyword] = 'plural'
+
+    remaining = [k for k in remaining if k not in removed]
+    keyword_set = set(remaining)
+
+    # 3. 오타: 토큰 하나만 바꿨을 때 다른 키워드와 같아지는 경우, 바뀐 토큰이 키워드 전체에서 훨씬 자주 나오면 오타로 삭제
+    token_frequency = Counter(token for keyword in remaining for token in set(keyword.split()))
+    index = DeleteIndex(token for token in token_frequency if token.isalpha() and len(token) >= min_typo_token_length)
+
+    neighbors = {}
+
+    for keyword in remaining:
+        tokens = keyword.split()
+        for i, token in enumerate(tokens):
+            if not token.isalpha() or len(token) < min_typo_token_length:
+                continue
+            if token not in neighbors:
+                neighbors[token] = [
+                    candidate for candidate, distance in index.search(token, typo_radius(token))
+                    if distance > 0 and singularize(candidate) != singularize(token)
+                ]
+            for candidate in neighbors[token]:
+                # 상대 토큰이 더 드물거나 이 키워드의 검색량이 더 크면, 이 키워드가 아니라 상대 쪽이 오타 후보입니다.
+                if token_frequency[candidate] < token_frequency[token]:
+                    continue
+                original = ' '.join(tokens[:i] + [candidate] + tokens[i + 1:])
+                if original not in keyword_set or original in removed:
+                    continue
+                if (volumes.get(keyword) or 0) > (volumes.get(original) or 0):
+                    continue
+                if token_frequency[candidate] >= typo_frequency_ratio * token_frequency[token]:
+                    removed[keyword] = 'typo'
+                    break
+                ambiguous.setdefault(keyword, []).append(original)
+            if keyword in removed:
+                break
+
+    ambiguous = {k: v for k, v in ambiguous.items() if k not in removed}
+    return removed, ambiguous
@@ -0,0 +1,77 @@
+from typing import List, Sequence
+import numpy as np
+from utils.config_loader import config
+from utils.keyword_filter import singularize
+
+# 연관성 카테고리(LLM 영문 라벨 / 한글 라벨) -> config의 가중치 키
+CATEGORY_WEIGHT_KEYS = {
+    'Direct': 'direct_weight', '직접': 'direct_weight',
+    'Related': 'related_weight', '중간': 'related_weight',
+    'Indirect': 'indirect_weight', '간접': 'indirect_weight',
+    'NotRelated': 'not_related_weight', '없음': 'not_related_weight',
+}
+
+# ====================================================================================================
+# 복합 점수
+def category_weights(categories: Sequence) -> np.ndarray:
+    fallback = config.getfloat('keyword_ranking', 'unclassified_weight', fallback=0.3)
+    return np.array([
+        config.getfloat('keyword_ranking', CATEGORY_WEIGHT_KEYS[c], fallback=fallback) if c in CATEGORY_WEIGHT_KEYS else fallback
+        for c in categories
+    ], dtype=float)
+
+def composite_scores(keywords: Sequence[str], value_scores: Sequence, categories: Sequence) -> np.ndarray:
+    """
+    value_score(로그 후 0~1 정규화) x 연관성 카테고리 가중치 x 롱테일 패널티로 복합 점수를 계산합니다.
+    단어 수가 longtail_words를 넘으면 한 단어마다 longtail_penalty를 곱합니다.
+    """
+    values = np.log1p(np.nan_to_num(np.asarray(value_scores, dtype=float), nan=0.0).clip(min=0))
+    spread = values.max() - values.min() if len(values) else 0
+    normalized = (values - values.min()) / spread if spread > 0 else np.ones_like(values)
+
+    word_counts = np.array([len(keyword.split()) for keyword in keywords])
+    extra_words = np.maximum(word_counts - config.getint('keyword_ranking', 'longtail_words', fallback=3), 0)
+    length_penalty = config.getfloat('keyword_ranking', 'longtail_penalty', fallback=0.85) ** extra_words
+
+    # value_score가 모두 0이어도 카테고리 순서가 유지되도록 작은 바닥값을 둡니다.
+    return (0.05 + normalized) * category_weights(categories) * length_penalty
+
+# ====================================================================================================
+# 상위 k개 선택
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """argpartition으로 상위 k개를 O(n)에 고른 뒤, 그 k개만 점수 내림차순으로 정렬합니다."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.array([], dtype=int)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind='stable')]
+
+def _token_set(keyword: str) -> frozenset:
+    return frozenset(singularize(token) for token in keyword.split())
+
+def select_diverse(keywords: Sequence[str], scores: np.ndarray, k: int, threshold: float, pool_factor: int = 3) -> List[int]:
+    """
+    점수 상위 k * pool_factor개 후보에서 차례로 고르되, 이미 고른 키워드와 단어 집합 Jaccard 유사도가 threshold 이상이면 건너뜁니다.
+    다양성 조건으로 k개를 채우지 못하면 건너뛴 후보로 점수 순서대로 채웁니다. threshold >= 1이면 다양성 조건을 쓰지 않습니다.
+    """
+    pool = top_k_indices(scores, k * pool_factor if threshold < 1 else k)
+    if threshold >= 1:
+        return pool[:k].tolist()
+
+    selected, skipped, selected_tokens = [], [], []
+    for i in pool:
+        tokens = _token_set(keywords[i])
+        if any(len(tokens & other) / len(tokens | other) >= threshold for other in selected_tokens if tokens | other):
+            skipped.append(int(i))
+            continue
+        selected.append(int(i))
+        selected_tokens.append(tokens)
+        if len(selected) == k:
+            return selected
+    return selected + skipped[:k - len(selected)]
+
+def rank_keywords(keywords: Sequence[str], value_scores: Sequence, categories: Sequence, k: int) -> List[int]:
+    """복합 점수와 다양성 조건으로 상위 k개 키워드의 인덱스를 순위대로 반환합니다."""
+    scores = composite_scores(keywords, value_scores, categories)
+    threshold = config.getfloat('keyword_ranking', 'diversity_threshold', fallback=0.75)
+    return select_diverse(keywords, scores, k, threshold)
@@ -0,0 +1,186 @@
+import os, json, time, asyncio, hashlib, sqlite3
+from contextlib import closing
+from contextvars import ContextVar
+from typing import Any, Optional
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+from langchain_core.runnables import RunnableLambda
+from langchain_core.outputs import Generation, ChatGeneration
+from langchain_core.messages import message_to_dict, messages_from_dict
+from utils.config_loader import config, config_path
+
+# cache_on_success로 감싼 호출에서 받은 응답: 호출이 끝까지 성공하면 캐시에 씁니다. [(캐시, prompt, llm_string, 응답), ...]
+_pending: ContextVar[Optional[list]] = ContextVar('llm_cache_pending', default=None)
+# cache_on_success(refresh=True)로 감싼 호출은 캐시를 읽지 않고 항상 새 응답을 받습니다.
+_refresh: ContextVar[bool] = ContextVar('llm_cache_refresh', default=False)
+
+# ====================================================================================================
+# SQLite 기반 LLM 응답 캐시
+class SQLiteLLMCache(BaseCache):
+    """
+    모델 설정(llm_string)과 렌더링된 프롬프트의 SHA-256 해시를 키로 LLM 응답을 저장합니다.
+    ChatOpenAI의 cache 인자로 넘기면 with_structured_output 호출과 일반 문자열 호출 모두에 적용됩니다.
+    max_entries를 넘으면 가장 오래 사용되지 않은 항목부터 지우고(LRU), ttl_seconds가 지난 항목은 무시합니다.
+    cache_on_success로 감싼 호출의 응답은 파싱/검증까지 성공한 뒤에만 저장합니다.
+    """
+
+    def __init__(self, path: str, max_entries: int = 5000, ttl_seconds: Optional[float] = None):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS llm_cache ('
+                'key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed_at ON llm_cache (accessed_at)')
+
+    def _connect(self) -> sqlite3.Connection:
+        # chain.batch가 스레드에서 호출하므로 작업마다 새 연결을 엽니다.
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f'{llm_string}\n{prompt}'.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _dumps(return_val: RETURN_VAL_TYPE) -> str:
+        items = []
+        for gen in return_val:
+            item = {'text': gen.text, 'generation_info': gen.generation_info}
+            if isinstance(gen, ChatGeneration):
+                item['message'] = message_to_dict(gen.message)
+            items.append(item)
+        return json.dumps(items, ensure_ascii=False)
+
+    @staticmethod
+    def _loads(response: str) -> RETURN_VAL_TYPE:
+        generations = []
+        for item in json.loads(response):
+            if 'message' in item:
+                message = messages_from_dict([item['message']])[0]
+                generations.append(ChatGeneration(message=message, generation_info=item['generation_info']))
+            else:
+                generations.append(Generation(text=item['text'], generation_info=item['generation_info']))
+        return generations
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        if _refresh.get():
+            return None
+
+        key = self._key(prompt, llm_string)
+        now = time.time()
+
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute('SELECT response, created_at FROM llm_cache WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+
+            response, created_at = row
+            if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                conn.execute('DELETE FROM llm_cache WHERE key = ?', (key,))
+                return None
+
+            conn.execute('UPDATE llm_cache SET accessed_at = ? WHERE key = ?', (now, key))
+
+        try:
+            return self._loads(response)
+        except Exception:
+            return None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        pending = _pending.get()
+        if pending is not None:
+            pending.append((self, prompt, llm_string, return_val))
+            return
+        self.write(prompt, llm_string, return_val)
+
+    def write(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = self._key(prompt, llm_string)
+        now = time.time()
+
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO llm_cache (key, response, created_at, accessed_at) VALUES (?, ?, ?, ?)',
+                (key, self._dumps(return_val), now, now)
+            )
+            # LRU: 최근 사용 순으로 max_entries개만 남깁니다.
+            conn.execute(
+                'DELETE FROM llm_cache WHERE key IN ('
+                'SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,)
+            )
+
+    def clear(self, **kwargs: Any) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute('DELETE FROM llm_cache')
+
+# ====================================================================================================
+# 검증된 응답만 캐시
+def _flush(pending: list) -> None:
+    for cache, prompt, llm_string, return_val in pending:
+        cache.write(prompt, llm_string, return_val)
+
+def cache_on_success(runnable, refresh: bool = False):
+    """
+    runnable(프롬프트 | LLM | 파서)이 끝까지 성공했을 때만, 그 안에서 받은 LLM 응답을 캐시에 씁니다.
+    파싱이나 스키마 검증에 실패한 응답은 캐시에 남지 않으므로, 다시 요청하면 같은 잘못된 응답 대신 새 응답을 받습니다.
+    refresh=True면 캐시를 읽지 않고 새 응답을 받아, 성공하면 기존 항목을 덮어씁니다. (재시도용)
+    batch로 호출하면 입력마다 따로 판단합니다.
+    """
+    def _enter():
+        return _pending.set([]), _refresh.set(refresh)
+
+    def _exit(tokens):
+        pending = _pending.get()
+        _pending.reset(tokens[0])
+        _refresh.reset(tokens[1])
+        return pending
+
+    def call(input, config):
+        tokens = _enter()
+        try:
+            output = runnable.invoke(input, config)
+        finally:
+            pending = _exit(tokens)
+        _flush(pending)
+        return output
+
+    async def acall(input, config):
+        tokens = _enter()
+        try:
+            output = await runnable.ainvoke(input, config)
+        finally:
+            pending = _exit(tokens)
+        if pending:
+            await asyncio.to_thread(_flush, pending)
+        return output
+
+    return RunnableLambda(call, afunc=acall, name=runnable.get_name())
+
+# ====================================================================================================
+# 노드별 캐시 선택
+_llm_cache: Optional[SQLiteLLMCache] = None
+
+def node_cache(node: str):
+    """
+    노드에서 사용할 캐시를 반환합니다. ChatOpenAI(cache=...)에 그대로 넘기면 됩니다.
+    [llm_cache] enabled가 꺼져 있거나 [llm_cache_bypass]에서 해당 노드가 켜져 있으면 False(캐시 미사용)를 반환합니다.
+    """
+    global _llm_cache
+
+    if not config.getboolean('llm_cache', 'enabled', fallback=False):
+        return False
+    if config.getboolean('llm_cache_bypass', node, fallback=False):
+        return False
+
+    if _llm_cache is None:
+        ttl_hours = config.getfloat('llm_cache', 'ttl_hours', fallback=0)
+        _llm_cache = SQLiteLLMCache(
+            path=os.path.join(os.path.dirname(config_path), config.get('llm_cache', 'path', fallback='.cache/llm_cache.sqlite')),
+            max_entries=config.getint('llm_cache', 'max_entries', fallback=5000),
+            ttl_seconds=ttl_hours * 3600 if ttl_hours > 0 else None,
+        )
+    return _llm_cache
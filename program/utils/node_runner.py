@@ -0,0 +1,124 @@
+import time, asyncio
+from typing import Any, Callable, Generator, Optional
+from utils.llm_cache import cache_on_success
+
+# ====================================================================================================
+# 동기/비동기 겸용 노드
+# 노드 본문을 LLM 호출 지점마다 요청을 yield하는 제너레이터로 한 번만 작성하고,
+# 같은 본문을 동기(.invoke/.batch)와 비동기(.ainvoke/.abatch)로 실행합니다.
+#
+#     def relevance_categorize_steps(state):
+#         ...
+#         results = yield LLMBatch(chain, inputs, config)
+#         ...
+#         return {'data': data}
+#
+#     relevance_categorize, arelevance_categorize = node_pair(relevance_categorize_steps)
+#
+# 하위 함수도 같은 방식의 제너레이터면 `yield from`으로 부릅니다.
+# 요청이 실패하면 예외가 yield 지점에서 다시 발생하므로, 노드의 try/except가 동기 실행 때와 똑같이 동작합니다.
+# LLM 응답은 runnable 전체(파서, 스키마 검증 포함)가 성공했을 때만 캐시에 남습니다. (utils.llm_cache.cache_on_success)
+# 응답을 쓸 수 없어 다시 요청할 때는 refresh=True로 캐시를 거치지 않고 새 응답을 받습니다.
+
+class LLMCall:
+    """runnable 한 번 호출"""
+
+    def __init__(self, runnable, input: Any, config: Optional[dict] = None, refresh: bool = False):
+        self.runnable = cache_on_success(runnable, refresh)
+        self.input = input
+        self.config = config
+
+    def run(self):
+        return self.runnable.invoke(self.input, config=self.config)
+
+    async def arun(self):
+        return await self.runnable.ainvoke(self.input, config=self.config)
+
+class LLMBatch:
+    """runnable 여러 입력 병렬 호출"""
+
+    def __init__(self, runnable, inputs: list, config: Optional[dict] = None, return_exceptions: bool = False, refresh: bool = False):
+        self.runnable = cache_on_success(runnable, refresh)
+        self.inputs = inputs
+        self.config = config
+        self.return_exceptions = return_exceptions
+
+    def run(self):
+        return self.runnable.batch(self.inputs, config=self.config, return_exceptions=self.return_exceptions)
+
+    async def arun(self):
+        return await self.runnable.abatch(self.inputs, config=self.config, return_exceptions=self.return_exceptions)
+
+class InThread:
+    """오래 걸리는 CPU/파일 작업. 비동기 실행에서는 이벤트 루프를 막지 않도록 스레드에서 실행합니다."""
+
+    def __init__(self, func: Callable, *args, **kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+
+    def run(self):
+        return self.func(*self.args, **self.kwargs)
+
+    async def arun(self):
+        return await asyncio.to_thread(self.func, *self.args, **self.kwargs)
+
+class Wait:
+    """seconds초 기다립니다. (재시도 백오프) 비동기 실행에서는 이벤트 루프를 막지 않습니다."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def run(self):
+        time.sleep(self.seconds)
+
+    async def arun(self):
+        await asyncio.sleep(self.seconds)
+
+def run_steps(steps: Generator) -> Any:
+    """제너레이터가 yield한 요청을 동기로 실행하고, 제너레이터의 반환값을 돌려줍니다."""
+    try:
+        request = next(steps)
+        while True:
+            try:
+                result = request.run()
+            except Exception as e:
+                request = steps.throw(e)
+                continue
+            request = steps.send(result)
+    except StopIteration as stop:
+        return stop.value
+
+async def arun_steps(steps: Generator) -> Any:
+    """run_steps의 비동기 버전"""
+    try:
+        request = next(steps)
+        while True:
+            try:
+                result = await request.arun()
+            except Exception as e:
+                request = steps.throw(e)
+                continue
+            request = steps.send(result)
+    except StopIteration as stop:
+        return stop.value
+
+def node_pair(steps_func: Callable[..., Generator]):
+    """
+    `<name>_steps` 제너레이터 함수로 (동기 함수 <name>, 비동기 함수 a<name>)을 만듭니다.
+    동기 함수의 afunc 속성에 비동기 함수를 달아 두어, 그래프 빌더가 둘을 한 노드로 묶을 수 있게 합니다.
+    """
+    name = steps_func.__name__.removesuffix('_steps')
+
+    # functools.wraps는 쓰지 않습니다. (__wrapped__가 제너레이터 함수를 가리키면 LangChain이 스트리밍 함수로 오인합니다)
+    def sync_func(*args, **kwargs):
+        return run_steps(steps_func(*args, **kwargs))
+
+    async def async_func(*args, **kwargs):
+        return await arun_steps(steps_func(*args, **kwargs))
+
+    for func, func_name in ((sync_func, name), (async_func, f'a{name}')):
+        func.__name__ = func.__qualname__ = func_name
+        func.__doc__ = steps_func.__doc__
+    sync_func.afunc = async_func
+    return sync_func, async_func
@@ -0,0 +1,106 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextvars import copy_context
+from functools import lru_cache
+from typing import Optional
+import httpx
+from langchain_core.runnables import RunnableLambda
+from utils.rate_limiter import (
+    TokenUsageTracker, RetryTransport, AsyncRetryTransport,
+    rate_limiter, backoff_policy, http_limits
+)
+from utils.instrumentation import NodeMetricsCallback
+from utils.tracing import LLMSpanCallback
+
+# ====================================================================================================
+# LLM 클라이언트 레지스트리
+# langchain_openai는 import만으로 1초 가까이 걸리므로, 모듈을 불러올 때가 아니라 노드가 처음 LLM을 쓸 때 가져옵니다.
+# 같은 설정의 ChatOpenAI는 한 번만 만들어 재사용하고, 모든 클라이언트가 같은 커넥션 풀과 레이트 리미터를 씁니다.
+
+@lru_cache(maxsize=None)
+def http_transport() -> httpx.HTTPTransport:
+    """모든 동기 클라이언트가 공유하는 커넥션 풀"""
+    return httpx.HTTPTransport(limits=http_limits())
+
+@lru_cache(maxsize=None)
+def http_async_transport() -> httpx.AsyncHTTPTransport:
+    return httpx.AsyncHTTPTransport(limits=http_limits())
+
+@lru_cache(maxsize=None)
+def http_client(max_retries: Optional[int] = None, priority: Optional[int] = None) -> httpx.Client:
+    """
+    레이트 리미터를 거쳐 요청하고 429/5xx를 백오프하며 재시도하는 동기 httpx 클라이언트.
+    재시도 횟수(max_retries)나 우선순위(priority)가 다르면 별도 클라이언트를 만들지만 커넥션 풀은 공유합니다.
+    """
+    return httpx.Client(transport=RetryTransport(http_transport(), rate_limiter(), backoff_policy(max_retries), priority))
+
+@lru_cache(maxsize=None)
+def http_async_client(max_retries: Optional[int] = None, priority: Optional[int] = None) -> httpx.AsyncClient:
+    """http_client의 비동기 버전"""
+    return httpx.AsyncClient(transport=AsyncRetryTransport(http_async_transport(), rate_limiter(), backoff_policy(max_retries), priority))
+
+@lru_cache(maxsize=None)
+def usage_tracker() -> TokenUsageTracker:
+    return TokenUsageTracker(rate_limiter())
+
+@lru_cache(maxsize=None)
+def node_metrics() -> NodeMetricsCallback:
+    return NodeMetricsCallback()
+
+@lru_cache(maxsize=None)
+def llm_spans() -> LLMSpanCallback:
+    return LLMSpanCallback()
+
+@lru_cache(maxsize=None)
+def chat_model(model: str, temperature: float = 0, node: str = None, priority: int = None, retries: int = None, **kwargs):
+    """
+    설정이 같은 ChatOpenAI를 처음 요청될 때 만들고 이후에는 재사용합니다.
+    node를 주면 해당 노드의 LLM 응답 캐시(node_cache)를 붙입니다.
+    priority를 주면 그 우선순위로, 아니면 utils.rate_limiter.request_priority로 지정한 우선순위로 요청합니다.
+    429/5xx 재시도는 레이트 리미터를 거치는 httpx 전송 계층만 맡으므로 SDK 재시도(max_retries)는 받지 않습니다.
+    retries를 주면 전송 계층 재시도 횟수를 [rate_limit] max_retries 대신 그 값으로 씁니다. (0이면 재시도하지 않음)
+    """
+    if 'max_retries' in kwargs:
+        raise ValueError('SDK 재시도는 레이트 리미터를 거치지 않으므로 max_retries 대신 retries를 쓰세요')
+
+    from langchain_openai import ChatOpenAI
+
+    if node is not None:
+        from utils.llm_cache import node_cache
+        kwargs['cache'] = node_cache(node)
+    return ChatOpenAI(
+        model=model,
+        temperature=temperature,
+        max_retries=0,
+        callbacks=[usage_tracker(), node_metrics(), llm_spans()],
+        http_client=http_client(retries, priority),
+        http_async_client=http_async_client(retries, priority),
+        **kwargs
+    )
+
+def with_deadline(runnable, seconds: float):
+    """
+    runnable 호출 하나가 seconds초(경과 시간 기준) 안에 끝나지 않으면 TimeoutError를 냅니다.
+    httpx timeout은 데이터를 받을 때마다 다시 재므로 느리게 흘러오는 응답을 끊지 못합니다. 이 제한은 호출 전체에 걸립니다.
+    batch/abatch로 부르면 입력마다 따로 적용됩니다. 동기 호출은 제한 시간이 지나면 기다리지 않고 돌아오며,
+    남은 요청은 httpx timeout이 지나면 정리됩니다.
+    """
+    def _timeout() -> TimeoutError:
+        return TimeoutError(f'{seconds:g}초 안에 응답을 받지 못했습니다')
+
+    def call(input, config):
+        executor = ThreadPoolExecutor(max_workers=1)
+        future = executor.submit(copy_context().run, runnable.invoke, input, config)
+        executor.shutdown(wait=False)
+        try:
+            return future.result(timeout=seconds)
+        except FutureTimeoutError:
+            raise _timeout() from None
+
+    async def acall(input, config):
+        try:
+            return await asyncio.wait_for(runnable.ainvoke(input, config), seconds)
+        except asyncio.TimeoutError:
+            raise _timeout() from None
+
+    return RunnableLambda(call, afunc=acall, name=runnable.get_name())
@@ -0,0 +1,168 @@
+import os, threading
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+from uuid import UUID
+from utils.config_loader import config
+from utils.llm_usage import UsageCallbackHandler
+
+# ====================================================================================================
+# OpenTelemetry 트레이싱 (선택)
+# [tracing] enabled = true일 때만 opentelemetry를 불러옵니다. 꺼져 있으면 모든 함수가 아무것도 하지 않습니다.
+# 상품 실행마다 루트 스팬(product_run)을, 그 아래에 노드 스팬과 LLM 호출 스팬을 만듭니다.
+# (스팬은 utils.instrumentation의 instrument_run / instrument_node가 엽니다)
+#
+# exporter
+#   otlp    : otlp_endpoint의 OTLP collector로 gRPC 전송
+#   file    : file_path에 스팬을 한 줄에 하나씩 JSON으로 기록 (오프라인 확인용)
+#   console : 표준 출력
+
+# NodeMetrics 카운터 → 스팬 속성 이름
+USAGE_ATTRIBUTES = {
+    'llm_calls': 'llm.calls',
+    'cache_hits': 'llm.cache_hits',
+    'prompt_tokens': 'gen_ai.usage.input_tokens',
+    'completion_tokens': 'gen_ai.usage.output_tokens',
+    'retries': 'http.retries',
+}
+
+# 노드가 돌려주는 키워드 목록 필드
+KEYWORD_FIELDS = ('title_keyword', 'bp_keyword', 'description_keyword', 'leftover', 'backend_keywords')
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+def enabled() -> bool:
+    return config.getboolean('tracing', 'enabled', fallback=False)
+
+def _exporter():
+    kind = config.get('tracing', 'exporter', fallback='otlp')
+    if kind == 'otlp':
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter(endpoint=config.get('tracing', 'otlp_endpoint', fallback='http://localhost:4317'), insecure=True)
+
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+    if kind == 'file':
+        path = config.get('tracing', 'file_path', fallback='output/traces.jsonl')
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        return ConsoleSpanExporter(out=open(path, 'a', encoding='utf-8'), formatter=lambda span: span.to_json(indent=None) + '\n')
+    if kind == 'console':
+        return ConsoleSpanExporter()
+    raise ValueError(f'[tracing] exporter는 otlp, file, console 중 하나여야 합니다: {kind}')
+
+def tracer():
+    """[tracing] 설정으로 만든 프로세스 공용 Tracer를 반환합니다. 꺼져 있으면 None을 반환합니다."""
+    global _tracer
+
+    if not enabled():
+        return None
+
+    with _tracer_lock:
+        if _tracer is None:
+            from opentelemetry import trace
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+            # 프로세스가 끝날 때 TracerProvider가 남은 스팬을 내보냅니다.
+            provider = TracerProvider(resource=Resource.create({'service.name': config.get('tracing', 'service_name', fallback='listing-agent')}))
+            provider.add_span_processor(BatchSpanProcessor(_exporter()))
+            trace.set_tracer_provider(provider)
+            _tracer = provider.get_tracer('listing-agent')
+    return _tracer
+
+# ====================================================================================================
+# 스팬
+def _clean(attributes: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    # OpenTelemetry 속성은 문자열/숫자/불리언만 허용합니다.
+    return {
+        key: value if isinstance(value, (str, bool, int, float)) else str(value)
+        for key, value in (attributes or {}).items() if value is not None
+    }
+
+@contextmanager
+def span(name: str, attributes: Optional[Dict[str, Any]] = None):
+    """스팬을 열어 현재 컨텍스트로 둡니다. 블록에서 난 예외는 스팬에 기록됩니다. 트레이싱이 꺼져 있으면 None을 줍니다."""
+    t = tracer()
+    if t is None:
+        yield None
+        return
+    with t.start_as_current_span(name, attributes=_clean(attributes)) as current:
+        yield current
+
+def set_attributes(current, attributes: Dict[str, Any]) -> None:
+    if current is not None:
+        current.set_attributes(_clean(attributes))
+
+def add_event(name: str, attributes: Optional[Dict[str, Any]] = None) -> None:
+    """현재 스팬(노드 스팬)에 이벤트를 남깁니다. (HTTP 재시도 등)"""
+    if not enabled():
+        return
+    from opentelemetry import trace
+    trace.get_current_span().add_event(name, _clean(attributes))
+
+def usage_attributes(counts: Dict[str, int], cost_usd: float) -> Dict[str, Any]:
+    return {**{USAGE_ATTRIBUTES[key]: value for key, value in counts.items() if key in USAGE_ATTRIBUTES}, 'llm.cost_usd': round(cost_usd, 6)}
+
+def keyword_attributes(state: Any = None, update: Any = None) -> Dict[str, Any]:
+    """노드 입력 상태의 키워드 수와, 노드가 돌려준 키워드 테이블/목록의 크기"""
+    attributes = {}
+    if isinstance(state, dict) and state.get('data') is not None:
+        attributes['keywords.input'] = len(state['data'])
+    if isinstance(update, dict):
+        if update.get('data') is not None:
+            attributes['keywords.output'] = len(update['data'])
+        for key in KEYWORD_FIELDS:
+            if isinstance(update.get(key), list):
+                attributes[f'keywords.{key}'] = len(update[key])
+    return attributes
+
+# ====================================================================================================
+# LLM 호출 스팬
+class LLMSpanCallback(UsageCallbackHandler):
+    """ChatOpenAI(callbacks=[...])에 붙여 LLM 호출마다 현재 노드 스팬 아래에 스팬을 만듭니다."""
+
+    def __init__(self):
+        super().__init__()
+        self._spans: Dict[UUID, Any] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages, *, run_id: UUID, **kwargs: Any) -> None:
+        t = tracer()
+        if t is None:
+            return
+        params = kwargs.get('invocation_params') or {}
+        model = params.get('model') or params.get('model_name')
+        current = t.start_span(f'chat {model}', attributes=_clean({'gen_ai.system': 'openai', 'gen_ai.request.model': model}))
+        with self._lock:
+            self._spans[run_id] = current
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any) -> None:
+        llm_output = self.llm_output(response, run_id)
+        with self._lock:
+            current = self._spans.pop(run_id, None)
+        if current is None:
+            return
+
+        if llm_output is None:
+            current.set_attribute('llm.cache_hit', True)
+        else:
+            usage = llm_output.get('token_usage') or {}
+            set_attributes(current, {
+                'llm.cache_hit': False,
+                'gen_ai.response.model': llm_output.get('model_name'),
+                'gen_ai.usage.input_tokens': usage.get('prompt_tokens'),
+                'gen_ai.usage.output_tokens': usage.get('completion_tokens'),
+            })
+        current.end()
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        super().on_llm_error(error, run_id=run_id, **kwargs)
+        with self._lock:
+            current = self._spans.pop(run_id, None)
+        if current is None:
+            return
+
+        from opentelemetry.trace import Status, StatusCode
+        current.record_exception(error)
+        current.set_status(Status(StatusCode.ERROR, str(error)))
+        current.end()